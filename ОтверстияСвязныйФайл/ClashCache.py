@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+# Кэш пересечений между запусками: файл рядом с моделью с отпечатками основ и коммуникаций
+# и идентификаторами созданных по ним проёмов. Повторный запуск обрабатывает только новые,
+# изменённые и удалённые пары, неизменные проёмы используются повторно
+import os
+import json
+import hashlib
+
+# Версия формата файла кэша
+VERSION = 1
+
+
+# Отпечаток набора значений (числа округляются, чтобы не зависеть от погрешности вычислений)
+def fingerprint(*values):
+	parts = []
+	for value in values:
+		if isinstance(value, float):
+			parts.append('%.6f' % value)
+		elif isinstance(value, (tuple, list)):
+			parts.append(fingerprint(*value))
+		else:
+			parts.append(str(value))
+	return hashlib.md5(';'.join(parts).encode('utf-8')).hexdigest()[:16]
+
+
+# Отпечаток коммуникации из снимка: концы оси и сечение
+def mepFingerprint(rec):
+	return fingerprint(rec.end0, rec.end1, rec.shape, rec.width, rec.height)
+
+
+# Путь к файлу кэша по умолчанию (рядом с файлом модели, None для несохранённой модели)
+def defaultPath(doc):
+	if not doc.PathName:
+		return None
+	return os.path.splitext(doc.PathName)[0] + '_openings.json'
+
+
+class ClashCache(object):
+	# section - раздел файла (например, 'Wall:<имя файла основ>'), settings - значения входов, влияющих на размеры проёмов
+	def __init__(self, path, section, settings):
+		self.path = path
+		self.section = section
+		self.settingsFp = fingerprint(*settings)
+		self.data = {}
+		if path and os.path.exists(path):
+			try:
+				with open(path) as f:
+					self.data = json.load(f)
+			except ValueError:
+				self.data = {}
+		if self.data.get('version') != VERSION:
+			self.data = {'version': VERSION}
+		old = self.data.get(section) or {}
+		self.oldHosts = old.get('hosts', {})
+		self.oldMeps = old.get('meps', {})
+		self.hosts = {}
+		self.meps = {}
+		self.dirty = set()
+
+	# Передача отпечатков текущих коммуникаций; новые и изменённые попадают в dirty
+	def setMeps(self, mepFps):
+		self.meps = dict((str(k), v) for k, v in mepFps.items())
+		self.dirty = set(k for k, v in mepFps.items() if self.oldMeps.get(str(k)) != v)
+
+	# Начало обработки основы. Возвращает ранее найденные пересечения с неизменными коммуникациями
+	# или None, если основа новая или изменилась (тогда пересечения ищутся заново)
+	def host(self, hostId, hostFp):
+		key = str(hostId)
+		self.hosts[key] = {'fp': hostFp, 'pairs': {}}
+		entry = self.oldHosts.get(key)
+		if entry is None or entry['fp'] != hostFp:
+			return None
+		return [int(m) for m in entry['pairs'] if m in self.meps and int(m) not in self.dirty]
+
+	# Отпечаток пары основа - коммуникация с учётом настроек расчёта
+	def pairFingerprint(self, hostFp, mepId):
+		return fingerprint(self.settingsFp, hostFp, self.meps[str(mepId)])
+
+	# Запись о паре из прошлого запуска, если пара не изменилась (иначе None).
+	# В записи хранится идентификатор проёма (None, если проём не требовался)
+	def pair(self, hostId, mepId, pairFp):
+		entry = self.oldHosts.get(str(hostId))
+		if entry is None:
+			return None
+		pair = entry['pairs'].get(str(mepId))
+		if pair is None or pair['fp'] != pairFp:
+			return None
+		return pair
+
+	# Коммуникации, пересекавшиеся с основой в прошлом запуске
+	def oldPairs(self, hostId):
+		entry = self.oldHosts.get(str(hostId))
+		if entry is None:
+			return set()
+		return set(int(m) for m in entry['pairs'])
+
+	# Запись пары и созданного (или повторно использованного) проёма
+	def record(self, hostId, mepId, pairFp, openingId, date):
+		self.hosts[str(hostId)]['pairs'][str(mepId)] = {'fp': pairFp, 'opening': openingId, 'date': date}
+
+	# Перенос записи основы из прошлого запуска без изменений (основа обработана в прерванном запуске)
+	def carry(self, hostId):
+		key = str(hostId)
+		if key in self.oldHosts:
+			self.hosts[key] = self.oldHosts[key]
+
+	# Проёмы прошлого запуска у заданных основ, которые не вошли в текущий (удалённые или изменённые пары)
+	def staleOpenings(self, hostIds):
+		stale = []
+		for hostId in hostIds:
+			entry = self.oldHosts.get(str(hostId))
+			if entry is None:
+				continue
+			current = set(pair['opening'] for pair in self.hosts[str(hostId)]['pairs'].values())
+			for pair in entry['pairs'].values():
+				if pair['opening'] is not None and pair['opening'] not in current:
+					stale.append(pair['opening'])
+		return stale
+
+	# Все проёмы прошлого запуска
+	def openings(self):
+		return set(pair['opening'] for entry in self.oldHosts.values() for pair in entry['pairs'].values() if pair['opening'] is not None)
+
+	# Проёмы основ, которых больше нет в модели (вызывается после обработки всех основ)
+	def orphanOpenings(self):
+		orphans = []
+		for key, entry in self.oldHosts.items():
+			if key in self.hosts:
+				continue
+			for pair in entry['pairs'].values():
+				if pair['opening'] is not None:
+					orphans.append(pair['opening'])
+		return orphans
+
+	# Сохранение текущего состояния в файл. Промежуточное сохранение (final=False) дополняет прошлый запуск
+	# обработанными основами и сохраняет прежние отпечатки коммуникаций, чтобы прерванный запуск можно было продолжить
+	def save(self, final=True):
+		if not self.path:
+			return
+		# Разделы, записанные другими кэшами того же файла после загрузки, сохраняются
+		if os.path.exists(self.path):
+			try:
+				with open(self.path) as f:
+					data = json.load(f)
+				if data.get('version') == VERSION:
+					self.data = data
+			except ValueError:
+				pass
+		if final:
+			self.data[self.section] = {'settings': self.settingsFp, 'hosts': self.hosts, 'meps': self.meps}
+		else:
+			hosts = dict(self.oldHosts)
+			hosts.update(self.hosts)
+			self.data[self.section] = {'settings': self.settingsFp, 'hosts': hosts, 'meps': self.oldMeps}
+		with open(self.path, 'w') as f:
+			json.dump(self.data, f)
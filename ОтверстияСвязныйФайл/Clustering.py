@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+# Объединение близко расположенных проёмов одной основы в общий прямоугольный проём. Проёмы задаются
+# прямоугольниками (u0, v0, u1, v1) в плоскости основы, соседи ищутся по равномерной сетке,
+# группы собираются системой непересекающихся множеств
+import math
+
+# Перевод футов в миллиметры
+MM = 304.8
+
+
+# Округление размера вверх до сантиметров (объединённый проём не должен быть меньше охватываемых)
+def ceilSize(value):
+	return math.ceil(value * MM / 10 - 1e-9) * 10 / MM
+
+
+# Прямоугольник проёма по центру и размерам
+def rect(u, v, width, height):
+	return (u - width / 2, v - height / 2, u + width / 2, v + height / 2)
+
+
+# Прямоугольник в плане, охватывающий проём, повёрнутый по направлению (dx, dy)
+def rotatedRect(x, y, width, height, dx, dy):
+	length = (dx**2 + dy**2)**0.5
+	if length > 0:
+		c = abs(dx) / length; s = abs(dy) / length
+	else:
+		c = 1.0; s = 0.0
+	return rect(x, y, width * c + height * s, width * s + height * c)
+
+
+# Пересекаются ли прямоугольники или находятся ближе зазора
+def near(a, b, gap):
+	return a[0] - gap <= b[2] and b[0] - gap <= a[2] and a[1] - gap <= b[3] and b[1] - gap <= a[3]
+
+
+# Прямоугольник, охватывающий прямоугольники с заданными номерами
+def enclose(rects, indices):
+	return (min(rects[i][0] for i in indices), min(rects[i][1] for i in indices),
+		max(rects[i][2] for i in indices), max(rects[i][3] for i in indices))
+
+
+# Группы проёмов для объединения: списки номеров (в порядке первого проёма группы).
+# groups - ключи основ (объединяются только проёмы одной основы), gap - допустимый зазор между проёмами
+def clusters(rects, groups, gap):
+	n = len(rects)
+	parent = list(range(n))
+
+	def find(i):
+		while parent[i] != i:
+			parent[i] = parent[parent[i]]
+			i = parent[i]
+		return i
+
+	if n > 1:
+		# Размер ячейки: не меньше зазора и медианного размера проёма
+		sizes = sorted(max(r[2] - r[0], r[3] - r[1]) for r in rects)
+		cell = max(sizes[n // 2], gap, 1e-6)
+		grid = {}
+		half = gap / 2
+		for i, r in enumerate(rects):
+			for cu in range(int(math.floor((r[0] - half) / cell)), int(math.floor((r[2] + half) / cell)) + 1):
+				for cv in range(int(math.floor((r[1] - half) / cell)), int(math.floor((r[3] + half) / cell)) + 1):
+					key = (groups[i], cu, cv)
+					if key in grid:
+						grid[key].append(i)
+					else:
+						grid[key] = [i]
+		# Проверка пар только внутри ячеек
+		for members in grid.values():
+			for a in range(len(members)):
+				for b in range(a + 1, len(members)):
+					i = members[a]; j = members[b]
+					ri = find(i); rj = find(j)
+					if ri != rj and near(rects[i], rects[j], gap):
+						parent[max(ri, rj)] = min(ri, rj)
+
+	result = {}
+	order = []
+	for i in range(n):
+		root = find(i)
+		if root not in result:
+			result[root] = []
+			order.append(root)
+		result[root].append(i)
+	return [result[root] for root in order]
@@ -0,0 +1,916 @@
+# -*- coding: utf-8 -*-
+# Общий механизм проёмов в стенах и плитах. Коммуникации перебираются один раз: каждая находит
+# все основы, которые задевает её габарит, через общий индекс основ всех видов. Расчёт размеров
+# и создание проёма выбираются по виду основы, все проёмы создаются порциями в одном конвейере транзакций
+import clr
+
+clr.AddReference('RevitAPI')
+from Autodesk.Revit.DB import *
+
+import Links
+import SpatialIndex
+import MepSnapshot
+import Sizing
+import ClashCache
+import ParamCache
+import Pipeline
+import HostGeometry
+import Profiler
+import Intersection
+import Plan
+import Placements
+import Snapshot
+import Risers
+import Session
+import Output
+import Layout
+import HostShape
+
+# Опции для работы функций
+optS = SolidCurveIntersectionOptions() # Для нахождения пересечения объёмного тела с кривой
+
+# Режимы запуска: PLAN - только расчёт проёмов в план без изменения модели, APPLY - создание проёмов по сохранённому плану,
+# EXPORT - выгрузка снимка модели для расчёта плана вне Revit (модуль Offline)
+PLAN = 'plan'
+APPLY = 'apply'
+EXPORT = 'export'
+
+
+# Пересечение основы с коммуникацией, ожидающее расчёта и создания проёма
+class Clash(object):
+	__slots__ = ('host', 'out', 'data', 'rec', 'pairFp', 'end0', 'end1', 'center', 'direction')
+
+	def __init__(self, host, out, data, rec, pairFp, end0, end1, direction):
+		self.host = host
+		self.out = out # Подсписок вывода основы
+		self.data = data # Данные основы для расчёта (зависят от вида основы)
+		self.rec = rec # Запись коммуникации
+		self.pairFp = pairFp # Отпечаток пары
+		self.end0 = end0 # Концы отрезка пересечения (x, y, z)
+		self.end1 = end1
+		# Центр пересечения основы и коммуникации
+		self.center = XYZ((end0[0] + end1[0]) / 2, (end0[1] + end1[1]) / 2, (end0[2] + end1[2]) / 2)
+		self.direction = direction # Направление вставки семейства
+
+
+class WallHosts(object):
+	name = 'Wall'
+	title = 'Проёмы в стенах'
+	category = BuiltInCategory.OST_Walls
+	rotated = False # Задаётся ли поворот прямоугольного проёма параметрами
+	risers = False # Ищутся ли пересечения со стояками по индексу отметок
+	caps = {'Заглушка круглая': True, 'Заглушка прямоугольная': False} # Типы заглушек: имя типа -> круглая заглушка
+
+	def __init__(self, rectnOpen, roundOpen):
+		self.rectnOpen = rectnOpen # Тип прямоугольного проёма
+		self.roundOpen = roundOpen # Тип круглого проёма
+
+	# Отпечаток стены и данные для расчёта: (толщина, направление стены в плане, форма простой стены или None)
+	def hostData(self, wall, box):
+		width = wall.Width
+		wallCurve = wall.Location.Curve # Получение кривой эскиза стены
+		endWall0 = wallCurve.GetEndPoint(0) # Получение начальной точки кривой
+		endWall1 = wallCurve.GetEndPoint(1) # Получение конечной точки кривой
+		hostFp = ClashCache.fingerprint(endWall0.X, endWall0.Y, endWall0.Z, endWall1.X, endWall1.Y, endWall1.Z, width, box)
+		return hostFp, (width, (endWall1.X - endWall0.X, endWall1.Y - endWall0.Y), self.shape(wall, wallCurve, box))
+
+	# Форма простой стены для аналитического пересечения: (начало оси, конец оси, отметка низа, отметка верха).
+	# Простая стена - прямая базовая стена с линией привязки по оси, иначе None
+	def shape(self, wall, wallCurve, box):
+		if box is None or not isinstance(wallCurve, Line) or wall.CurtainGrid is not None or wall.IsStackedWall:
+			return None
+		keyRef = wall.get_Parameter(BuiltInParameter.WALL_KEY_REF_PARAM)
+		if keyRef is None or keyRef.AsInteger() != 0:
+			return None
+		endWall0 = wallCurve.GetEndPoint(0)
+		endWall1 = wallCurve.GetEndPoint(1)
+		if abs(endWall0.Z - endWall1.Z) > Intersection.TOL:
+			return None
+		return (endWall0.X, endWall0.Y, endWall0.Z), (endWall1.X, endWall1.Y, endWall1.Z), box[0][2], box[1][2]
+
+	# Концы участка оси коммуникации внутри простой стены (None - пересечение ищется по телу стены)
+	def segment(self, data, rec):
+		shape = data[2]
+		if shape is None or not isinstance(rec.curve, Line):
+			return None
+		return Intersection.wallSegment(rec.end0, rec.end1, shape[0], shape[1], data[0], shape[2], shape[3])
+
+	# Параметрическая форма стены (None - стена не простая, пересечения ищутся по телу стены)
+	def form(self, engine, wall, box, data):
+		if data[2] is None:
+			return None
+		inserts = engine.shapes.wall(wall)
+		if inserts is None:
+			return None
+		return box, inserts
+
+	# Пересечение коммуникации со стеной по форме: концы участка оси, HostShape.MISS - ось не задевает стену,
+	# None - пересечение ищется по телу стены (участок у торцов, у верха или низа, рядом со вставкой)
+	def formSegment(self, data, form, rec):
+		if not isinstance(rec.curve, Line):
+			return None
+		return Intersection.wallFormSegment(rec.end0, rec.end1, rec.bbMin, rec.bbMax, data[2], data[0], form[0], form[1])
+
+	# Направление вставки семейства - вдоль стены
+	def direction(self, engine, data, rec):
+		dx, dy = data[1]
+		return XYZ(dx, dy, 0)
+
+	# Пакетный расчёт типов и размеров проёмов (проёмы коммуникаций, идущих вдоль стены, не требуются)
+	def sizes(self, engine, clashes):
+		return Sizing.wallOpenings([c.data[1] for c in clashes], [c.data[0] for c in clashes], [c.end0 for c in clashes], [c.end1 for c in clashes],
+			[c.rec.width for c in clashes], [c.rec.height for c in clashes], engine.rectnReservType, engine.rectnReserv, engine.koef, engine.maxDiam)
+
+	# Значение параметра глубины проёма (как и раньше, для стен в него записывается дисциплина)
+	def depth(self, clash, categName):
+		return categName
+
+	# Данные стены для снимка: (направление в плане, форма простой стены, габарит плоской плиты,
+	# форма для расчёта вне Revit - стороны контуров и габариты вставок)
+	def snapshotData(self, data, form):
+		return data[1], data[2], None, ([], form[1]) if form is not None else None
+
+
+class FloorHosts(object):
+	name = 'Floor'
+	title = 'Проёмы в плитах'
+	category = BuiltInCategory.OST_Floors
+	rotated = True
+	risers = True
+	caps = {'Заглушка круглая для плиты': True, 'Заглушка прямоугольная для плиты': False}
+
+	def __init__(self, rectnOpen, roundOpen):
+		self.rectnOpen = rectnOpen # Тип прямоугольного проёма
+		self.roundOpen = roundOpen # Тип круглого проёма
+		self.opt = Options() # Для получения геометрии коммуникаций
+
+	# Отпечаток плиты и данные для расчёта: (толщина, габарит плоской плиты или None)
+	def hostData(self, floor, box):
+		width = floor.get_Parameter(BuiltInParameter.FLOOR_ATTR_THICKNESS_PARAM).AsDouble()
+		# Плита плоская, если её высота по габариту равна толщине (у наклонных плит и плит с изменённой формой она больше)
+		flat = box if box is not None and abs(box[1][2] - box[0][2] - width) < 1e-3 else None
+		return ClashCache.fingerprint(width, box), (width, flat)
+
+	# Концы участка оси коммуникации внутри плоской плиты (None - пересечение ищется по телу плиты)
+	def segment(self, data, rec):
+		box = data[1]
+		if box is None or not isinstance(rec.curve, Line):
+			return None
+		return Intersection.floorSegment(rec.end0, rec.end1, box[0][2], box[1][2], box[0], box[1])
+
+	# Параметрическая форма плиты: стороны контуров эскиза и габариты вставок и шахт (None - плита не плоская
+	# или не простая, пересечения ищутся по телу плиты)
+	def form(self, engine, floor, box, data):
+		if data[1] is None:
+			return None
+		return engine.shapes.floor(floor, data[1])
+
+	# Пересечение коммуникации с плитой по форме: концы участка оси, HostShape.MISS - ось не задевает плиту,
+	# None - пересечение ищется по телу плиты (участок у края контура, рядом со вставкой или шахтой)
+	def formSegment(self, data, form, rec):
+		if not isinstance(rec.curve, Line):
+			return None
+		return Intersection.floorFormSegment(rec.end0, rec.end1, rec.bbMin, rec.bbMax, data[1], form[0], form[1])
+
+	# Стояки, ось которых проходит через плиту в пределах её контура, и id стояков, участок которых нельзя получить
+	# аналитически (они проверяются по объёмному телу). None - плита не плоская, все стояки проверяются по телу
+	def riserHits(self, engine, data, geomSolid, riserIds):
+		width, box = data
+		if box is None:
+			return None
+		recs = []
+		rest = []
+		for i in riserIds:
+			rec = engine.meps.records[i]
+			ends = self.segment(data, rec)
+			if ends is None:
+				rest.append(i)
+			else:
+				recs.append((rec, ends))
+		# Контур прямоугольной плиты совпадает с габаритом в плане: объём тела равен объёму габарита
+		volume = (box[1][0] - box[0][0]) * (box[1][1] - box[0][1]) * width
+		if abs(geomSolid.Volume - volume) <= 1e-6 * max(volume, 1.0):
+			return [rec for rec, ends in recs], rest
+		# Иначе (проёмы, шахты, непрямоугольный контур) середина участка проверяется по телу плиты
+		hits = []
+		for rec, (end0, end1) in recs:
+			engine.prof.count('IntersectWithCurve')
+			if HostGeometry.containsPoint(geomSolid, XYZ((end0[0] + end1[0]) / 2, (end0[1] + end1[1]) / 2, (end0[2] + end1[2]) / 2)):
+				hits.append(rec)
+		return hits, rest
+
+	# Направление вставки проёма по коммуникации
+	def direction(self, engine, data, rec):
+		# Для прямоугольных воздуховодов и кабельных лотков необходимо найти угол поворота в плане
+		if rec.shape != 'rect':
+			return XYZ(0, 0, 0)
+		axes = engine.meps.sectionAxes(rec)
+		if axes is None:
+			return self.faceDirection(engine, rec)
+		# Берётся горизонтальная ось сечения - нормаль к боковой грани (у вертикальной коммуникации горизонтальны
+		# обе оси, тогда берётся ось высоты - нормаль к широкой грани)
+		dx = dy = 0.0
+		for axis in axes:
+			if abs(axis.Z) < 1e-9:
+				if rec.kind == MepSnapshot.TRAY:
+					# В отличие от воздуховода, у кабельного лотка берём не нормаль, а касательную
+					dx, dy = axis.Y, -axis.X
+				else:
+					dx, dy = axis.X, axis.Y
+		# Знак оси у соединителей разный, поворот на 180 градусов проём не меняет: направление приводится к одному знаку
+		if dx < -1e-9 or (abs(dx) <= 1e-9 and dy < 0):
+			dx, dy = -dx, -dy
+		return XYZ(dx, dy, 0)
+
+	# Направление вставки по граням геометрии коммуникации (для коммуникаций без прямоугольного соединителя)
+	def faceDirection(self, engine, rec):
+		direction = XYZ(0, 0, 0)
+		commGeom = rec.element.get_Geometry(self.opt)
+		engine.prof.count('get_Geometry')
+		# Для определения направления берём боковую сторону коммуникации и находим нормаль к ней
+		for geomObj in commGeom:
+			commGeomSolid = geomObj
+		commFaces = commGeomSolid.Faces
+		for face in commFaces:
+			faceNormal = face.FaceNormal
+			# Проверка того, что берётся именно боковая грань
+			if faceNormal.Z == 0:
+				if rec.kind == MepSnapshot.TRAY:
+					# В отличие от воздуховода, у кабельного лотка берём не нормаль, а касательную
+					direction = XYZ(faceNormal.Y, -faceNormal.X, faceNormal.Z)
+				else:
+					direction = faceNormal
+		# Направление из связанного файла переводится в систему координат проекта
+		if rec.transform is not None:
+			direction = rec.transform.OfVector(direction)
+		return direction
+
+	# Пакетный расчёт типов и размеров проёмов (размеры определяются только сечением коммуникации)
+	def sizes(self, engine, clashes):
+		return Sizing.floorOpenings([c.rec.width for c in clashes], [c.rec.height for c in clashes], engine.rectnReservType, engine.rectnReserv, engine.koef, engine.maxDiam)
+
+	# Значение параметра глубины проёма - толщина плиты
+	def depth(self, clash, categName):
+		return clash.data[0]
+
+	# Данные плиты для снимка: (направление в плане, форма простой стены, габарит плоской плиты,
+	# форма для расчёта вне Revit - стороны контуров и габариты вставок и шахт)
+	def snapshotData(self, data, form):
+		return None, None, data[1], form
+
+
+class Engine(object):
+	# kinds - виды основ (WallHosts, FloorHosts) в порядке обработки, name - имя группы транзакций и файла
+	# контрольной точки, script - имя скрипта в отчёте и файле плана. Остальные параметры - значения входов скриптов
+	def __init__(self, doc, linkDoc, kinds, name, script, rectnReservType, rectnReserv, koef, maxDiam, date,
+			cachePath=None, chunkHosts=None, chunkSeconds=None, checkpointPath=None, mepLinks=None, mergeGap=None, profile=None,
+			planMode=None, planPath=None, dedup=None, outputMode=None):
+		self.doc = doc
+		self.linkDoc = linkDoc
+		self.kinds = kinds
+		self.name = name
+		self.rectnReservType = rectnReservType
+		self.rectnReserv = rectnReserv
+		self.koef = koef
+		self.maxDiam = maxDiam
+		self.date = date
+		self.cachePath = cachePath
+		self.chunkHosts = chunkHosts
+		self.chunkSeconds = chunkSeconds
+		self.checkpointPath = checkpointPath
+		self.mepLinks = mepLinks
+		self.mergeGap = mergeGap
+		self.planMode = planMode # Режим плана (PLAN, APPLY или пусто - создание проёмов)
+		if planPath is True:
+			planPath = Snapshot.defaultPath(doc, script) if planMode == EXPORT else Plan.defaultPath(doc, script)
+		self.planPath = planPath
+		self.plan = None
+		self.result = None # Результат режима плана, применения плана или выгрузки снимка
+		self.onlyHosts = None # Основы, которыми ограничен расчёт (пусто - все основы)
+		self.dedup = dedup # Допуск совпадения с существующим проёмом или заглушкой (пусто - без проверки)
+		self.existing = {} # Индексы существующих проёмов и заглушек по видам основ
+		self.existingData = {} # id проёма или заглушки -> (элемент, точка вставки, размеры по возрастанию)
+		self.duplicates = 0 # Число проёмов, пропущенных из-за существующих
+		self.outputMode = outputMode # Режим вывода (Output.IDS, Output.TABLE, Output.COUNTS или пусто - элементы)
+		self.openingInfo = {} # id проёма -> (тип, ширина, высота) для таблицы и сводки
+		self.planRows = [] # Строки таблицы проёмов, созданных по плану
+		self.levelNames = {} # id уровня основы -> имя уровня
+		# Замер времени этапов и подсчёт обращений к API (при включённом отчёте)
+		self.prof = Profiler.Profiler(script, profile)
+		# Выходные списки по видам основ (отдельный подсписок для каждой обработанной основы)
+		self.lists = dict((kind.name, []) for kind in kinds)
+		self.listHosts = dict((kind.name, []) for kind in kinds) # Основы подсписков вывода
+		self.report = None
+		self.analytic = 0 # Число пересечений, найденных аналитически
+		self.risers = {} # id плиты -> стояки, пересечения с которыми найдены по индексу отметок
+		self.riserClashes = 0 # Число пересечений стояков с плитами, найденных по индексу отметок
+		self.mepFps = {} # id коммуникации -> отпечаток (концы оси и сечение)
+		self.warmClashes = 0 # Число проверок пар, взятых из состояния сессии
+		self.parametric = 0 # Число проверок пар по параметрической форме основы
+		# Основы и пересечения текущей порции по видам основ
+		self.chunk = dict((kind.name, []) for kind in kinds) # (основа, подсписок вывода)
+		self.clashes = dict((kind.name, []) for kind in kinds)
+
+	# Функция проверки пары по кэшу: (пара не изменилась, ранее созданный проём)
+	def cachedOpening(self, cache, hostId, mepId, pairFp):
+		pair = cache.pair(hostId, mepId, pairFp)
+		if pair is None:
+			return False, None
+		# Проём для пары не требовался
+		if pair['opening'] is None:
+			return True, None
+		cutOld = self.doc.GetElement(ElementId(pair['opening']))
+		self.prof.count('GetElement')
+		return cutOld is not None, cutOld
+
+	# Основы вида kind, которыми ограничен расчёт, в порядке коллектора (элементы не накапливаются)
+	def kindHosts(self, kind):
+		for host in FilteredElementCollector(self.linkDoc).OfCategory(kind.category).WhereElementIsNotElementType():
+			if self.onlyHosts is None or host.Id.IntegerValue in self.onlyHosts:
+				yield host
+
+	# Основы всех видов и коммуникации рядом с каждой из них. Каждая коммуникация перебирается один раз
+	# и по общему индексу основ находит все основы, которые задевает её габарит. Для индекса хранятся
+	# только id и габариты основ, сами основы перебираются при обработке повторным проходом коллектора
+	def sweep(self):
+		hosts = [] # (вид основы, id основы, габарит)
+		for kind in self.kinds:
+			for host in self.kindHosts(kind):
+				hosts.append((kind, host.Id.IntegerValue, SpatialIndex.bboxToTuples(host.get_BoundingBox(None))))
+		# Основы, обработанные в прерванном запуске, в индекс не попадают
+		done = self.pipeline.done
+		index = SpatialIndex.buildIndex((hostId, box[0], box[1]) for kind, hostId, box in hosts if box is not None and hostId not in done)
+		# Индекс плит по отметкам: стояк проходится один раз и сразу находит все плиты, которые пересекает
+		riserIndex = None
+		if any(kind.risers for kind in self.kinds):
+			riserIndex = Risers.buildIndex((hostId, box[0], box[1]) for kind, hostId, box in hosts if kind.risers and box is not None and hostId not in done)
+		near = {}
+		for rec in self.meps.records.values():
+			crossings = None
+			if riserIndex and isinstance(rec.curve, Line) and Risers.isRiser(rec.end0, rec.end1):
+				crossings = riserIndex.crossings(rec.end0, rec.end1)
+				for hostId, ends in crossings:
+					# Участок, выходящий за габарит плиты в плане, ищется по телу плиты
+					target = self.risers if ends is not None else near
+					if hostId in target:
+						target[hostId].append(rec.id)
+					else:
+						target[hostId] = [rec.id]
+			for hostId in index.query(rec.bbMin, rec.bbMax):
+				# Плиты, которые стояк не пересекает по оси, не проверяются
+				if crossings is not None and hostId in riserIndex:
+					continue
+				if hostId in near:
+					near[hostId].append(rec.id)
+				else:
+					near[hostId] = [rec.id]
+		return hosts, near
+
+	# Поиск пересечений основы (без изменения модели до фиксации порции)
+	def process(self, kind, host, box, near):
+		prof = self.prof
+		cache = self.caches[kind.name]
+		out = []
+		self.lists[kind.name].append(out)
+		self.listHosts[kind.name].append(host)
+		self.chunk[kind.name].append((host, out))
+		
+		# Отпечаток основы и пересечения, известные по прошлому запуску
+		hostId = host.Id.IntegerValue
+		hostFp, data = kind.hostData(host, box)
+		known = cache.host(hostId, hostFp)
+		riserIds = self.risers.get(hostId, [])
+		if known is None:
+			# Основа новая или изменилась: проверяются все коммуникации рядом с ней
+			candIds = near
+			inters = []
+		else:
+			# Основа не изменилась: проверяются только новые и изменённые коммуникации
+			candIds = [i for i in near if i in cache.dirty]
+			riserIds = [i for i in riserIds if i in cache.dirty]
+			inters = [self.meps.records[m] for m in known]
+		
+		# Пары, проверенные в этой сессии Dynamo при той же версии основы и неизменной коммуникации, не проверяются заново
+		warm = Session.hostClashes(host, kind.name)
+		found = []
+		if warm:
+			hot = set(i for i in candIds + riserIds if i in warm and warm[i][0] == self.mepFps[i])
+			if hot:
+				self.warmClashes += len(hot)
+				found = [self.meps.records[i] for i in hot if warm[i][1] is not None]
+				candIds = [i for i in candIds if i not in hot]
+				riserIds = [i for i in riserIds if i not in hot]
+		
+		# Пересечения простой основы находятся по её параметрической форме, по телу проверяются только
+		# коммуникации, для которых форма не даёт ответа
+		if candIds or riserIds:
+			form = kind.form(self, host, box, data)
+			if form is not None:
+				rest = []
+				for i in candIds + riserIds:
+					rec = self.meps.records[i]
+					ends = kind.formSegment(data, form, rec)
+					if ends is None:
+						rest.append(i)
+					elif ends == HostShape.MISS:
+						warm[i] = (self.mepFps[i], None)
+					else:
+						warm[i] = (self.mepFps[i], ends)
+						found.append(rec)
+				self.parametric += len(candIds) + len(riserIds) - len(rest)
+				candIds = rest
+				riserIds = []
+		
+		geomSolid = None
+		if candIds or riserIds:
+			# Получение объёмного тела основы (из хранилища, если элемент не менялся)
+			geomSolid = self.geometry.solid(host)
+		if geomSolid is not None:
+			# Стояки, найденные по индексу отметок, проверяются по контуру плиты без фильтра по телу
+			risers = []
+			if riserIds:
+				hits = kind.riserHits(self, data, geomSolid, riserIds)
+				if hits is None:
+					candIds = candIds + riserIds
+				else:
+					# Стояки без аналитического участка проверяются по телу, как и остальные коммуникации
+					risers, rest = hits
+					candIds = candIds + rest
+			self.riserClashes += len(risers)
+			# Отбор коммуникаций, пересекающихся с объёмом данной основы
+			checked = self.meps.intersecting(candIds, geomSolid) + risers
+			# Проверенные коммуникации без пересечения запоминаются до следующего запуска
+			for i in candIds + riserIds:
+				warm[i] = (self.mepFps[i], None)
+			found = found + checked
+		# В порядке категорий, как и без стояков и состояния сессии
+		found.sort(key=lambda rec: (rec.kind, rec.id))
+		inters = inters + found
+		
+		# Проверка пар по кэшу
+		pairs = []
+		for rec in inters:
+			pairFp = cache.pairFingerprint(hostFp, rec.id)
+			pairs.append((rec, pairFp) + self.cachedOpening(cache, hostId, rec.id, pairFp))
+		# При объединении проёмов изменение состава пар основы приводит к пересчёту всех её проёмов
+		if self.mergeGap is not None and (not all(reuse for rec, pairFp, reuse, cutOld in pairs) or cache.oldPairs(hostId) != set(rec.id for rec in inters)):
+			pairs = [(rec, pairFp, False, None) for rec, pairFp, reuse, cutOld in pairs]
+		
+		for rec, pairFp, reuse, cutOld in pairs:
+			prof.clash(rec.categName)
+			# Повторное использование проёма, созданного для неизменной пары
+			if reuse:
+				if cutOld is None:
+					cache.record(hostId, rec.id, pairFp, None, self.date)
+				else:
+					cache.record(hostId, rec.id, pairFp, cutOld.Id.IntegerValue, self.date)
+					out.append((rec.element, cutOld))
+				continue
+			# Участок оси, найденный в этой сессии, используется повторно. Иначе участок внутри простой основы
+			# находится аналитически, в остальных случаях - по объёмному телу
+			entry = warm.get(rec.id)
+			if entry is not None and entry[0] == self.mepFps[rec.id] and entry[1] is not None:
+				ends = entry[1]
+			else:
+				ends, geomSolid = self.segment(kind, host, data, rec, geomSolid)
+				if ends is None:
+					continue
+				warm[rec.id] = (self.mepFps[rec.id], ends)
+			self.clashes[kind.name].append(Clash(host, out, data, rec, pairFp, ends[0], ends[1], kind.direction(self, data, rec)))
+
+	# Концы участка оси коммуникации внутри основы (None, если у основы нет объёмного тела) и тело основы,
+	# если оно было получено
+	def segment(self, kind, host, data, rec, geomSolid):
+		ends = kind.segment(data, rec)
+		if ends is None:
+			if geomSolid is None:
+				geomSolid = self.geometry.solid(host)
+				if geomSolid is None:
+					return None, None
+			self.prof.count('IntersectWithCurve')
+			line = geomSolid.IntersectWithCurve(rec.curve, optS).GetCurveSegment(0) # Получение геометрии (списка кривых) пересечения и взятие первой и единственной кривой
+			end0 = line.GetEndPoint(0)
+			end1 = line.GetEndPoint(1)
+			ends = (end0.X, end0.Y, end0.Z), (end1.X, end1.Y, end1.Z)
+		else:
+			self.analytic += 1
+		return ends, geomSolid
+
+	# Индексы существующих проёмов и заглушек по видам основ (по точкам вставки). Проёмы, созданные прошлыми
+	# запусками по кэшу, не учитываются: кэш сам повторно использует или удаляет их
+	def existingOpenings(self):
+		# Заглушки - по имени типа (как в скрипте Opening), проёмы - по id типа (круглый и прямоугольный типы
+		# могут быть в одном семействе)
+		caps = {} # Имя типа заглушки -> (вид основы, круглая заглушка)
+		types = {} # Id типа проёма -> (вид основы, круглый проём)
+		for kind in self.kinds:
+			for name, isRound in kind.caps.items():
+				caps[name] = (kind.name, isRound)
+			types[kind.rectnOpen.Id.IntegerValue] = (kind.name, False)
+			types[kind.roundOpen.Id.IntegerValue] = (kind.name, True)
+		tracked = set()
+		for cache in self.caches.values():
+			tracked.update(cache.openings())
+		self.existing = dict((kind.name, SpatialIndex.GridIndex(max(self.dedup, 1.0))) for kind in self.kinds)
+		for el in FilteredElementCollector(self.doc).OfClass(FamilyInstance):
+			found = types.get(el.Symbol.Id.IntegerValue) or caps.get(el.Name)
+			if found is None or el.Id.IntegerValue in tracked:
+				continue
+			kindName, isRound = found
+			if isRound:
+				width = height = self.params.get(el, 'Диаметр проёма') or 0.0
+			else:
+				width = self.params.get(el, 'Ширина проёма') or 0.0
+				height = self.params.get(el, 'Высота проёма') or 0.0
+			p = el.Location.Point
+			point = (p.X, p.Y, p.Z)
+			self.existingData[el.Id.IntegerValue] = (el, point, sorted((width, height)))
+			self.existing[kindName].insert(el.Id.IntegerValue, point, point)
+
+	# Существующий проём или заглушка, которые закрывают проём (None, если такого нет)
+	def covering(self, kind, center, openType, openWidth, openHeight):
+		key = Layout.covering(self.existing.get(kind.name), lambda key: self.existingData[key][1:], self.dedup, center, openType, openWidth, openHeight)
+		return self.existingData[key][0] if key is not None else None
+
+	# Проёмы порции одного вида основ в плане. Пересечения, для которых проём не требуется (коммуникация идёт
+	# вдоль стены), только записываются в кэш. Возвращает список (группа пересечений, номер записи плана)
+	def planKind(self, kind, clashes, sizes, plan):
+		cache = self.caches[kind.name]
+		for n, clash in enumerate(clashes):
+			if sizes[0][n] == Sizing.NONE:
+				cache.record(clash.host.Id.IntegerValue, clash.rec.id, clash.pairFp, None, self.date)
+		
+		# Группы проёмов: при заданном зазоре соседние проёмы одной основы объединяются в общий прямоугольный проём
+		centers = [(clash.center.X, clash.center.Y, clash.center.Z) for clash in clashes]
+		directions = [(clash.direction.X, clash.direction.Y, clash.direction.Z) for clash in clashes]
+		placed = []
+		for group, center, direction, openType, openWidth, openHeight in Layout.openings(kind.name, [clash.host.Id.IntegerValue for clash in clashes],
+				centers, directions, sizes, self.mergeGap):
+			clash = clashes[group[0]]
+			categName = Layout.categNames([clashes[m].rec.categName for m in group])
+			existing = self.covering(kind, center, openType, openWidth, openHeight)
+			if existing is not None:
+				# Проём уже есть в модели: пары записываются в кэш без проёма, в выходной список попадает существующий
+				self.duplicates += 1
+				for m in group:
+					cache.record(clashes[m].host.Id.IntegerValue, clashes[m].rec.id, clashes[m].pairFp, None, self.date)
+					clashes[m].out.append((clashes[m].rec.element, existing))
+				continue
+			i = plan.add(kind.name, clash.host.Id.IntegerValue, clash.host.LevelId.IntegerValue, [clashes[m].rec.id for m in group], openType,
+				center, direction, openWidth, openHeight, categName, kind.depth(clash, categName), self.date)
+			placed.append((group, i))
+		return placed
+
+	# Аквтивация загруженных семейств проёмов (если ещё не были использованы)
+	def activate(self, kind):
+		if not kind.rectnOpen.IsActive:
+			kind.rectnOpen.Activate()
+		if not kind.roundOpen.IsActive:
+			kind.roundOpen.Activate()
+
+	# Размещение проёма по записи плана (проём создаётся пакетно при вызове placements.create()).
+	# Возвращает номер размещения
+	def place(self, kind, row):
+		center = XYZ(row['x'], row['y'], row['z'])
+		direction = XYZ(row['dx'], row['dy'], row['dz'])
+		level = self.params.level(ElementId(row['levelId']))
+		if row['type'] == Sizing.ROUND:
+			# Круглый проём и его диаметр
+			symbol = kind.roundOpen
+			values = [('Диаметр проёма', row['width'])]
+		else:
+			# Прямоугольный проём, его ширина и высота (и поворот для плит)
+			symbol = kind.rectnOpen
+			values = [('Ширина проёма', row['width']), ('Высота проёма', row['height'])]
+			if kind.rotated:
+				values += [('Поворот X', row['dx']), ('Поворот Y', row['dy'])]
+		values += [('Дисциплина проёма', row['discipline']), ('Глубина проёма', row['depth']), ('Дата', row['date'])]
+		return self.placements.add(symbol, center, direction, level, level, values)
+
+	# Функция расчёта, создания проёмов текущей порции и её фиксации
+	def flush(self):
+		if not any(self.chunk.values()):
+			return
+		prof = self.prof
+		pipeline = self.pipeline
+		# Пакетный расчёт типов и размеров всех проёмов порции (по видам основ)
+		t = prof.start()
+		sizes = dict((kind.name, kind.sizes(self, self.clashes[kind.name])) for kind in self.kinds)
+		prof.stop('Расчёт размеров', t)
+		
+		# План проёмов порции (в режиме плана - общий план всего запуска)
+		t = prof.start()
+		plan = self.plan if self.planMode == PLAN else Plan.Plan()
+		placed = dict((kind.name, self.planKind(kind, self.clashes[kind.name], sizes[kind.name], plan)) for kind in self.kinds)
+		prof.stop('Объединение проёмов' if self.mergeGap is not None else 'План проёмов', t)
+		
+		if self.planMode != PLAN:
+			# Открытие транзакции порции и создание проёмов всех видов основ по плану
+			pipeline.begin()
+			t = prof.start()
+			for kind in self.kinds:
+				self.activate(kind)
+				placed[kind.name] = [(group, self.place(kind, plan.row(i)), i) for group, i in placed[kind.name]]
+			created = self.placements.create()
+			for kind in self.kinds:
+				cache = self.caches[kind.name]
+				clashes = self.clashes[kind.name]
+				for group, n, i in placed[kind.name]:
+					cutNew = created[n]
+					if self.outputMode == Output.TABLE:
+						self.openingInfo[cutNew.Id.IntegerValue] = self.planSizes(plan, i)
+					for m in group:
+						clash = clashes[m]
+						cache.record(clash.host.Id.IntegerValue, clash.rec.id, clash.pairFp, cutNew.Id.IntegerValue, self.date)
+						clash.out.append((clash.rec.element, cutNew))
+			prof.stop('Создание проёмов', t)
+			
+			# Удаление проёмов основ порции, пары для которых исчезли или изменились
+			t = prof.start()
+			for kind in self.kinds:
+				for openingId in self.caches[kind.name].staleOpenings([host.Id.IntegerValue for host, out in self.chunk[kind.name]]):
+					prof.count('GetElement')
+					if self.doc.GetElement(ElementId(openingId)) is not None:
+						prof.count('Delete')
+						self.doc.Delete(ElementId(openingId))
+			prof.stop('Удаление проёмов', t)
+		
+		# Фиксация порции и промежуточное сохранение кэша
+		t = prof.start()
+		for kind in self.kinds:
+			for host, out in self.chunk[kind.name]:
+				pipeline.hostDone(host.Id.IntegerValue, sorted(set(cut.Id.IntegerValue for comm, cut in out)))
+		pipeline.commit()
+		if pipeline.chunked:
+			for cache in self.caches.values():
+				cache.save(False)
+		prof.stop('Фиксация', t)
+		
+		for kind in self.kinds:
+			del self.chunk[kind.name][:]
+			del self.clashes[kind.name][:]
+
+	# Создание проёмов по сохранённому плану одной транзакцией (записи видов основ, не заданных в запуске, пропускаются)
+	def applyPlan(self):
+		prof = self.prof
+		t = prof.start()
+		plan = Plan.Plan.load(self.planPath)
+		prof.stop('Загрузка плана', t)
+		self.params = ParamCache.ParamCache(self.doc)
+		self.placements = Placements.Placements(self.doc, self.params)
+		self.pipeline = Pipeline.Pipeline(self.doc, self.name)
+		kinds = dict((kind.name, kind) for kind in self.kinds)
+		created = []
+		completed = False
+		try:
+			if plan is not None and len(plan):
+				t = prof.start()
+				self.pipeline.begin()
+				for kind in self.kinds:
+					self.activate(kind)
+				placed = []
+				for i in range(len(plan)):
+					kind = kinds.get(plan.columns['kind'][i])
+					if kind is not None:
+						placed.append((i, self.place(kind, plan.row(i))))
+				created = self.placements.create()
+				prof.stop('Создание проёмов', t)
+				if self.outputMode in (Output.TABLE, Output.COUNTS):
+					self.planRows = self.planTable(plan, placed, created)
+			completed = True
+		finally:
+			self.pipeline.close(completed)
+		self.result = created
+		self.countPlacements()
+		prof.count('LookupParameter', self.params.lookups)
+		prof.count('Parameter.Set', self.params.written)
+		self.report = prof.report(openings=len(created), skippedWrites=self.params.skipped, rejectedBatches=self.placements.rejected)
+		return plan
+
+	# Строки таблицы проёмов, созданных по плану (по строке на каждую коммуникацию проёма). placed - пары
+	# (номер записи плана, номер размещения)
+	def planTable(self, plan, placed, created):
+		c = plan.columns
+		rows = []
+		for i, n in placed:
+			level = self.levelName(c['levelId'][i])
+			for mepId in c['mepIds'][i]:
+				rows.append((c['hostId'][i], level, MepSnapshot.elementId(mepId), c['discipline'][i], created[n].Id.IntegerValue) + self.planSizes(plan, i))
+		return rows
+
+	# Тип и размеры проёма по записи плана (у круглого проёма оба размера - диаметр)
+	def planSizes(self, plan, i):
+		c = plan.columns
+		if c['type'][i] == Sizing.ROUND:
+			return Sizing.ROUND, c['width'][i], c['width'][i]
+		return c['type'][i], c['width'][i], c['height'][i]
+
+	# Выгрузка снимка основ, коммуникаций и существующих проёмов для расчёта плана вне Revit
+	def exportSnapshot(self, runKey):
+		snap = Snapshot.Snapshot(runKey, {'rectnReservType': self.rectnReservType, 'rectnReserv': self.rectnReserv, 'koef': self.koef,
+			'maxDiam': self.maxDiam, 'date': self.date, 'mergeGap': self.mergeGap, 'dedup': self.dedup})
+		for kind in self.kinds:
+			for host in FilteredElementCollector(self.linkDoc).OfCategory(kind.category).WhereElementIsNotElementType():
+				box = SpatialIndex.bboxToTuples(host.get_BoundingBox(None))
+				if box is None:
+					continue
+				hostFp, data = kind.hostData(host, box)
+				# Форма простой основы: вне Revit пересечения ищутся только по ней
+				direction, shape, flat, form = kind.snapshotData(data, kind.form(self, host, box, data))
+				snap.addHost(kind.name, host.Id.IntegerValue, host.LevelId.IntegerValue, data[0], direction, shape, flat, form, box[0], box[1])
+		# Направление проёма в плите зависит только от коммуникации и рассчитывается при выгрузке
+		floors = [kind for kind in self.kinds if kind.rotated]
+		for rec in self.meps.records.values():
+			floorDir = None
+			if floors:
+				direction = floors[0].direction(self, None, rec)
+				floorDir = (direction.X, direction.Y, direction.Z)
+			snap.addMep(rec.id, rec.kind, rec.categName, rec.shape, rec.width, rec.height, isinstance(rec.curve, Line), rec.end0, rec.end1, rec.bbMin, rec.bbMax, floorDir)
+		for kindName, index in self.existing.items():
+			for key in index.boxes:
+				el, point, size = self.existingData[key]
+				snap.addExisting(kindName, key, point, size)
+		if self.planPath:
+			snap.save(self.planPath)
+		self.result = [len(snap.hosts['id']), len(snap.meps['id']), self.planPath]
+
+	def run(self):
+		prof = self.prof
+		doc = self.doc
+		if self.planMode == APPLY:
+			plan = self.applyPlan()
+			if plan is None or not plan.unresolved:
+				return
+			# Основы, не рассчитанные вне Revit, обрабатываются обычным порядком
+			self.onlyHosts = set(plan.unresolved)
+		
+		# Однократный сбор всех коммуникаций проекта и связанных файлов с сетями в снимок
+		t = prof.start()
+		self.meps = MepSnapshot.MepSnapshot(doc, Links.findLinks(doc, self.mepLinks))
+		prof.stop('Сбор коммуникаций', t)
+		
+		# Кэш параметров проёмов и уровней на время запуска, пакетное создание проёмов
+		self.params = ParamCache.ParamCache(doc)
+		self.placements = Placements.Placements(doc, self.params)
+		
+		# Объёмные тела основ (общие для скриптов в пределах сессии)
+		self.geometry = HostGeometry.HostGeometry()
+		# Параметрические формы простых основ (без объёмного тела)
+		self.shapes = HostShape.HostShapes()
+		
+		# Подключение кэша пересечений прошлых запусков (отдельный раздел для каждого вида основ)
+		t = prof.start()
+		# В режимах плана кэш не используется: план содержит все проёмы, а не только изменённые,
+		# а при применении плана обычным порядком обрабатывается только часть основ
+		cachePath = self.cachePath if not self.planMode else None
+		if cachePath is True:
+			cachePath = ClashCache.defaultPath(doc)
+		self.mepFps = mepFps = dict((rec.id, ClashCache.mepFingerprint(rec)) for rec in self.meps.records.values())
+		self.caches = {}
+		for kind in self.kinds:
+			cache = ClashCache.ClashCache(cachePath or None, kind.name + ':' + self.linkDoc.Title, [kind.rectnOpen.Id.IntegerValue, kind.roundOpen.Id.IntegerValue, self.rectnReservType, self.rectnReserv, self.koef, self.maxDiam, self.mergeGap])
+			cache.setMeps(mepFps)
+			self.caches[kind.name] = cache
+		prof.stop('Кэш пересечений', t)
+		
+		# Индекс существующих проёмов и заглушек для пропуска повторных проёмов
+		if self.dedup is not None:
+			t = prof.start()
+			self.existingOpenings()
+			prof.stop('Существующие проёмы', t)
+		
+		# Порционная обработка основ всех видов с общей контрольной точкой (в режиме плана - без порций и транзакций)
+		runKey = '+'.join(kind.name for kind in self.kinds) + ':' + self.linkDoc.Title + ':' + str(self.date)
+		if self.planMode == EXPORT:
+			t = prof.start()
+			self.exportSnapshot(runKey)
+			prof.stop('Выгрузка снимка', t)
+			self.pipeline = Pipeline.Pipeline(doc, self.name)
+			self.report = prof.report(meps=len(self.meps), hosts=self.result[0])
+			return
+		
+		if self.planMode == PLAN:
+			self.plan = Plan.Plan(runKey)
+			self.pipeline = pipeline = Pipeline.Pipeline(doc, self.name, runKey=runKey)
+		else:
+			self.pipeline = pipeline = Pipeline.Pipeline(doc, self.name, self.chunkHosts, self.chunkSeconds, self.checkpointPath, runKey)
+		
+		completed = False
+		try:
+			# Общий индекс основ и коммуникации рядом с каждой основой
+			t = prof.start()
+			hosts, near = self.sweep()
+			prof.stop('Индекс основ', t)
+			
+			kinds = dict((hostId, (kind, box)) for kind, hostId, box in hosts)
+			for host in pipeline.hosts(host for kind in self.kinds for host in self.kindHosts(kind)):
+				t = prof.start()
+				hostId = host.Id.IntegerValue
+				kind, box = kinds[hostId]
+				self.process(kind, host, box, near.get(hostId, []))
+				prof.host('Поиск пересечений', hostId, t)
+				
+				# Порция набрана по числу основ или по времени
+				if pipeline.full():
+					self.flush()
+			self.flush()
+			
+			# Основы, обработанные в прерванном запуске, переносятся в кэш без изменений
+			for hostId in pipeline.skipped:
+				self.caches[kinds[hostId][0].name].carry(hostId)
+			
+			# Удаление проёмов основ, которых больше нет в модели
+			t = prof.start()
+			orphans = [i for cache in self.caches.values() for i in cache.orphanOpenings() if doc.GetElement(ElementId(i)) is not None]
+			if orphans:
+				pipeline.begin()
+				for openingId in orphans:
+					prof.count('Delete')
+					doc.Delete(ElementId(openingId))
+				pipeline.commit()
+			prof.stop('Удаление проёмов', t)
+			completed = True
+		finally:
+			pipeline.close(completed)
+		
+		# Сохранение кэша пересечений
+		t = prof.start()
+		for cache in self.caches.values():
+			cache.save()
+		prof.stop('Кэш пересечений', t)
+		
+		# Запись плана и его сравнение с предыдущим планом из того же файла
+		if self.planMode == PLAN:
+			t = prof.start()
+			previous = Plan.Plan.load(self.planPath)
+			added, removed, changed = self.plan.diff(previous if previous is not None else Plan.Plan())
+			if self.planPath:
+				self.plan.save(self.planPath)
+			self.result = [len(self.plan), added, removed, changed]
+			prof.stop('Запись плана', t)
+		
+		# Обращения к API из вспомогательных модулей
+		prof.count('FilteredElementCollector', self.meps.collectors + 2 * len(self.kinds) + (self.dedup is not None) + self.shapes.collectors)
+		prof.count('ElementIntersectsSolidFilter', self.meps.solidFilters)
+		prof.count('get_Geometry', self.geometry.misses)
+		prof.count('ConnectorManager', self.meps.connectorLookups)
+		prof.count('FindInserts', self.shapes.insertLookups)
+		prof.count('GetJoinedElements', self.shapes.joinLookups)
+		prof.count('GetElement', self.shapes.lookups)
+		self.countPlacements()
+		prof.count('LookupParameter', self.params.lookups)
+		prof.count('Parameter.Set', self.params.written)
+		# При применении плана к проёмам плана добавляются проёмы основ, рассчитанных обычным порядком
+		if self.planMode == APPLY:
+			self.result = self.result + [cut for kind in self.kinds for out in self.lists[kind.name] for comm, cut in out]
+		self.report = prof.report(hosts=pipeline.total, meps=len(self.meps), storedSolids=self.geometry.hits, skippedWrites=self.params.skipped, analytic=self.analytic, parametric=self.parametric, shapedHosts=self.shapes.forms, risers=self.riserClashes, warmMeps=self.meps.warm, warmPairs=self.warmClashes, duplicates=self.duplicates, rejectedBatches=self.placements.rejected)
+
+	# Обращения к API при пакетном создании проёмов
+	def countPlacements(self):
+		self.prof.count('NewFamilyInstances2', self.placements.batches)
+		self.prof.count('NewFamilyInstance', self.placements.singles)
+
+	# Имя уровня основы по id (None, если уровня нет)
+	def levelName(self, levelId):
+		if levelId not in self.levelNames:
+			self.prof.count('GetElement')
+			level = self.linkDoc.GetElement(ElementId(levelId))
+			self.levelNames[levelId] = level.Name if level is not None else None
+		return self.levelNames[levelId]
+
+	# Тип и размеры проёма, созданного прошлым запуском, или существующего проёма или заглушки (по параметрам)
+	def openingSizes(self, kind, el):
+		if el.Symbol.Id.IntegerValue == kind.roundOpen.Id.IntegerValue or kind.caps.get(el.Name):
+			diam = self.params.get(el, 'Диаметр проёма')
+			return Sizing.ROUND, diam, diam
+		return Sizing.RECT, self.params.get(el, 'Ширина проёма'), self.params.get(el, 'Высота проёма')
+
+	# Строки таблицы проёмов запуска: проёмы по плану и пары коммуникация - проём обработанных основ.
+	# sizes - заполнять ли тип и размеры проёмов
+	def rows(self, sizes):
+		rows = list(self.planRows)
+		for kind in self.kinds:
+			for host, out in zip(self.listHosts[kind.name], self.lists[kind.name]):
+				level = self.levelName(host.LevelId.IntegerValue)
+				for comm, cut in out:
+					cutId = cut.Id.IntegerValue
+					info = (None, None, None)
+					if sizes:
+						info = self.openingInfo.get(cutId)
+						if info is None:
+							info = self.openingInfo[cutId] = self.openingSizes(kind, cut)
+					rows.append((host.Id.IntegerValue, level, comm.Id.IntegerValue, comm.Category.Name, cutId) + info)
+		return rows
+
+	# Значение OUT: при порционной обработке или замере вместе со списком выводятся сообщения о ходе выполнения и отчёт.
+	# В выбранном режиме вывода вместо элементов выводятся их id, таблица или сводка (в режимах плана и выгрузки
+	# результат и так состоит из чисел и строк и выводится без изменений)
+	def output(self, result):
+		if self.outputMode and self.planMode not in (PLAN, EXPORT):
+			rows = self.rows(self.outputMode == Output.TABLE) if self.outputMode in (Output.TABLE, Output.COUNTS) else None
+			result = Output.compact(result, self.outputMode, rows)
+		if self.prof.enabled:
+			return [result, self.pipeline.progress, self.report]
+		if self.pipeline.chunked:
+			return [result, self.pipeline.progress]
+		return result
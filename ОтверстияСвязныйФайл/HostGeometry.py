@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+# Геометрия основ: объёмное тело стены или плиты при грубой детализации. Тела запоминаются
+# по документу, id и версии элемента и используются повторно всеми скриптами в пределах сессии Dynamo
+import clr
+
+clr.AddReference('RevitAPI')
+from Autodesk.Revit.DB import *
+
+# Наибольшее число запоминаемых тел (при превышении хранилище очищается)
+MAX_ITEMS = 50000
+
+# Хранилище тел на время сессии: (путь документа, id элемента) -> (версия элемента, тело)
+_store = {}
+
+
+# Опции получения геометрии: грубой детализации достаточно для поиска пересечений
+def coarseOptions():
+	opt = Options()
+	opt.DetailLevel = ViewDetailLevel.Coarse
+	opt.ComputeReferences = False
+	opt.IncludeNonVisibleObjects = False
+	return opt
+
+
+# Все непустые тела из геометрии элемента (включая геометрию вложенных экземпляров)
+def solids(geomElem):
+	found = []
+	if geomElem is None:
+		return found
+	for geomObj in geomElem:
+		if isinstance(geomObj, Solid):
+			if geomObj.Volume > 0:
+				found.append(geomObj)
+		elif isinstance(geomObj, GeometryInstance):
+			found.extend(solids(geomObj.GetInstanceGeometry()))
+	return found
+
+
+# Одно тело по набору: единственное тело, объединение частей или, если объединение не удалось, наибольшее
+def mainSolid(found):
+	if not found:
+		return None
+	if len(found) == 1:
+		return found[0]
+	try:
+		union = found[0]
+		for part in found[1:]:
+			union = BooleanOperationsUtils.ExecuteBooleanOperation(union, part, BooleanOperationsType.Union)
+		if union is not None and union.Volume > 0:
+			return union
+	except Exception:
+		pass
+	return max(found, key=lambda s: s.Volume)
+
+
+# Попадание точки в тело: вертикальный отрезок через точку пересекается с телом, и точка лежит на участке пересечения
+def containsPoint(solid, point, tol=0.01, reach=1.0):
+	line = Line.CreateBound(XYZ(point.X, point.Y, point.Z - reach), XYZ(point.X, point.Y, point.Z + reach))
+	segments = solid.IntersectWithCurve(line, SolidCurveIntersectionOptions())
+	for i in range(segments.SegmentCount):
+		segment = segments.GetCurveSegment(i)
+		z0 = segment.GetEndPoint(0).Z
+		z1 = segment.GetEndPoint(1).Z
+		if min(z0, z1) - tol <= point.Z <= max(z0, z1) + tol:
+			return True
+	return False
+
+
+class HostGeometry(object):
+	def __init__(self):
+		self.opt = coarseOptions()
+		self.hits = 0 # Число тел, взятых из хранилища
+		self.misses = 0 # Число тел, полученных из модели
+
+	# Объёмное тело элемента (None, если у элемента нет непустых тел)
+	def solid(self, element):
+		key = (element.Document.PathName, element.Id.IntegerValue)
+		version = element.VersionGuid
+		stored = _store.get(key)
+		if stored is not None and stored[0] == version:
+			self.hits += 1
+			return stored[1]
+		self.misses += 1
+		solid = mainSolid(solids(element.get_Geometry(self.opt)))
+		if len(_store) >= MAX_ITEMS:
+			_store.clear()
+		_store[key] = (version, solid)
+		return solid
+
+
+# Очистка хранилища (например, после перезагрузки связанного файла)
+def clear():
+	_store.clear()
@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+# Параметрическая форма простых основ: прямая стена задаётся осью, толщиной и отметками, плоская плита -
+# контурами эскиза и отметками. По форме участок оси коммуникации внутри основы находится без объёмного тела.
+# Стены с изменённым профилем, плиты с непрямолинейным эскизом и основы с присоединённой геометрией формы
+# не имеют и проверяются по телу. Вставки основы (окна, двери, проёмы) и шахты, прорезающие плиту, хранятся
+# габаритами: коммуникации, которые их задевают, также проверяются по телу
+import clr
+
+clr.AddReference('RevitAPI')
+from Autodesk.Revit.DB import *
+
+import SpatialIndex
+import Intersection
+
+# Ось коммуникации не задевает основу
+MISS = Intersection.MISS
+
+
+class HostShapes(object):
+	def __init__(self):
+		self.shafts = {} # Путь документа -> габариты шахт (собираются при первом запросе)
+		self.lookups = 0 # Число получений эскизов и вставок по id
+		self.insertLookups = 0 # Число поисков вставок основ
+		self.joinLookups = 0 # Число проверок присоединённой геометрии
+		self.collectors = 0 # Число созданных коллекторов
+		self.forms = 0 # Число основ, проверенных по форме
+
+	# Есть ли у основы присоединённая геометрия (соединения стен по торцам сюда не входят)
+	def joined(self, host):
+		self.joinLookups += 1
+		return len(JoinGeometryUtils.GetJoinedElements(host.Document, host)) > 0
+
+	# Габариты вставок основы: окон, дверей, проёмов и встроенных стен
+	def inserts(self, host):
+		self.insertLookups += 1
+		boxes = []
+		for elementId in host.FindInserts(True, False, True, True):
+			self.lookups += 1
+			box = SpatialIndex.bboxToTuples(host.Document.GetElement(elementId).get_BoundingBox(None))
+			if box is not None:
+				boxes.append(box)
+		return boxes
+
+	# Габариты шахт документа основы, которые задевают габарит box
+	def shaftBoxes(self, doc, box):
+		key = doc.PathName
+		if key not in self.shafts:
+			self.collectors += 1
+			shafts = []
+			for shaft in FilteredElementCollector(doc).OfCategory(BuiltInCategory.OST_ShaftOpening).WhereElementIsNotElementType():
+				shaftBox = SpatialIndex.bboxToTuples(shaft.get_BoundingBox(None))
+				if shaftBox is not None:
+					shafts.append(shaftBox)
+			self.shafts[key] = shafts
+		return [shaft for shaft in self.shafts[key] if SpatialIndex.boxesOverlap(box[0], box[1], shaft[0], shaft[1])]
+
+	# Форма простой стены: габариты вставок (None - профиль стены изменён или его нельзя проверить, верх или низ
+	# стены прикреплён к другой основе, либо к стене присоединена геометрия)
+	def wall(self, wall):
+		sketchId = getattr(wall, 'SketchId', None)
+		if sketchId is None or sketchId != ElementId.InvalidElementId:
+			return None
+		for bip in (BuiltInParameter.WALL_TOP_IS_ATTACHED, BuiltInParameter.WALL_BOTTOM_IS_ATTACHED):
+			attached = wall.get_Parameter(bip)
+			if attached is not None and attached.AsInteger() != 0:
+				return None
+		if self.joined(wall):
+			return None
+		self.forms += 1
+		return self.inserts(wall)
+
+	# Форма плоской плиты с габаритом box: (стороны контуров эскиза в плане ((x0, y0), (x1, y1)), габариты вставок и шахт).
+	# Стороны берутся по обоим концам отрезков: порядок и направление кривых в контуре эскиза не гарантируются.
+	# None - у плиты нет эскиза, в эскизе есть дуги или сплайны, либо к плите присоединена геометрия
+	def floor(self, floor, box):
+		sketchId = getattr(floor, 'SketchId', None)
+		if sketchId is None or sketchId == ElementId.InvalidElementId:
+			return None
+		self.lookups += 1
+		sketch = floor.Document.GetElement(sketchId)
+		if sketch is None:
+			return None
+		edges = []
+		for curveArray in sketch.Profile:
+			for curve in curveArray:
+				if not isinstance(curve, Line):
+					return None
+				p0 = curve.GetEndPoint(0)
+				p1 = curve.GetEndPoint(1)
+				edges.append(((p0.X, p0.Y), (p1.X, p1.Y)))
+		if not edges or self.joined(floor):
+			return None
+		self.forms += 1
+		return edges, self.inserts(floor) + self.shaftBoxes(floor.Document, box)
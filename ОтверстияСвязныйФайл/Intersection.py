@@ -0,0 +1,174 @@
+# -*- coding: utf-8 -*-
+# Аналитическое пересечение оси коммуникации с простыми основами: прямой вертикальной стеной постоянной толщины
+# и плоской плитой. Отрезок оси отсекается по толщине стены или отметкам плиты, форма плиты в плане проверяется
+# по сторонам контуров эскиза. Функции возвращают концы участка оси внутри основы или None, если участок нельзя
+# надёжно получить без геометрии основы (тогда пересечение ищется по объёмному телу)
+import SpatialIndex
+
+# Допуск сравнения длин
+TOL = 1e-6
+
+# Ось коммуникации не задевает основу
+MISS = 'miss'
+
+
+# Участок параметров t0..t1 отрезка, на котором координата s0 + ds * t лежит в пределах lo..hi (None, если участка нет)
+def clipRange(t0, t1, s0, ds, lo, hi):
+	if abs(ds) < TOL:
+		if s0 < lo or s0 > hi:
+			return None
+		return t0, t1
+	ta = (lo - s0) / ds
+	tb = (hi - s0) / ds
+	if ta > tb:
+		ta, tb = tb, ta
+	t0 = max(t0, ta)
+	t1 = min(t1, tb)
+	if t1 - t0 < TOL:
+		return None
+	return t0, t1
+
+
+# Точка отрезка p0 - p1 по параметру t
+def pointAt(p0, p1, t):
+	return (p0[0] + (p1[0] - p0[0]) * t, p0[1] + (p1[1] - p0[1]) * t, p0[2] + (p1[2] - p0[2]) * t)
+
+
+# Пересечение отрезка p0 - p1 со стеной: start и end - концы оси стены (по середине толщины), zMin и zMax - отметки
+# низа и верха. Участок должен лежать в теле стены не ближе толщины к её торцам (там геометрию меняют соединения)
+def wallSegment(p0, p1, start, end, thickness, zMin, zMax):
+	dx = end[0] - start[0]
+	dy = end[1] - start[1]
+	length = (dx**2 + dy**2)**0.5
+	if length < TOL:
+		return None
+	ux = dx / length; uy = dy / length
+	# Поперечная координата концов отрезка (отсчёт от оси стены по нормали к ней)
+	s0 = (p0[0] - start[0]) * -uy + (p0[1] - start[1]) * ux
+	s1 = (p1[0] - start[0]) * -uy + (p1[1] - start[1]) * ux
+	# Отрезок, параллельный стене, пересекается с ней на всей длине - такой участок считается по телу
+	if abs(s1 - s0) < TOL:
+		return None
+	t = clipRange(0.0, 1.0, s0, s1 - s0, -thickness / 2, thickness / 2)
+	if t is None:
+		return None
+	a = pointAt(p0, p1, t[0])
+	b = pointAt(p0, p1, t[1])
+	for q in (a, b):
+		u = (q[0] - start[0]) * ux + (q[1] - start[1]) * uy
+		if u < thickness or u > length - thickness or q[2] < zMin + TOL or q[2] > zMax - TOL:
+			return None
+	return a, b
+
+
+# Пересечение отрезка p0 - p1 с плоской плитой: zMin и zMax - отметки низа и верха, xyMin и xyMax - габарит в плане.
+# Участок должен целиком лежать внутри габарита в плане
+def floorSegment(p0, p1, zMin, zMax, xyMin, xyMax):
+	# Горизонтальный отрезок идёт внутри плиты - такой участок считается по телу
+	if abs(p1[2] - p0[2]) < TOL:
+		return None
+	t = clipRange(0.0, 1.0, p0[2], p1[2] - p0[2], zMin, zMax)
+	if t is None:
+		return None
+	a = pointAt(p0, p1, t[0])
+	b = pointAt(p0, p1, t[1])
+	for q in (a, b):
+		if q[0] < xyMin[0] or q[0] > xyMax[0] or q[1] < xyMin[1] or q[1] > xyMax[1]:
+			return None
+	return a, b
+
+
+# Участок отрезка p0 - p1 внутри прямоугольного тела стены без отступов от торцов (None, если отрезок тело не задевает).
+# Нужен, чтобы отличить отсутствие пересечения от пересечения, которое нельзя получить аналитически
+def wallSpan(p0, p1, start, end, thickness, zMin, zMax):
+	dx = end[0] - start[0]
+	dy = end[1] - start[1]
+	length = (dx**2 + dy**2)**0.5
+	if length < TOL:
+		return None
+	ux = dx / length; uy = dy / length
+	s0 = (p0[0] - start[0]) * -uy + (p0[1] - start[1]) * ux
+	s1 = (p1[0] - start[0]) * -uy + (p1[1] - start[1]) * ux
+	u0 = (p0[0] - start[0]) * ux + (p0[1] - start[1]) * uy
+	u1 = (p1[0] - start[0]) * ux + (p1[1] - start[1]) * uy
+	t = clipRange(0.0, 1.0, s0, s1 - s0, -thickness / 2, thickness / 2)
+	if t is not None:
+		t = clipRange(t[0], t[1], u0, u1 - u0, 0.0, length)
+	if t is not None:
+		t = clipRange(t[0], t[1], p0[2], p1[2] - p0[2], zMin, zMax)
+	if t is None:
+		return None
+	return pointAt(p0, p1, t[0]), pointAt(p0, p1, t[1])
+
+
+# Участок отрезка p0 - p1 внутри габарита плиты (None, если отрезок габарит не задевает)
+def floorSpan(p0, p1, zMin, zMax, xyMin, xyMax):
+	t = clipRange(0.0, 1.0, p0[2], p1[2] - p0[2], zMin, zMax)
+	for i in range(2):
+		if t is not None:
+			t = clipRange(t[0], t[1], p0[i], p1[i] - p0[i], xyMin[i], xyMax[i])
+	if t is None:
+		return None
+	return pointAt(p0, p1, t[0]), pointAt(p0, p1, t[1])
+
+
+# Попадание точки p в плане в область, ограниченную контурами. edges - стороны всех контуров ((x0, y0), (x1, y1))
+# в любом порядке и направлении; внутренние контуры (отверстия) исключаются правилом чётности
+def inOutline(edges, p):
+	x, y = p[0], p[1]
+	inside = False
+	for (x0, y0), (x1, y1) in edges:
+		if (y0 > y) != (y1 > y) and x < x0 + (y - y0) * (x1 - x0) / (y1 - y0):
+			inside = not inside
+	return inside
+
+
+# Пересекает ли проекция отрезка a - b на план хотя бы одну из сторон контуров edges (с допуском касания)
+def crossesOutline(edges, a, b):
+	def side(p, q, r):
+		return (q[0] - p[0]) * (r[1] - p[1]) - (q[1] - p[1]) * (r[0] - p[0])
+	for p, q in edges:
+		d1 = side(p, q, a); d2 = side(p, q, b)
+		d3 = side(a, b, p); d4 = side(a, b, q)
+		if ((d1 > TOL and d2 < -TOL) or (d1 < -TOL and d2 > TOL)) and ((d3 > TOL and d4 < -TOL) or (d3 < -TOL and d4 > TOL)):
+			return True
+		# Конец отрезка на стороне контура или вершина контура на отрезке - положение относительно контура не определено
+		for r, d, s, t in ((a, d1, p, q), (b, d2, p, q), (p, d3, a, b), (q, d4, a, b)):
+			if abs(d) <= TOL and min(s[0], t[0]) - TOL <= r[0] <= max(s[0], t[0]) + TOL and min(s[1], t[1]) - TOL <= r[1] <= max(s[1], t[1]) + TOL:
+				return True
+	return False
+
+
+# Задевает ли габарит коммуникации bbMin - bbMax один из габаритов boxes (вставок основы, шахт)
+def touches(boxes, bbMin, bbMax):
+	for boxMin, boxMax in boxes:
+		if SpatialIndex.boxesOverlap(bbMin, bbMax, boxMin, boxMax):
+			return True
+	return False
+
+
+# Пересечение оси коммуникации p0 - p1 (габарит bbMin - bbMax) с простой стеной по её форме: shape - (начало оси,
+# конец оси, отметка низа, отметка верха), box - габарит стены, inserts - габариты вставок. Возвращает концы участка,
+# MISS, если ось не задевает стену, или None, если ответ можно получить только по телу стены
+def wallFormSegment(p0, p1, bbMin, bbMax, shape, thickness, box, inserts):
+	# Тело стены с учётом соединений по торцам лежит внутри её габарита
+	if floorSpan(p0, p1, box[0][2], box[1][2], box[0], box[1]) is None:
+		return MISS
+	ends = wallSegment(p0, p1, shape[0], shape[1], thickness, shape[2], shape[3])
+	if ends is None or touches(inserts, bbMin, bbMax):
+		return None
+	return ends
+
+
+# Пересечение оси коммуникации p0 - p1 (габарит bbMin - bbMax) с плоской плитой по её форме: box - габарит плиты,
+# edges - стороны контуров эскиза, obstacles - габариты вставок и шахт. Ответ - как у wallFormSegment
+def floorFormSegment(p0, p1, bbMin, bbMax, box, edges, obstacles):
+	if floorSpan(p0, p1, box[0][2], box[1][2], box[0], box[1]) is None:
+		return MISS
+	ends = floorSegment(p0, p1, box[0][2], box[1][2], (-1e300, -1e300), (1e300, 1e300))
+	if ends is None or touches(obstacles, bbMin, bbMax) or crossesOutline(edges, ends[0], ends[1]):
+		return None
+	# Участок целиком внутри контура или целиком вне его
+	if inOutline(edges, ends[0]):
+		return ends
+	return MISS
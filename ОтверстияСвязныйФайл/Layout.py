@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+# Раскладка проёмов пакета пересечений одного вида основ: пропуск пересечений, для которых проём не требуется,
+# объединение соседних проёмов одной основы в общий прямоугольный проём и поиск существующих проёмов,
+# которые уже закрывают проём. Раскладка одна для расчёта в Revit (Engine) и по снимку модели (Offline),
+# поэтому оба расчёта дают одинаковые проёмы
+import Sizing
+import Clustering
+import Intersection
+
+
+# Прямоугольник проёма в плоскости стены: координата вдоль стены (direction - направление стены) и отметка
+def wallRect(center, direction, openType, openWidth, openHeight):
+	dx, dy = direction[0], direction[1]
+	u = (center[0] * dx + center[1] * dy) / (dx**2 + dy**2)**0.5
+	return Clustering.rect(u, center[2], openWidth, openHeight)
+
+
+# Прямоугольник в плане, охватывающий проём в плите с учётом его поворота
+def floorRect(center, direction, openType, openWidth, openHeight):
+	if openType == Sizing.ROUND:
+		return Clustering.rect(center[0], center[1], openWidth, openHeight)
+	return Clustering.rotatedRect(center[0], center[1], openWidth, openHeight, direction[0], direction[1])
+
+
+# Центр, направление и размеры общего проёма в стене, охватывающего все проёмы группы (center и direction - первого проёма)
+def wallMerged(center, direction, rects, group):
+	u0, v0, u1, v1 = Clustering.enclose(rects, group)
+	first = rects[group[0]]
+	dx, dy = direction[0], direction[1]
+	shift = ((u0 + u1) - (first[0] + first[2])) / 2 / (dx**2 + dy**2)**0.5
+	center = (center[0] + dx * shift, center[1] + dy * shift, center[2] + ((v0 + v1) - (first[1] + first[3])) / 2)
+	return center, direction, Clustering.ceilSize(u1 - u0), Clustering.ceilSize(v1 - v0)
+
+
+# Центр, направление и размеры общего проёма в плите без поворота, охватывающего все проёмы группы
+def floorMerged(center, direction, rects, group):
+	x0, y0, x1, y1 = Clustering.enclose(rects, group)
+	return ((x0 + x1) / 2, (y0 + y1) / 2, center[2]), (1.0, 0.0, 0.0), Clustering.ceilSize(x1 - x0), Clustering.ceilSize(y1 - y0)
+
+
+# Функции прямоугольника и общего проёма по имени вида основы
+SHAPES = {'Wall': (wallRect, wallMerged), 'Floor': (floorRect, floorMerged)}
+
+
+# Проёмы пакета пересечений вида основ kindName: список (номера пересечений группы, центр, направление, тип,
+# ширина, высота). Пересечения с типом NONE пропускаются. При заданном зазоре mergeGap соседние проёмы одной основы
+# (ключи основ hostKeys) объединяются в общий прямоугольный проём
+def openings(kindName, hostKeys, centers, directions, sizes, mergeGap):
+	openTypes, openWidths, openHeights = sizes
+	rect, merged = SHAPES[kindName]
+	items = [n for n in range(len(openTypes)) if openTypes[n] != Sizing.NONE]
+	groups = [[n] for n in items]
+	rects = {}
+	if mergeGap is not None:
+		rects = dict((n, rect(centers[n], directions[n], openTypes[n], openWidths[n], openHeights[n])) for n in items)
+		groups = [[items[k] for k in group] for group in Clustering.clusters([rects[n] for n in items], [hostKeys[n] for n in items], mergeGap)]
+	result = []
+	for group in groups:
+		n = group[0]
+		if len(group) == 1:
+			result.append((group, centers[n], directions[n], openTypes[n], openWidths[n], openHeights[n]))
+		else:
+			center, direction, openWidth, openHeight = merged(centers[n], directions[n], rects, group)
+			result.append((group, center, direction, Sizing.RECT, openWidth, openHeight))
+	return result
+
+
+# Категории коммуникаций группы через запятую (без повторов, в порядке пересечений)
+def categNames(names):
+	unique = []
+	for name in names:
+		if name not in unique:
+			unique.append(name)
+	return ', '.join(unique)
+
+
+# Существующий проём или заглушка, которые закрывают проём: точка вставки в пределах допуска dedup и размеры
+# не меньше размеров проёма. index - индекс существующих проёмов по точкам вставки, existing - функция
+# ключ -> (точка вставки, размеры по возрастанию). Возвращает ключ проёма (None, если такого нет)
+def covering(index, existing, dedup, center, openType, openWidth, openHeight):
+	if not index:
+		return None
+	size = sorted((openWidth, openHeight))
+	for key in index.query(center, center, dedup):
+		other, otherSize = existing(key)
+		if sum((center[i] - other[i])**2 for i in range(3))**0.5 > dedup:
+			continue
+		if otherSize[0] >= size[0] - Intersection.TOL and otherSize[1] >= size[1] - Intersection.TOL:
+			return key
+	return None
@@ -0,0 +1,26 @@
+# -*- coding: utf-8 -*-
+# Поиск загруженных связанных файлов по частям имени
+import clr
+
+clr.AddReference('RevitAPI')
+from Autodesk.Revit.DB import *
+
+
+# Связанные файлы, имя экземпляра которых содержит одну из частей patterns (True - все загруженные связи).
+# Возвращает список (экземпляр связи, документ связи, преобразование или None для совпадающих систем координат)
+def findLinks(doc, patterns):
+	if not patterns:
+		return []
+	if hasattr(patterns, 'strip'):
+		patterns = [patterns]
+	found = []
+	for inst in FilteredElementCollector(doc).OfClass(RevitLinkInstance):
+		if patterns is not True and not any(part in inst.Name for part in patterns):
+			continue
+		linkDoc = inst.GetLinkDocument()
+		# Выгруженные связи пропускаются
+		if linkDoc is None:
+			continue
+		transform = inst.GetTotalTransform()
+		found.append((inst, linkDoc, None if transform.IsIdentity else transform))
+	return found
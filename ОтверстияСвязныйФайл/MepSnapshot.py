@@ -0,0 +1,205 @@
+# -*- coding: utf-8 -*-
+# Снимок коммуникаций: однократный сбор труб, воздуховодов, коробов и кабельных лотков
+# из текущего проекта и связанных файлов в общий пространственный индекс
+import clr
+
+clr.AddReference('RevitAPI')
+from Autodesk.Revit.DB import *
+
+clr.AddReference('System')
+from System.Collections.Generic import List
+
+import SpatialIndex
+import Session
+
+# Категории коммуникаций в порядке обработки
+mepCats = [BuiltInCategory.OST_PipeCurves, BuiltInCategory.OST_DuctCurves, BuiltInCategory.OST_Conduit, BuiltInCategory.OST_CableTray]
+PIPE, DUCT, CONDUIT, TRAY = range(4)
+catOrder = dict((int(cat), i) for i, cat in enumerate(mepCats))
+
+# Оси сечения записи ещё не определялись
+UNKNOWN = 'unknown'
+
+
+# Компактная запись об одной коммуникации (геометрия в системе координат текущего проекта)
+class MepRecord(object):
+	__slots__ = ('id', 'elementId', 'source', 'transform', 'element', 'kind', 'categName', 'shape', 'width', 'height', 'curve', 'end0', 'end1', 'bbMin', 'bbMax', 'axes')
+
+	def __init__(self, element, kind, shape, width, height, curve, box, source=0, prefix=0, transform=None):
+		self.elementId = element.Id.IntegerValue # Идентификатор в документе коммуникации
+		self.id = prefix + self.elementId # Идентификатор, уникальный среди всех источников
+		self.source = source # Номер источника (0 - текущий проект)
+		self.transform = transform # Преобразование из связанного файла (None - без преобразования)
+		self.element = element
+		self.kind = kind # Порядковый номер категории в mepCats
+		self.categName = element.Category.Name # Имя категории (записывается в параметр дисциплины)
+		self.shape = shape # Форма сечения: 'round', 'rect' или 'oval'
+		self.width = width
+		self.height = height
+		self.curve = curve
+		p0 = curve.GetEndPoint(0)
+		p1 = curve.GetEndPoint(1)
+		self.end0 = (p0.X, p0.Y, p0.Z)
+		self.end1 = (p1.X, p1.Y, p1.Z)
+		self.bbMin, self.bbMax = box
+		self.axes = UNKNOWN # Оси сечения (определяются при первом запросе и хранятся вместе с записью)
+
+
+# Определение формы и размеров сечения коммуникации по её параметрам
+def sectionSizes(el, kind):
+	if kind == PIPE:
+		# Внешний диаметр трубы
+		diam = el.get_Parameter(BuiltInParameter.RBS_PIPE_OUTER_DIAMETER).AsDouble()
+		return 'round', diam, diam
+	if kind == DUCT:
+		# Форма сечения воздуховода определяется по имени семейства
+		sect = el.get_Parameter(BuiltInParameter.ELEM_FAMILY_PARAM).AsValueString()
+		if sect == 'Воздуховод круглого сечения':
+			diam = el.get_Parameter(BuiltInParameter.RBS_CURVE_DIAMETER_PARAM).AsDouble()
+			return 'round', diam, diam
+		if sect == 'Воздуховод овального сечения' or sect == 'Воздуховод прямоугольного сечения':
+			width = el.get_Parameter(BuiltInParameter.RBS_CURVE_WIDTH_PARAM).AsDouble()
+			height = el.get_Parameter(BuiltInParameter.RBS_CURVE_HEIGHT_PARAM).AsDouble()
+			return ('oval' if sect == 'Воздуховод овального сечения' else 'rect'), width, height
+		return None
+	if kind == CONDUIT:
+		# Внешний диаметр короба
+		diam = el.get_Parameter(BuiltInParameter.RBS_CONDUIT_DIAMETER_PARAM).AsDouble()
+		return 'round', diam, diam
+	if kind == TRAY:
+		width = el.get_Parameter(BuiltInParameter.RBS_CABLETRAY_WIDTH_PARAM).AsDouble()
+		height = el.get_Parameter(BuiltInParameter.RBS_CABLETRAY_HEIGHT_PARAM).AsDouble()
+		return 'rect', width, height
+	return None
+
+
+# Габарит после преобразования (по восьми углам исходного габарита)
+def transformBox(box, transform):
+	points = [transform.OfPoint(XYZ(x, y, z)) for x in (box[0][0], box[1][0]) for y in (box[0][1], box[1][1]) for z in (box[0][2], box[1][2])]
+	return ((min(p.X for p in points), min(p.Y for p in points), min(p.Z for p in points)),
+		(max(p.X for p in points), max(p.Y for p in points), max(p.Z for p in points)))
+
+
+# Формирование записи по элементу (None, если элемент не линейный или без сечения)
+def makeRecord(el, source=0, prefix=0, transform=None):
+	kind = catOrder.get(el.Category.Id.IntegerValue)
+	if kind is None or not isinstance(el.Location, LocationCurve):
+		return None
+	sizes = sectionSizes(el, kind)
+	box = SpatialIndex.bboxToTuples(el.get_BoundingBox(None))
+	if sizes is None or box is None:
+		return None
+	curve = el.Location.Curve
+	if transform is not None:
+		curve = curve.CreateTransformed(transform)
+		box = transformBox(box, transform)
+	return MepRecord(el, kind, sizes[0], sizes[1], sizes[2], curve, box, source, prefix, transform)
+
+
+# Идентификатор элемента в документе коммуникации по идентификатору записи (без добавки экземпляра связи)
+def elementId(recId):
+	return recId & 0xFFFFFFFF
+
+
+# Значения преобразования связи для сравнения между запусками (None - без преобразования)
+def transformKey(transform):
+	if transform is None:
+		return None
+	points = (transform.OfPoint(XYZ(0, 0, 0)), transform.OfVector(XYZ(1, 0, 0)), transform.OfVector(XYZ(0, 1, 0)), transform.OfVector(XYZ(0, 0, 1)))
+	return tuple(round(v, 9) for p in points for v in (p.X, p.Y, p.Z))
+
+
+# Оси сечения прямоугольной коммуникации (вдоль ширины, вдоль высоты) по системе координат прямоугольного
+# соединителя: ширина соединителя откладывается по оси X, высота - по оси Y (None, если такого соединителя нет)
+def connectorAxes(el):
+	manager = el.ConnectorManager
+	if manager is None:
+		return None
+	for conn in manager.Connectors:
+		if conn.Shape == ConnectorProfileType.Rectangular:
+			cs = conn.CoordinateSystem
+			return cs.BasisX, cs.BasisY
+	return None
+
+
+class MepSnapshot(object):
+	# Сбор всех коммуникаций одним многокатегорийным фильтром на источник (индекс по их габаритам строится по запросу).
+	# links - список (экземпляр связи, документ связи, преобразование), как его возвращает Links.findLinks
+	def __init__(self, doc, links=()):
+		self.doc = doc
+		# Источники: (документ, преобразование, добавка к идентификатору)
+		self.sources = [(doc, None, 0)]
+		for inst, linkDoc, transform in links:
+			# Идентификаторы элементов связи сдвигаются на идентификатор экземпляра связи, чтобы не совпадать между источниками
+			self.sources.append((linkDoc, transform, inst.Id.IntegerValue << 32))
+		self.records = {}
+		self.collectors = len(self.sources) # Число созданных коллекторов
+		self.solidFilters = 0 # Число проверок ElementIntersectsSolidFilter
+		self.connectorLookups = 0 # Число обращений к соединителям коммуникаций
+		self.warm = 0 # Число записей, взятых из состояния сессии
+		catFilter = ElementMulticategoryFilter(List[BuiltInCategory](mepCats))
+		for source, (srcDoc, transform, prefix) in enumerate(self.sources):
+			# Записи, собранные в этой сессии, используются повторно, пока элемент не изменился
+			stored = Session.records(srcDoc, source, prefix, transformKey(transform))
+			for el in FilteredElementCollector(srcDoc).WherePasses(catFilter).WhereElementIsNotElementType():
+				elementId = el.Id.IntegerValue
+				version = el.VersionGuid
+				entry = stored.get(elementId)
+				if entry is not None and entry[0] == version:
+					rec = entry[1]
+					self.warm += 1
+				else:
+					rec = makeRecord(el, source, prefix, transform)
+					stored[elementId] = (version, rec)
+				if rec is not None:
+					self.records[rec.id] = rec
+		self.index = None # Индекс по габаритам строится при первом запросе кандидатов
+
+	def __len__(self):
+		return len(self.records)
+
+	# Кандидаты на пересечение по габариту основы (при заданном only - только из этого набора)
+	def candidates(self, hostBox, only=None):
+		if hostBox is None:
+			return []
+		if self.index is None:
+			self.index = SpatialIndex.buildIndex((rec.id, rec.bbMin, rec.bbMax) for rec in self.records.values())
+		candIds = self.index.query(hostBox[0], hostBox[1])
+		if only is not None:
+			candIds = [i for i in candIds if i in only]
+		return candIds
+
+	# Записи коммуникаций из числа кандидатов, пересекающихся с объёмным телом основы (в порядке категорий)
+	def intersecting(self, candIds, geomSolid):
+		if not candIds:
+			return []
+		# Кандидаты по источникам
+		bySource = {}
+		for i in candIds:
+			rec = self.records[i]
+			bySource.setdefault(rec.source, []).append(rec.elementId)
+		recs = []
+		for source, elementIds in bySource.items():
+			srcDoc, transform, prefix = self.sources[source]
+			# Тело основы переводится в систему координат связанного файла
+			solid = geomSolid if transform is None else SolidUtils.CreateTransformed(geomSolid, transform.Inverse)
+			# Точная проверка пересечения только для кандидатов
+			ids = List[ElementId]([ElementId(i) for i in elementIds])
+			self.collectors += 1
+			self.solidFilters += 1
+			hits = FilteredElementCollector(srcDoc, ids).WherePasses(ElementIntersectsSolidFilter(solid)).ToElementIds()
+			recs.extend(self.records[prefix + i.IntegerValue] for i in hits)
+		recs.sort(key=lambda rec: (rec.kind, rec.id))
+		return recs
+
+	# Оси сечения прямоугольной коммуникации в системе координат проекта (None, если их нельзя определить по соединителям).
+	# Определяются один раз для коммуникации, сколько бы основ она ни пересекала
+	def sectionAxes(self, rec):
+		if rec.axes != UNKNOWN:
+			return rec.axes
+		self.connectorLookups += 1
+		axes = connectorAxes(rec.element)
+		if axes is not None and rec.transform is not None:
+			axes = (rec.transform.OfVector(axes[0]), rec.transform.OfVector(axes[1]))
+		rec.axes = axes
+		return axes
@@ -0,0 +1,185 @@
+# -*- coding: utf-8 -*-
+# Расчёт проёмов вне Revit по снимку модели, выгруженному скриптом Dynamo (режим 'export').
+# Основы делятся на участки сетки в плане, участки рассчитываются параллельно в пуле процессов CPython:
+# пересечения простых стен и плоских плит находятся по их форме (оси или контурам эскиза, вставкам и шахтам),
+# пересечения, размеры и объединение - теми же модулями, что и в Revit. Результат записывается в план, который применяет скрипт Dynamo (режим 'apply').
+# Основы, пересечения с которыми нельзя получить без их объёмного тела, записываются в план как нерассчитанные
+# и обрабатываются при применении плана обычным порядком
+# Запуск: python Offline.py snapshot.bin plan.json [--workers 32] [--tile 100]
+import argparse
+import multiprocessing
+import time
+
+import Snapshot
+import SpatialIndex
+import Intersection
+import Sizing
+import Layout
+import Plan
+
+# Размер участка сетки в плане по умолчанию, футы
+TILE = 100.0
+
+# Снимок и индексы, загружаемые один раз в каждом процессе пула
+_snap = None
+_mepIndex = None
+_existing = None
+
+
+# Загрузка снимка и построение индексов коммуникаций и существующих проёмов в процессе пула
+def _init(path):
+	global _snap, _mepIndex, _existing
+	_snap = Snapshot.Snapshot.load(path)
+	meps = _snap.meps
+	_mepIndex = SpatialIndex.buildIndex((m, meps['bbMin'][m], meps['bbMax'][m]) for m in range(len(meps['id'])))
+	_existing = {}
+	dedup = _snap.settings.get('dedup')
+	if dedup is not None:
+		existing = _snap.existing
+		for n in range(len(existing['id'])):
+			kind = existing['kind'][n]
+			if kind not in _existing:
+				_existing[kind] = SpatialIndex.GridIndex(max(dedup, 1.0))
+			_existing[kind].insert(n, existing['point'][n], existing['point'][n])
+
+
+# Деление основ на участки сетки в плане по центрам габаритов (в порядке участков)
+def tiles(snap, size):
+	hosts = snap.hosts
+	cells = {}
+	for n in range(len(hosts['id'])):
+		bbMin = hosts['bbMin'][n]; bbMax = hosts['bbMax'][n]
+		key = (int((bbMin[0] + bbMax[0]) / 2 // size), int((bbMin[1] + bbMax[1]) / 2 // size))
+		if key in cells:
+			cells[key].append(n)
+		else:
+			cells[key] = [n]
+	return [cells[key] for key in sorted(cells)]
+
+
+# Пересечения основы с номером n: список (номер коммуникации, конец, конец) или None, если хотя бы одно
+# пересечение нельзя получить по форме основы (как и в Revit, такие пересечения ищутся только по объёмному телу)
+def hostClashes(n):
+	hosts = _snap.hosts
+	meps = _snap.meps
+	kind = hosts['kind'][n]
+	form = hosts['form'][n]
+	if form is None:
+		return None
+	edges, boxes = form
+	shape = hosts['shape'][n]
+	flat = hosts['flat'][n]
+	box = (hosts['bbMin'][n], hosts['bbMax'][n])
+	clashes = []
+	# Коммуникации по категориям и id, как при поиске в Revit
+	for m in sorted(_mepIndex.query(box[0], box[1]), key=lambda m: (meps['kind'][m], meps['id'][m])):
+		if not meps['line'][m]:
+			return None
+		p0 = meps['end0'][m]; p1 = meps['end1'][m]
+		if kind == 'Wall':
+			ends = Intersection.wallFormSegment(p0, p1, meps['bbMin'][m], meps['bbMax'][m], shape, hosts['width'][n], box, boxes)
+		else:
+			ends = Intersection.floorFormSegment(p0, p1, meps['bbMin'][m], meps['bbMax'][m], flat, edges, boxes)
+		if ends is None:
+			return None
+		if ends != Intersection.MISS:
+			clashes.append((m, ends[0], ends[1]))
+	return clashes
+
+
+# Существующий проём или заглушка, которые закрывают проём (None, если такого нет)
+def covering(kind, center, openType, openWidth, openHeight):
+	existing = _snap.existing
+	key = Layout.covering(_existing.get(kind), lambda key: (existing['point'][key], existing['size'][key]), _snap.settings.get('dedup'), center, openType, openWidth, openHeight)
+	return existing['id'][key] if key is not None else None
+
+
+# Расчёт участка: записи плана (аргументы Plan.add) и основы, не рассчитанные вне Revit
+def computeTile(hostNumbers):
+	hosts = _snap.hosts
+	meps = _snap.meps
+	settings = _snap.settings
+	rows = []
+	unresolved = []
+	for kind in ('Wall', 'Floor'):
+		# Пересечения основ участка: (основа, коммуникация, концы, центр, направление)
+		clashes = []
+		for n in hostNumbers:
+			if hosts['kind'][n] != kind:
+				continue
+			found = hostClashes(n)
+			if found is None:
+				unresolved.append(hosts['id'][n])
+				continue
+			for m, end0, end1 in found:
+				center = ((end0[0] + end1[0]) / 2, (end0[1] + end1[1]) / 2, (end0[2] + end1[2]) / 2)
+				direction = (hosts['dir'][n][0], hosts['dir'][n][1], 0) if kind == 'Wall' else meps['floorDir'][m]
+				clashes.append((n, m, end0, end1, center, direction))
+		if not clashes:
+			continue
+		# Пакетный расчёт типов и размеров проёмов участка
+		commWidths = [meps['width'][c[1]] for c in clashes]
+		commHeights = [meps['height'][c[1]] for c in clashes]
+		if kind == 'Wall':
+			openTypes, openWidths, openHeights = Sizing.wallOpenings([hosts['dir'][c[0]] for c in clashes], [hosts['width'][c[0]] for c in clashes],
+				[c[2] for c in clashes], [c[3] for c in clashes], commWidths, commHeights, settings['rectnReservType'], settings['rectnReserv'], settings['koef'], settings['maxDiam'])
+		else:
+			openTypes, openWidths, openHeights = Sizing.floorOpenings(commWidths, commHeights, settings['rectnReservType'], settings['rectnReserv'], settings['koef'], settings['maxDiam'])
+		# Проёмы участка: объединение соседних проёмов одной основы
+		for group, center, direction, openType, openWidth, openHeight in Layout.openings(kind, [c[0] for c in clashes], [c[4] for c in clashes],
+				[c[5] for c in clashes], (openTypes, openWidths, openHeights), settings.get('mergeGap')):
+			n = clashes[group[0]][0]
+			categName = Layout.categNames([meps['categName'][clashes[j][1]] for j in group])
+			if covering(kind, center, openType, openWidth, openHeight) is not None:
+				continue
+			rows.append((kind, hosts['id'][n], hosts['levelId'][n], [meps['id'][clashes[j][1]] for j in group], openType, center, direction,
+				openWidth, openHeight, categName, categName if kind == 'Wall' else hosts['width'][n], settings.get('date')))
+	return rows, unresolved
+
+
+# Расчёт плана по снимку в пуле из workers процессов (при workers=1 - в текущем процессе)
+def compute(snapshotPath, workers=None, tile=TILE):
+	_init(snapshotPath)
+	if _snap is None:
+		raise ValueError('Снимок не найден или записан в другой версии формата: %s' % snapshotPath)
+	plan = Plan.Plan(_snap.key)
+	parts = tiles(_snap, tile)
+	workers = workers or multiprocessing.cpu_count()
+	if workers > 1 and len(parts) > 1:
+		pool = multiprocessing.Pool(workers, _init, (snapshotPath,))
+		try:
+			results = pool.map(computeTile, parts, chunksize=1)
+		finally:
+			pool.close()
+			pool.join()
+	else:
+		results = [computeTile(part) for part in parts]
+	for rows, unresolved in results:
+		for row in rows:
+			plan.add(*row)
+		plan.unresolved.extend(unresolved)
+	plan.unresolved.sort()
+	return plan
+
+
+def main(argv=None):
+	parser = argparse.ArgumentParser(description='Расчёт проёмов вне Revit по снимку модели')
+	parser.add_argument('snapshot', help='файл снимка, выгруженный скриптом Dynamo в режиме export')
+	parser.add_argument('plan', help='файл плана для применения скриптом Dynamo в режиме apply')
+	parser.add_argument('--workers', type=int, default=None, help='число процессов (по умолчанию - число ядер)')
+	parser.add_argument('--tile', type=float, default=TILE, help='размер участка сетки в плане, футы')
+	args = parser.parse_args(argv)
+
+	start = time.time()
+	plan = compute(args.snapshot, args.workers, args.tile)
+	# Сравнение с предыдущим планом из того же файла
+	previous = Plan.Plan.load(args.plan)
+	added, removed, changed = plan.diff(previous if previous is not None else Plan.Plan())
+	plan.save(args.plan)
+	print('Проёмов %d, основ без расчёта %d, добавлено %d, удалено %d, изменено %d, %.1f с' % (
+		len(plan), len(plan.unresolved), len(added), len(removed), len(changed), time.time() - start))
+	return plan
+
+
+if __name__ == '__main__':
+	main()
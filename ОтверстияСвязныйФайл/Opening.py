@@ -11,135 +11,217 @@ from RevitServices.Persistence import DocumentManager
 from RevitServices.Transactions import TransactionManager
 
 import math
+import os
+import sys
 
 # Получение текущего проекта
 doc = DocumentManager.Instance.CurrentDBDocument
-uidoc = DocumentManager.Instance.CurrentUIApplication.ActiveUIDocument
-
-# Опции для работы функций
-opt = Options() # Для получения геометрии
-optS = SolidCurveIntersectionOptions() # Для нахождения пересечения объёмного тела с кривой
-nonStr = Autodesk.Revit.DB.Structure.StructuralType.NonStructural # Для вставки семейства в основу
 
 # Входные данные
 rectnOpen = UnwrapElement(IN[0]) # Тип прямоугольного проёма для стены
 roundOpen = UnwrapElement(IN[1]) # Тип круглого проёма для стены
 rectnOpenF = UnwrapElement(IN[2]) # Тип прямоугольного проёма для плиты
 roundOpenF = UnwrapElement(IN[3]) # Тип круглого проёма для плиты
+libPath = IN[4] if len(IN) > 4 else None # Путь к папке со вспомогательными модулями (пусто - папка графа Dynamo)
+chunkHosts = IN[5] if len(IN) > 5 else None # Число заглушек в одной фиксируемой порции (пусто - одна транзакция на весь запуск)
+chunkSeconds = IN[6] if len(IN) > 6 else None # Время обработки одной порции в секундах
+checkpointPath = IN[7] if len(IN) > 7 else None # Файл контрольной точки для продолжения прерванного запуска (True - рядом с моделью)
+profile = IN[8] if len(IN) > 8 else None # Отчёт о времени этапов и обращениях к API (True - в OUT, путь к файлу - также дописывается в файл JSON lines)
+outputMode = IN[9] if len(IN) > 9 else None # Режим вывода: 'ids' - id вместо элементов, 'table' - таблица заглушка - проём, 'counts' - число проёмов по основам, дисциплинам и уровням (пусто - элементы)
+
+# Подключение вспомогательных модулей. Без входа пути (графы с прежним числом входов) модули ищутся в папке графа
+if not libPath:
+	try:
+		clr.AddReference('DynamoRevitDS')
+		import Dynamo
+		libPath = os.path.dirname(Dynamo.Applications.DynamoRevit().RevitDynamoModel.CurrentWorkspace.FileName)
+	except Exception:
+		libPath = None
+if not libPath:
+	raise ValueError('Не задан вход IN[4] - путь к папке со вспомогательными модулями скрипта (Engine.py и др.). Добавьте этот вход узлу Python или сохраните граф в папке с модулями')
+if libPath not in sys.path:
+	sys.path.append(libPath)
+import SpatialIndex
+import ParamCache
+import Pipeline
+import HostGeometry
+import Profiler
+import Placements
+import Sizing
+import Output
+
+# Замер времени этапов и подсчёт обращений к API (при включённом отчёте)
+prof = Profiler.Profiler('Opening', profile)
+
+# Кэш параметров заглушек, проёмов и уровней на время запуска
+params = ParamCache.ParamCache(doc)
+
+# Объёмные тела основ (общие для скриптов в пределах сессии)
+geometry = HostGeometry.HostGeometry()
+
+# Семейства заглушек: имя -> (заглушка в плите, тип проёма, круглый проём)
+capFamilies = {
+	'Заглушка круглая': (False, roundOpen, True),
+	'Заглушка прямоугольная': (False, rectnOpen, False),
+	'Заглушка круглая для плиты': (True, roundOpenF, True),
+	'Заглушка прямоугольная для плиты': (True, rectnOpenF, False),
+}
+
+# Однократный обход всех окон в проекте и группировка принятых заглушек по семействам
+t = prof.start()
+groups = dict((name, []) for name in capFamilies)
+for inter in FilteredElementCollector(doc).OfCategory(BuiltInCategory.OST_Windows).WhereElementIsNotElementType():
+	if inter.Name in groups and params.get(inter, 'Принято') == 1:
+		groups[inter.Name].append(inter)
+prof.stop('Сбор заглушек', t)
+
+# Индексы стен и плит по габаритам (строятся, только если есть заглушки соответствующего вида)
+def hostIndex(category):
+	items = []
+	for host in FilteredElementCollector(doc).OfCategory(category).WhereElementIsNotElementType():
+		box = SpatialIndex.bboxToTuples(host.get_BoundingBox(None))
+		if box is not None:
+			items.append((host, box[0], box[1]))
+	return SpatialIndex.buildIndex(items)
+
+t = prof.start()
+wallIndex = None
+floorIndex = None
+if any(groups[name] for name, (isFloor, opening, isRound) in capFamilies.items() if not isFloor):
+	wallIndex = hostIndex(BuiltInCategory.OST_Walls)
+if any(groups[name] for name, (isFloor, opening, isRound) in capFamilies.items() if isFloor):
+	floorIndex = hostIndex(BuiltInCategory.OST_Floors)
+prof.stop('Индекс основ', t)
+
+# Функция поиска основы заглушки: кандидаты по габаритам, затем проверка попадания точки вставки в тело основы
+def capHost(point, index):
+	hosts = index.query((point.X, point.Y, point.Z), (point.X, point.Y, point.Z), 0.01)
+	# При попадании в несколько основ (например, на стыке стен) берётся основа с меньшим id
+	hosts.sort(key=lambda host: host.Id.IntegerValue)
+	for host in hosts:
+		geomSolid = geometry.solid(host)
+		if geomSolid is None:
+			continue
+		prof.count('IntersectWithCurve')
+		if HostGeometry.containsPoint(geomSolid, point):
+			return host
+	return None
 
-# Получение всех экземпляров стен и плит в проекте
-walls = FilteredElementCollector(doc).OfCategory(BuiltInCategory.OST_Walls).WhereElementIsNotElementType().ToElements()
-floors = FilteredElementCollector(doc).OfCategory(BuiltInCategory.OST_Floors).WhereElementIsNotElementType().ToElements()
+# Функция определения направления прямоугольного проёма в плите по повороту заглушки
+def capDirection(dirX, dirY):
+	# Определяем угол в радианах
+	if dirX >= 0 and dirY >= 0:
+		angle = math.acos(dirX)
+	elif dirX >= 0 and dirY <= 0:
+		angle = math.acos(-dirX)
+	elif dirX <= 0 and dirY >= 0:
+		angle = math.acos(dirX)
+	else:
+		angle = math.pi - math.acos(dirX)
+	# Проём вставляется сразу повёрнутым на этот угол (без поворота после вставки)
+	return XYZ(math.cos(angle), math.sin(angle), 0)
 
-# Создаём список, в который будем записывать вновь созданные отверстия
+# Пакетное создание проёмов порции
+placements = Placements.Placements(doc, params)
+
+# Функция размещения проёма по заглушке (проём создаётся вместе с остальными проёмами порции).
+# Возвращает номер размещения и строку таблицы вывода без id проёма
+def conversion(inter, host, isFloor, opening, isRound):
+	point = inter.Location.Point
+	direction = None
+	if isFloor and not isRound:
+		# Для прямоугольного проёма в плите берём также информацию о повороте заглушки
+		direction = capDirection(params.get(inter, 'Поворот X'), params.get(inter, 'Поворот Y'))
+	# Переносим габариты заглушки
+	if isRound:
+		values = [('Диаметр проёма', params.get(inter, 'Диаметр проёма'))]
+		sizes = (Sizing.ROUND, values[0][1], values[0][1])
+	else:
+		values = [('Ширина проёма', params.get(inter, 'Ширина проёма')), ('Высота проёма', params.get(inter, 'Высота проёма'))]
+		sizes = (Sizing.RECT, values[0][1], values[1][1])
+	# Определяем и заполняем другие параметры
+	discipline = params.get(inter, 'Дисциплина проёма')
+	values += [('Дата', params.get(inter, 'Дата')), ('Дисциплина проёма', discipline)]
+	level = params.level(host.LevelId)
+	row = (host.Id.IntegerValue, level.Name if level is not None else None, inter.Id.IntegerValue, discipline) + sizes
+	return placements.add(opening, point, direction, host, level, values), row
+
+# Создаём список, в который будем записывать вновь созданные отверстия, и строки таблицы вывода
 lst = []
+rows = []
+
+# Порционная обработка заглушек с контрольной точкой
+pipeline = Pipeline.Pipeline(doc, 'Проёмы по заглушкам', chunkHosts, chunkSeconds, checkpointPath, 'Opening:' + doc.Title, 'заглушек')
+
+# Заглушки порции, ожидающие создания проёмов: (id заглушки, номер размещения, строка таблицы вывода)
+waiting = []
+
+# Функция пакетного создания проёмов порции и отметки их заглушек в контрольной точке
+def createChunk():
+	if not waiting:
+		return
+	t = prof.start()
+	created = placements.create()
+	for capId, n, row in waiting:
+		lst.append(created[n])
+		rows.append(row[:4] + (created[n].Id.IntegerValue,) + row[4:])
+		pipeline.hostDone(capId, [created[n].Id.IntegerValue])
+	del waiting[:]
+	prof.stop('Создание проёмов', t)
+
+# Заглушки по группам семейств
+def accepted():
+	for name in capFamilies:
+		for inter in groups[name]:
+			yield inter
+
+completed = False
+try:
+	for inter in pipeline.hosts(accepted()):
+		t = prof.start()
+		isFloor, opening, isRound = capFamilies[inter.Name]
+		host = capHost(inter.Location.Point, floorIndex if isFloor else wallIndex)
+		prof.host('Поиск основ', inter.Id.IntegerValue, t)
+		if host is not None:
+			prof.clash(inter.Name)
+			# Открытие транзакции порции
+			t = prof.start()
+			pipeline.begin()
+			waiting.append((inter.Id.IntegerValue,) + conversion(inter, host, isFloor, opening, isRound))
+			prof.stop('Создание проёмов', t)
+		else:
+			# Отметка заглушки без основы в контрольной точке
+			pipeline.hostDone(inter.Id.IntegerValue, [])
+		# Создание проёмов и фиксация набранной порции
+		if pipeline.full():
+			createChunk()
+			t = prof.start()
+			pipeline.commit()
+			prof.stop('Фиксация', t)
+	createChunk()
+	completed = True
+finally:
+	# Фиксация последней порции и закрытие группы транзакций
+	t = prof.start()
+	pipeline.close(completed)
+	prof.stop('Фиксация', t)
+
+# Обращения к API из вспомогательных модулей
+prof.count('FilteredElementCollector', 1 + (wallIndex is not None) + (floorIndex is not None))
+prof.count('get_Geometry', geometry.misses)
+prof.count('NewFamilyInstances2', placements.batches)
+prof.count('NewFamilyInstance', placements.singles)
+prof.count('LookupParameter', params.lookups)
+prof.count('Parameter.Set', params.written)
+report = prof.report(caps=pipeline.total, openings=len(lst), storedSolids=geometry.hits, skippedWrites=params.skipped, rejectedBatches=placements.rejected)
+
+# При заданном режиме вывода вместо элементов выводятся их id, таблица заглушка - проём или сводка
+result = Output.compact(lst, outputMode, rows, Output.CAP_FIELDS)
 
-# Открытие транзакции
-TransactionManager.Instance.EnsureInTransaction(doc)
-
-# Формирование отверстий в стенах
-for wall in walls:
-	# Каждый раз берём фильтр всех окон в проекте
-	caps = FilteredElementCollector(doc).OfCategory(BuiltInCategory.OST_Windows).WhereElementIsNotElementType()
-	# Получаем геометрию стены
-	geomElem = wall.get_Geometry(opt)
-	for geomObj in geomElem:
-		geomSolid = geomObj	
-	# Получаем список окон, которые пересекаются с данной геометрией стены
-	inters = caps.WherePasses(ElementIntersectsSolidFilter(geomSolid)).ToElements()
-	# Обрабатываем каждое найденное окно
-	for inter in inters:
-		# Проверяем имя семейства найденного окна
-		if inter.Name == 'Заглушка круглая':
-			# Проверяем, что экземпляр заглушки принят
-			check = inter.LookupParameter('Принято').AsInteger()
-			if check == 1:
-				# Определяем точку вставки и габариты для круглой заглушки
-				point = inter.Location.Point
-				openWidth = inter.LookupParameter('Диаметр проёма').AsDouble()
-				# Создаём по заглушке отверстие и назначаем габариты
-				cutNew = doc.Create.NewFamilyInstance(point, roundOpen, wall, doc.GetElement(wall.LevelId), nonStr)
-				cutNew.LookupParameter('Диаметр проёма').Set(openWidth)
-				# Определяем и заполняем другие параметры
-				date = inter.LookupParameter('Дата').AsString()
-				disp = inter.LookupParameter('Дисциплина проёма').AsString()
-				cutNew.LookupParameter('Дата').Set(date)
-				cutNew.LookupParameter('Дисциплина проёма').Set(disp)
-				lst.append(cutNew)
-		# Аналогично делаем для прямоугольных проёмов в стене
-		elif inter.Name == 'Заглушка прямоугольная':
-			check = inter.LookupParameter('Принято').AsInteger()
-			if check == 1:
-				point = inter.Location.Point
-				openWidth = inter.LookupParameter('Ширина проёма').AsDouble()
-				openHeight = inter.LookupParameter('Высота проёма').AsDouble()
-				cutNew = doc.Create.NewFamilyInstance(point, rectnOpen, wall, doc.GetElement(wall.LevelId), nonStr)
-				cutNew.LookupParameter('Ширина проёма').Set(openWidth)
-				cutNew.LookupParameter('Высота проёма').Set(openHeight)
-				date = inter.LookupParameter('Дата').AsString()
-				disp = inter.LookupParameter('Дисциплина проёма').AsString()
-				cutNew.LookupParameter('Дата').Set(date)
-				cutNew.LookupParameter('Дисциплина проёма').Set(disp)
-				lst.append(cutNew)
-
-# Аналогично делаем для проёмом в перекрытиях
-for floor in floors:
-	caps = FilteredElementCollector(doc).OfCategory(BuiltInCategory.OST_Windows).WhereElementIsNotElementType()
-	geomElem = floor.get_Geometry(opt)
-	for geomObj in geomElem:
-		geomSolid = geomObj	
-	inters = caps.WherePasses(ElementIntersectsSolidFilter(geomSolid)).ToElements()
-	for inter in inters:	
-		if inter.Name == 'Заглушка круглая для плиты':
-			check = inter.LookupParameter('Принято').AsInteger()
-			if check == 1:
-				point = inter.Location.Point
-				openWidth = inter.LookupParameter('Диаметр проёма').AsDouble()
-				cutNew = doc.Create.NewFamilyInstance(point, roundOpenF, floor, doc.GetElement(floor.LevelId), nonStr)
-				cutNew.LookupParameter('Диаметр проёма').Set(openWidth)
-				date = inter.LookupParameter('Дата').AsString()
-				disp = inter.LookupParameter('Дисциплина проёма').AsString()
-				cutNew.LookupParameter('Дата').Set(date)
-				cutNew.LookupParameter('Дисциплина проёма').Set(disp)
-				lst.append(cutNew)
-		elif inter.Name == 'Заглушка прямоугольная для плиты':
-			check = inter.LookupParameter('Принято').AsInteger()
-			if check == 1:
-				point = inter.Location.Point
-				openWidth = inter.LookupParameter('Ширина проёма').AsDouble()
-				openHeight = inter.LookupParameter('Высота проёма').AsDouble()
-				openDepth = inter.LookupParameter('Глубина проёма').AsDouble()
-				# Для прямоугольного проёма в плите берём также информация о повороте заглушки
-				dirX = inter.LookupParameter('Поворот X').AsDouble()
-				dirY = inter.LookupParameter('Поворот Y').AsDouble()
-				direction = XYZ(dirX, dirY, 0)
-				cutNew = doc.Create.NewFamilyInstance(point, rectnOpenF, floor, doc.GetElement(floor.LevelId), nonStr)
-				# Поворачиваем проём на нужный угол после вставки
-				# Задаём вертикальную ось поворота
-				point1 = point
-				point2 = XYZ(point.X, point.Y, point.Z+10)
-				axis = Line.CreateBound(point, point2)
-				# Определяем угол в радианах
-				if dirX >= 0 and dirY >= 0:
-					angle = math.acos(dirX)
-				elif dirX >= 0 and dirY <= 0:
-					angle = math.acos(-dirX)
-				elif dirX <= 0 and dirY >= 0:
-					angle = math.acos(dirX)
-				else:
-					angle = math.pi - math.acos(dirX)
-				# Поворачиваем по найденной оси на заданный угол
-				ElementTransformUtils.RotateElement(doc, cutNew.Id, axis, angle)
-				# Далее всё как в случае со стеной
-				cutNew.LookupParameter('Ширина проёма').Set(openWidth)
-				cutNew.LookupParameter('Высота проёма').Set(openHeight)
-				date = inter.LookupParameter('Дата').AsString()
-				disp = inter.LookupParameter('Дисциплина проёма').AsString()
-				cutNew.LookupParameter('Дата').Set(date)
-				cutNew.LookupParameter('Дисциплина проёма').Set(disp)
-				lst.append(cutNew)
-	
-# Закрытие транзакции
-TransactionManager.Instance.TransactionTaskDone()
-
-OUT = lst
\ No newline at end of file
+# При порционной обработке или замере вместе со списком выводятся сообщения о ходе выполнения и отчёт
+if prof.enabled:
+	OUT = [result, pipeline.progress, report]
+elif pipeline.chunked:
+	OUT = [result, pipeline.progress]
+else:
+	OUT = result
\ No newline at end of file
@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+# Компактный вывод результата в OUT вместо вложенных списков элементов. Dynamo оборачивает и показывает
+# в предпросмотре каждый выведенный элемент, на больших запусках это дольше самого расчёта. Режим вывода
+# выбирается входом скрипта, элементы при необходимости получаются по id следующими узлами
+import Sizing
+
+# Режимы вывода (пусто - элементы, как раньше)
+IDS = 'ids' # Та же вложенность списков, id вместо элементов
+TABLE = 'table' # Плоская таблица: строка заголовка и по строке на пару коммуникация - проём
+COUNTS = 'counts' # Число проёмов по основам, категориям и уровням
+
+# Поля строки таблицы (размеры в футах). У проёмов по заглушкам вместо коммуникации - заглушка
+FIELDS = ('hostId', 'level', 'mepId', 'category', 'openingId', 'type', 'width', 'height')
+CAP_FIELDS = ('hostId', 'level', 'capId', 'category', 'openingId', 'type', 'width', 'height')
+
+# Названия типов проёмов
+TYPES = {Sizing.ROUND: 'round', Sizing.RECT: 'rect'}
+
+
+# Замена элементов на их id с сохранением вложенности списков (остальные значения не меняются)
+def ids(value):
+	if isinstance(value, (list, tuple)):
+		return [ids(item) for item in value]
+	elementId = getattr(value, 'Id', None)
+	if elementId is not None:
+		return elementId.IntegerValue
+	return value
+
+
+# Таблица: строка заголовка и строки (основа, уровень, коммуникация, категория, проём, тип, ширина, высота)
+def table(rows, fields=FIELDS):
+	return [list(fields)] + [list(row[:5]) + [TYPES.get(row[5], row[5])] + list(row[6:]) for row in rows]
+
+
+# Число проёмов по основам и по уровням (проём, общий для нескольких коммуникаций, считается один раз)
+# и число пересечений по категориям. Каждая сводка - строка заголовка и пары (значение, число) по возрастанию значения
+def counts(rows):
+	hosts = {}
+	levels = {}
+	categories = {}
+	seen = set()
+	for row in rows:
+		hostId, level, category, openingId = row[0], row[1], row[3], row[4]
+		categories[category] = categories.get(category, 0) + 1
+		if openingId in seen:
+			continue
+		seen.add(openingId)
+		hosts[hostId] = hosts.get(hostId, 0) + 1
+		levels[level] = levels.get(level, 0) + 1
+	return [[['hostId', 'openings']] + _pairs(hosts), [['category', 'clashes']] + _pairs(categories), [['level', 'openings']] + _pairs(levels)]
+
+
+def _pairs(values):
+	return [[key, values[key]] for key in sorted(values, key=lambda key: (key is None, key))]
+
+
+# Значение OUT в режиме mode: rows - строки таблицы (нужны только для TABLE и COUNTS)
+def compact(value, mode, rows=None, fields=FIELDS):
+	if mode == IDS:
+		return ids(value)
+	if mode == TABLE:
+		return table(rows, fields)
+	if mode == COUNTS:
+		return counts(rows)
+	return value
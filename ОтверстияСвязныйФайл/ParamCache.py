@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+# Кэш параметров и уровней на время одного запуска: определения параметров находятся по имени
+# один раз для каждого типоразмера, дальше чтение и запись идут через найденное определение
+import clr
+
+clr.AddReference('RevitAPI')
+from Autodesk.Revit.DB import *
+
+# Допуск сравнения вещественных значений параметров
+TOL = 1e-9
+
+
+class ParamCache(object):
+	def __init__(self, doc):
+		self.doc = doc
+		self.defs = {} # (id типоразмера, имя параметра) -> определение параметра
+		self.levels = {} # id уровня -> уровень
+		self.lookups = 0 # Число поисков параметров по имени
+		self.written = 0 # Число выполненных записей
+		self.skipped = 0 # Число записей, пропущенных из-за совпадения значения
+
+	# Уровень по идентификатору (запрашивается у документа один раз)
+	def level(self, levelId):
+		key = levelId.IntegerValue
+		if key not in self.levels:
+			self.levels[key] = self.doc.GetElement(levelId)
+		return self.levels[key]
+
+	# Параметр экземпляра по имени
+	def param(self, element, name):
+		key = (element.GetTypeId().IntegerValue, name)
+		definition = self.defs.get(key)
+		if definition is None:
+			# Первый экземпляр данного типоразмера: поиск по имени и запоминание определения
+			param = element.LookupParameter(name)
+			self.lookups += 1
+			if param is not None:
+				self.defs[key] = param.Definition
+			return param
+		return element.get_Parameter(definition)
+
+	# Значение параметра в соответствии с типом хранения (None, если параметра нет)
+	def get(self, element, name):
+		param = self.param(element, name)
+		if param is None:
+			return None
+		storage = param.StorageType
+		if storage == StorageType.Double:
+			return param.AsDouble()
+		if storage == StorageType.Integer:
+			return param.AsInteger()
+		if storage == StorageType.String:
+			return param.AsString()
+		return param.AsElementId()
+
+	# Запись значения параметра (пропускается, если значение уже совпадает)
+	def set(self, element, name, value):
+		param = self.param(element, name)
+		if param is None:
+			return False
+		storage = param.StorageType
+		if storage == StorageType.Double and isinstance(value, float):
+			same = abs(param.AsDouble() - value) < TOL
+		elif storage == StorageType.Integer and isinstance(value, int):
+			same = param.AsInteger() == value
+		elif storage == StorageType.String and not isinstance(value, (int, float)):
+			same = param.AsString() == value
+		else:
+			same = False
+		if same:
+			self.skipped += 1
+			return True
+		self.written += 1
+		return param.Set(value)
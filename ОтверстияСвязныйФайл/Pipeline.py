@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+# Потоковая обработка основ порциями: каждая порция (N основ или T секунд) фиксируется отдельной
+# транзакцией внутри группы транзакций, после каждой порции записывается контрольная точка.
+# Прерванный запуск продолжается с места остановки
+import os
+import json
+import time
+
+import clr
+
+clr.AddReference('RevitAPI')
+from Autodesk.Revit.DB import *
+
+clr.AddReference('RevitServices')
+from RevitServices.Transactions import TransactionManager
+
+
+# Путь к файлу контрольной точки по умолчанию (рядом с файлом модели)
+def defaultPath(doc, name):
+	if not doc.PathName:
+		return None
+	return os.path.splitext(doc.PathName)[0] + '_' + name + '_checkpoint.json'
+
+
+class Pipeline(object):
+	# name - имя группы транзакций и файла контрольной точки, runKey - ключ запуска
+	# (контрольная точка с другим ключом не используется), itemName - название обрабатываемых элементов в сообщениях.
+	# Без chunkHosts и chunkSeconds весь запуск выполняется в одной транзакции Dynamo, как раньше
+	def __init__(self, doc, name, chunkHosts=None, chunkSeconds=None, checkpointPath=None, runKey='', itemName='основ'):
+		self.doc = doc
+		self.name = name
+		self.chunkHosts = chunkHosts
+		self.chunkSeconds = chunkSeconds
+		self.chunked = bool(chunkHosts or chunkSeconds)
+		if checkpointPath is True:
+			checkpointPath = defaultPath(doc, name)
+		self.path = checkpointPath if self.chunked else None
+		self.runKey = runKey
+		self.itemName = itemName
+		self.done = {} # id основы -> id созданных по ней проёмов (из завершённых порций)
+		self.pending = {} # то же для текущей порции
+		self.skipped = [] # Основы, пропущенные как обработанные в прерванном запуске
+		self.progress = [] # Сообщения о ходе выполнения по порциям
+		self.transaction = None
+		self.group = None
+		self.count = 0 # Число основ в текущей порции
+		self.total = 0 # Число основ, обработанных в этом запуске
+		self.chunkStart = None
+		self.runStart = time.time()
+		self._load()
+		if self.chunked:
+			# Закрытие транзакции Dynamo, дальше транзакции открываются напрямую
+			TransactionManager.Instance.ForceCloseTransaction()
+			self.group = TransactionGroup(doc, name)
+			self.group.Start()
+
+	# Загрузка контрольной точки. Основа считается обработанной, только если все её проёмы есть в модели
+	# (модель могла быть открыта без сохранения результатов прерванного запуска)
+	def _load(self):
+		if not self.path or not os.path.exists(self.path):
+			return
+		try:
+			with open(self.path) as f:
+				data = json.load(f)
+		except ValueError:
+			return
+		if data.get('key') != self.runKey:
+			return
+		for hostId, openingIds in data.get('done', {}).items():
+			if all(self.doc.GetElement(ElementId(i)) is not None for i in openingIds):
+				self.done[int(hostId)] = openingIds
+		self.progress = data.get('progress', [])
+
+	def _save(self):
+		if not self.path:
+			return
+		data = {'key': self.runKey, 'done': self.done, 'progress': self.progress}
+		with open(self.path, 'w') as f:
+			json.dump(data, f)
+
+	# Обход основ с пропуском обработанных ранее (элементы берутся из коллектора по одному)
+	def hosts(self, elements):
+		for el in elements:
+			hostId = el.Id.IntegerValue
+			if hostId in self.done:
+				self.skipped.append(hostId)
+				continue
+			if self.chunkStart is None:
+				self.chunkStart = time.time()
+			self.count += 1
+			yield el
+
+	# Заполнена ли текущая порция (по числу основ или по времени)
+	def full(self):
+		if not self.chunked:
+			return False
+		if self.chunkHosts and self.count >= self.chunkHosts:
+			return True
+		return bool(self.chunkSeconds and self.chunkStart is not None and time.time() - self.chunkStart >= self.chunkSeconds)
+
+	# Открытие транзакции порции (если ещё не открыта)
+	def begin(self):
+		if self.transaction is not None:
+			return
+		if self.chunked:
+			self.transaction = Transaction(self.doc, self.name)
+			self.transaction.Start()
+		else:
+			TransactionManager.Instance.EnsureInTransaction(self.doc)
+			self.transaction = True
+
+	# Отметка основы текущей порции как обработанной
+	def hostDone(self, hostId, openingIds):
+		self.pending[hostId] = openingIds
+
+	# Фиксация порции, запись контрольной точки и сообщения о ходе выполнения
+	def commit(self):
+		if self.transaction is not None:
+			if self.chunked:
+				self.transaction.Commit()
+			else:
+				TransactionManager.Instance.TransactionTaskDone()
+			self.transaction = None
+		if not self.count and not self.pending:
+			return
+		openings = sum(len(ids) for ids in self.pending.values())
+		self.done.update(self.pending)
+		self.total += self.count
+		now = time.time()
+		self.progress.append('Порция %d: %s %d (всего %d), проёмов %d, %.1f с (с начала запуска %.1f с)' % (
+			len(self.progress) + 1, self.itemName, self.count, self.total, openings, now - (self.chunkStart or now), now - self.runStart))
+		self.pending = {}
+		self.count = 0
+		self.chunkStart = None
+		self._save()
+
+	# Завершение запуска: при ошибке незафиксированная порция откатывается, зафиксированные сохраняются
+	# вместе с контрольной точкой; при успешном завершении контрольная точка удаляется
+	def close(self, completed):
+		if self.transaction is not None:
+			if not completed and self.chunked:
+				self.transaction.RollBack()
+				self.transaction = None
+				self.pending = {}
+			else:
+				self.commit()
+		if self.group is not None:
+			self.group.Assimilate()
+			self.group = None
+		if completed and self.path and os.path.exists(self.path):
+			os.remove(self.path)
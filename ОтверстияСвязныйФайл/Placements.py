@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+# Пакетное создание экземпляров семейств: размещения накапливаются и создаются вызовами NewFamilyInstances2
+# по группам одного типоразмера и уровня, затем параметры записываются вторым проходом по именам параметров.
+# Группа, которую пакетный вызов отклонил, делится пополам, по одному создаются только отклонённые размещения
+import clr
+import math
+
+clr.AddReference('RevitAPI')
+import Autodesk
+from Autodesk.Revit.DB import *
+from Autodesk.Revit.Creation import FamilyInstanceCreationData
+
+clr.AddReference('System')
+from System.Collections.Generic import List
+
+nonStr = Autodesk.Revit.DB.Structure.StructuralType.NonStructural # Для вставки семейства в основу
+
+# Наибольшее число размещений в одном пакетном вызове
+BATCH = 500
+# Допуск совпадения точки вставки созданного экземпляра с точкой размещения
+TOL = 1e-4
+
+
+# Ячейка сетки с шагом TOL, в которую попадает точка
+def _cell(point):
+	return int(math.floor(point.X / TOL)), int(math.floor(point.Y / TOL)), int(math.floor(point.Z / TOL))
+
+
+class Placements(object):
+	def __init__(self, doc, params, batch=BATCH):
+		self.doc = doc
+		self.params = params # Кэш параметров для второго прохода
+		self.batch = batch
+		self.items = [] # Размещения: (типоразмер, точка, направление, основа, уровень)
+		self.values = [] # Значения параметров размещений: списки пар (имя параметра, значение)
+		self.batches = 0 # Число пакетных вызовов
+		self.singles = 0 # Число экземпляров, созданных отдельным вызовом (одиночные размещения группы и отклонённые пакетом)
+		self.rejected = 0 # Число отклонённых пакетных вызовов
+
+	def __len__(self):
+		return len(self.items)
+
+	# Добавление размещения. С направлением экземпляр создаётся по точке, направлению и основе (уровню),
+	# без направления - по точке, основе и уровню. Возвращает номер размещения в списке create()
+	def add(self, symbol, point, direction, host, level, values):
+		self.items.append((symbol, point, direction, host, level))
+		self.values.append(values)
+		return len(self.items) - 1
+
+	# Данные пакетного создания для одного размещения
+	def _data(self, item):
+		symbol, point, direction, host, level = item
+		if direction is not None:
+			return FamilyInstanceCreationData(point, symbol, direction, host, nonStr)
+		return FamilyInstanceCreationData(point, symbol, host, level, nonStr)
+
+	# Создание одного экземпляра отдельным вызовом
+	def _single(self, item):
+		symbol, point, direction, host, level = item
+		self.singles += 1
+		if direction is not None:
+			return self.doc.Create.NewFamilyInstance(point, symbol, direction, host, nonStr)
+		return self.doc.Create.NewFamilyInstance(point, symbol, host, level, nonStr)
+
+	# Создание размещений с номерами numbers одним вызовом (при отказе - по половинам)
+	def _create(self, numbers, created):
+		if len(numbers) == 1:
+			created[numbers[0]] = self._single(self.items[numbers[0]])
+			return
+		try:
+			self.batches += 1
+			ids = list(self.doc.Create.NewFamilyInstances2(List[FamilyInstanceCreationData]([self._data(self.items[n]) for n in numbers])))
+		except Exception:
+			ids = []
+		if len(ids) == len(numbers):
+			matched = self._match(numbers, [self.doc.GetElement(elementId) for elementId in ids])
+			if matched is not None:
+				for n in numbers:
+					created[n] = matched[n]
+				return
+			# Экземпляры не удалось сопоставить с размещениями: группа создаётся заново по одному
+			for elementId in ids:
+				self.doc.Delete(elementId)
+			for n in numbers:
+				created[n] = self._single(self.items[n])
+			return
+		# Часть группы не создана: созданные экземпляры удаляются, так как нельзя сопоставить их с размещениями
+		self.rejected += 1
+		for elementId in ids:
+			self.doc.Delete(elementId)
+		half = len(numbers) // 2
+		self._create(numbers[:half], created)
+		self._create(numbers[half:], created)
+
+	# Сопоставление экземпляров, созданных пакетом, с размещениями numbers по точке вставки: порядок id,
+	# возвращённых NewFamilyInstances2, не документирован. Группа состоит из размещений одного типоразмера,
+	# размещения с совпадающими точками сопоставляются в порядке добавления. None - сопоставить не удалось
+	def _match(self, numbers, elements):
+		cells = {}
+		for n in numbers:
+			cells.setdefault(_cell(self.items[n][1]), []).append(n)
+		matched = {}
+		for el in elements:
+			point = getattr(getattr(el, 'Location', None), 'Point', None)
+			if point is None:
+				return None
+			i, j, k = _cell(point)
+			best = None
+			for cell in [(i + di, j + dj, k + dk) for di in (-1, 0, 1) for dj in (-1, 0, 1) for dk in (-1, 0, 1)]:
+				for n in cells.get(cell, ()):
+					if n not in matched and (best is None or n < best) and self.items[n][1].DistanceTo(point) <= TOL:
+						best = n
+			if best is None:
+				return None
+			matched[best] = el
+		return matched
+
+	# Создание всех накопленных размещений. Возвращает экземпляры в порядке добавления размещений
+	def create(self):
+		created = [None] * len(self.items)
+		# Группы размещений одного типоразмера и уровня в порядке их появления
+		groups = {}
+		order = []
+		for n, item in enumerate(self.items):
+			symbol, level = item[0], item[4]
+			key = (symbol.Id.IntegerValue, level.Id.IntegerValue if level is not None else None)
+			if key not in groups:
+				groups[key] = []
+				order.append(key)
+			groups[key].append(n)
+		for key in order:
+			numbers = groups[key]
+			for i in range(0, len(numbers), self.batch):
+				self._create(numbers[i:i + self.batch], created)
+
+		# Второй проход: значения каждого параметра записываются подряд для всех экземпляров
+		# (определение параметра ищется по имени один раз для типоразмера)
+		names = []
+		byName = {}
+		for n, values in enumerate(self.values):
+			for name, value in values:
+				if name not in byName:
+					byName[name] = []
+					names.append(name)
+				byName[name].append((created[n], value))
+		for name in names:
+			for element, value in byName[name]:
+				self.params.set(element, name, value)
+
+		self.items = []
+		self.values = []
+		return created
@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+# План проёмов: рассчитанные проёмы без изменения модели, по одному столбцу на поле записи.
+# План записывается в файл JSON по столбцам, применяется отдельным запуском и сравнивается с предыдущим планом
+# по ключу записи (вид основы, основа и коммуникации проёма)
+import os
+import json
+from array import array
+
+# Версия формата файла плана
+VERSION = 1
+
+# Поля записи плана (числовые поля хранятся в массивах вещественных чисел)
+FIELDS = ('kind', 'hostId', 'levelId', 'mepIds', 'type', 'x', 'y', 'z', 'dx', 'dy', 'dz', 'width', 'height', 'discipline', 'depth', 'date')
+NUMBERS = ('x', 'y', 'z', 'dx', 'dy', 'dz', 'width', 'height')
+
+# Поля, по которым сравниваются записи с одинаковым ключом, и точность их сравнения
+COMPARED = ('type', 'x', 'y', 'z', 'dx', 'dy', 'width', 'height', 'discipline')
+DIGITS = 6
+
+
+# Путь к файлу плана по умолчанию (рядом с файлом модели, None для несохранённой модели)
+def defaultPath(doc, name):
+	if not doc.PathName:
+		return None
+	return os.path.splitext(doc.PathName)[0] + '_' + name + '_plan.json'
+
+
+class Plan(object):
+	# key - описание запуска, по которому составлен план (записывается в файл для справки)
+	def __init__(self, key=''):
+		self.key = key
+		self.unresolved = [] # Основы, проёмы которых не рассчитаны вне Revit (рассчитываются при применении плана)
+		self.columns = dict((name, array('d') if name in NUMBERS else []) for name in FIELDS)
+
+	def __len__(self):
+		return len(self.columns['kind'])
+
+	# Добавление проёма. mepIds - коммуникации, для которых создаётся проём (несколько для объединённого проёма)
+	def add(self, kind, hostId, levelId, mepIds, openType, center, direction, width, height, discipline, depth, date):
+		c = self.columns
+		c['kind'].append(kind)
+		c['hostId'].append(hostId)
+		c['levelId'].append(levelId)
+		c['mepIds'].append(sorted(mepIds))
+		c['type'].append(openType)
+		for name, value in zip(('x', 'y', 'z'), center):
+			c[name].append(value)
+		for name, value in zip(('dx', 'dy', 'dz'), direction):
+			c[name].append(value)
+		c['width'].append(width)
+		c['height'].append(height)
+		c['discipline'].append(discipline)
+		c['depth'].append(depth)
+		c['date'].append(date)
+		return len(self) - 1
+
+	# Запись плана в виде словаря
+	def row(self, i):
+		return dict((name, self.columns[name][i]) for name in FIELDS)
+
+	# Ключ записи: вид основы, основа и коммуникации проёма
+	def rowKey(self, i):
+		c = self.columns
+		return '%s:%d:%s' % (c['kind'][i], c['hostId'][i], ','.join(str(m) for m in c['mepIds'][i]))
+
+	# Значения записи для сравнения
+	def _values(self, i):
+		values = []
+		for name in COMPARED:
+			value = self.columns[name][i]
+			values.append(round(value, DIGITS) if isinstance(value, float) else value)
+		return values
+
+	# Сравнение с предыдущим планом: ключи добавленных, удалённых и изменённых проёмов
+	def diff(self, previous):
+		old = dict((previous.rowKey(i), previous._values(i)) for i in range(len(previous)))
+		added = []
+		changed = []
+		keys = set()
+		for i in range(len(self)):
+			key = self.rowKey(i)
+			keys.add(key)
+			if key not in old:
+				added.append(key)
+			elif old[key] != self._values(i):
+				changed.append(key)
+		removed = [key for key in old if key not in keys]
+		return added, sorted(removed), changed
+
+	def save(self, path):
+		data = {'version': VERSION, 'key': self.key, 'unresolved': self.unresolved, 'columns': dict((name, list(values)) for name, values in self.columns.items())}
+		with open(path, 'w') as f:
+			json.dump(data, f)
+
+	# Загрузка плана из файла (None, если файла нет или формат другой версии)
+	@staticmethod
+	def load(path):
+		if not path or not os.path.exists(path):
+			return None
+		try:
+			with open(path) as f:
+				data = json.load(f)
+		except ValueError:
+			return None
+		if data.get('version') != VERSION:
+			return None
+		plan = Plan(data.get('key', ''))
+		plan.unresolved = data.get('unresolved', [])
+		for name in FIELDS:
+			values = data['columns'].get(name, [])
+			plan.columns[name] = array('d', values) if name in NUMBERS else list(values)
+		return plan
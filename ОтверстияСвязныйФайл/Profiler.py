@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+# Замер времени по этапам и подсчёт обращений к API для отчёта о запуске.
+# Выключенный замерщик ничего не измеряет, его методы сразу возвращаются
+import json
+import time
+
+# Число самых медленных основ в отчёте
+TOP_HOSTS = 10
+
+
+class Profiler(object):
+	# setting - значение входа: пусто - замер выключен, True - отчёт в OUT,
+	# строка - отчёт в OUT и дописывание его строкой JSON в этот файл
+	def __init__(self, script, setting=None):
+		self.script = script
+		self.enabled = bool(setting)
+		self.path = setting if hasattr(setting, 'strip') else None
+		self.phases = {} # Этап -> суммарное время в секундах
+		self.order = [] # Этапы в порядке первого замера
+		self.calls = {} # Обращение к API -> число
+		self.clashes = {} # Категория коммуникаций -> число пересечений
+		self.hosts = [] # (время в секундах, id основы)
+		self.runStart = time.time()
+
+	# Начало замера (отметка времени или None, если замер выключен)
+	def start(self):
+		if not self.enabled:
+			return None
+		return time.time()
+
+	# Окончание замера этапа, начатого отметкой start
+	def stop(self, phase, start):
+		if start is None:
+			return
+		if phase not in self.phases:
+			self.phases[phase] = 0.0
+			self.order.append(phase)
+		self.phases[phase] += time.time() - start
+
+	# Окончание обработки основы: время добавляется к этапу и запоминается для списка самых медленных основ
+	def host(self, phase, hostId, start):
+		if start is None:
+			return
+		seconds = time.time() - start
+		self.stop(phase, start)
+		self.hosts.append((seconds, hostId))
+		# Список периодически сокращается, чтобы не хранить время каждой основы
+		if len(self.hosts) > TOP_HOSTS * 100:
+			self.hosts.sort(reverse=True)
+			del self.hosts[TOP_HOSTS:]
+
+	# Подсчёт обращений к API
+	def count(self, name, n=1):
+		if not self.enabled:
+			return
+		self.calls[name] = self.calls.get(name, 0) + n
+
+	# Подсчёт пересечения с коммуникацией заданной категории
+	def clash(self, categName):
+		if not self.enabled:
+			return
+		self.clashes[categName] = self.clashes.get(categName, 0) + 1
+
+	# Отчёт о запуске (None, если замер выключен); при заданном файле отчёт дописывается в него
+	def report(self, **extra):
+		if not self.enabled:
+			return None
+		self.hosts.sort(reverse=True)
+		result = {
+			'script': self.script,
+			'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+			'seconds': round(time.time() - self.runStart, 3),
+			'phases': [[phase, round(self.phases[phase], 3)] for phase in self.order],
+			'calls': self.calls,
+			'clashes': self.clashes,
+			'slowestHosts': [[hostId, round(seconds, 4)] for seconds, hostId in self.hosts[:TOP_HOSTS]],
+		}
+		result.update(extra)
+		if self.path:
+			with open(self.path, 'a') as f:
+				f.write(json.dumps(result) + '\n')
+		return result
@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+# Индекс плит по отметкам для поиска пересечений стояков с плитами. Плиты раскладываются по ячейкам сетки в плане,
+# в каждой ячейке они упорядочены по отметке низа. Стояк проходится один раз: по ячейкам, которые задевает его
+# проекция, и по отрезку отметок находятся все плиты, которые он пересекает, вместе с точками входа и выхода
+import math
+from bisect import bisect_left, bisect_right
+
+import SpatialIndex
+import Intersection
+
+# Наименьшее отношение перепада отметок к длине в плане, при котором коммуникация считается стояком (45 градусов)
+STEEP = 1.0
+
+
+# Проверка, что отрезок p0 - p1 достаточно крутой, чтобы искать его пересечения с плитами по отметкам
+def isRiser(p0, p1):
+	dz = abs(p1[2] - p0[2])
+	return dz > Intersection.TOL and dz >= STEEP * ((p1[0] - p0[0])**2 + (p1[1] - p0[1])**2)**0.5
+
+
+class RiserIndex(object):
+	# Индекс хранит для каждой ячейки сетки в плане плиты, упорядоченные по отметке низа
+	def __init__(self, cellSize):
+		self.cellSize = float(cellSize)
+		self.columns = {} # Ячейка (i, j) -> список (низ, ключ), после build() - упорядоченный
+		self.lows = {} # Ячейка -> отметки низа плит ячейки по возрастанию (для двоичного поиска)
+		self.boxes = {}
+		self.thickness = 0.0 # Наибольшая высота габарита плиты
+
+	def __len__(self):
+		return len(self.boxes)
+
+	def __contains__(self, key):
+		return key in self.boxes
+
+	# Диапазон индексов ячеек в плане, покрываемых габаритом
+	def _range(self, bbMin, bbMax):
+		s = self.cellSize
+		return [int(math.floor(bbMin[i] / s)) for i in range(2)], [int(math.floor(bbMax[i] / s)) for i in range(2)]
+
+	# Добавление плиты в индекс
+	def insert(self, key, bbMin, bbMax):
+		self.boxes[key] = (bbMin, bbMax)
+		self.thickness = max(self.thickness, bbMax[2] - bbMin[2])
+		lo, hi = self._range(bbMin, bbMax)
+		columns = self.columns
+		for i in range(lo[0], hi[0] + 1):
+			for j in range(lo[1], hi[1] + 1):
+				if (i, j) in columns:
+					columns[(i, j)].append((bbMin[2], key))
+				else:
+					columns[(i, j)] = [(bbMin[2], key)]
+
+	# Упорядочение плит ячеек по отметке низа (после добавления всех плит)
+	def build(self):
+		for cell, column in self.columns.items():
+			column.sort()
+			self.lows[cell] = [z for z, key in column]
+
+	# Пересечения отрезка p0 - p1 с плитами: список (ключ, концы участка) в порядке отметок. Концы - None,
+	# если отрезок задевает габарит плиты, но участок выходит за габарит в плане (такое пересечение ищется по телу)
+	def crossings(self, p0, p1):
+		zLow = min(p0[2], p1[2])
+		zHigh = max(p0[2], p1[2])
+		lo, hi = self._range((min(p0[0], p1[0]), min(p0[1], p1[1])), (max(p0[0], p1[0]), max(p0[1], p1[1])))
+		seen = set()
+		found = []
+		for i in range(lo[0], hi[0] + 1):
+			for j in range(lo[1], hi[1] + 1):
+				lows = self.lows.get((i, j))
+				if not lows:
+					continue
+				# Плиты, низ которых лежит между низом отрезка (за вычетом наибольшей толщины) и его верхом
+				column = self.columns[(i, j)]
+				for n in range(bisect_left(lows, zLow - self.thickness), bisect_right(lows, zHigh)):
+					key = column[n][1]
+					if key in seen:
+						continue
+					seen.add(key)
+					bbMin, bbMax = self.boxes[key]
+					if Intersection.floorSpan(p0, p1, bbMin[2], bbMax[2], bbMin, bbMax) is None:
+						continue
+					found.append((bbMin[2], key, Intersection.floorSegment(p0, p1, bbMin[2], bbMax[2], bbMin, bbMax)))
+		found.sort(key=lambda item: item[:2])
+		return [(key, ends) for z, key, ends in found]
+
+
+# Построение индекса по списку (ключ, минимум, максимум); размер ячейки - по медиане габаритов плит
+def buildIndex(items, cellSize=None):
+	items = list(items)
+	if cellSize is None:
+		cellSize = SpatialIndex.autoCellSize(items)
+	index = RiserIndex(cellSize)
+	for key, bbMin, bbMax in items:
+		index.insert(key, bbMin, bbMax)
+	index.build()
+	return index
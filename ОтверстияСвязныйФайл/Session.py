@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+# Состояние сессии Dynamo: результаты дорогих этапов, которые сохраняются между повторными запусками узлов.
+# Модуль, как и все вспомогательные модули, остаётся загруженным в sys.modules, пока открыт Dynamo, поэтому
+# его хранилища переживают перезапуск узла при изменении любого входа. Записи коммуникаций и пересечения основ
+# хранятся по документу и id элемента вместе с версией элемента и используются повторно, пока элемент
+# не изменился. Входы расчёта размеров (запасы, koef, maxDiam) в ключи не входят: при их изменении
+# пересчитываются только размеры проёмов. Когда по пути документа открыт другой его экземпляр (связанный файл
+# перезагружен), состояния этого документа сбрасываются
+
+# Наибольшее число элементов в каждом хранилище (при превышении хранилище очищается)
+MAX_ITEMS = 200000
+
+# Записи коммуникаций по источникам: (путь документа, номер источника, добавка к id, преобразование) ->
+# {id элемента: (версия элемента, запись или None)}
+_records = {}
+# Пересечения основ: (путь документа, вид основы, id основы) -> (версия основы, {id коммуникации: (отпечаток, концы участка или None)})
+_clashes = {}
+# Экземпляры документов, по которым собраны состояния: путь документа -> документ
+_docs = {}
+
+
+# Сброс состояний документа, если по его пути открыт другой экземпляр: после перезагрузки связанного файла
+# версии элементов те же, но записи коммуникаций ссылаются на элементы и кривые выгруженного экземпляра
+def _checkDoc(doc):
+	path = doc.PathName
+	known = _docs.get(path)
+	if known is doc:
+		return
+	if known is not None and not (known.IsValidObject and known.Equals(doc)):
+		for store in (_records, _clashes):
+			for key in [key for key in store if key[0] == path]:
+				del store[key]
+	_docs[path] = doc
+
+
+# Записи коммуникаций источника, собранные в этой сессии. transformKey - значения преобразования связи
+# (при перемещении связи записи собираются заново)
+def records(srcDoc, source, prefix, transformKey):
+	_checkDoc(srcDoc)
+	key = (srcDoc.PathName, source, prefix, transformKey)
+	if key not in _records:
+		if sum(len(stored) for stored in _records.values()) >= MAX_ITEMS:
+			_records.clear()
+		_records[key] = {}
+	return _records[key]
+
+
+# Пересечения основы с коммуникациями, проверенными в этой сессии при той же версии основы
+# (при изменении основы - пустой словарь, который заполняется заново)
+def hostClashes(host, kindName):
+	_checkDoc(host.Document)
+	key = (host.Document.PathName, kindName, host.Id.IntegerValue)
+	version = host.VersionGuid
+	stored = _clashes.get(key)
+	if stored is not None and stored[0] == version:
+		return stored[1]
+	if stored is None and len(_clashes) >= MAX_ITEMS:
+		_clashes.clear()
+	_clashes[key] = (version, {})
+	return _clashes[key][1]
+
+
+# Очистка всего состояния сессии
+def clear():
+	_records.clear()
+	_clashes.clear()
+	_docs.clear()
@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+# Расчёт типа и размеров проёмов для пакета пересечений: размеры по сечению коммуникации, углу её прохода
+# через основу и запасу округляются до сантиметров, затем выбирается круглый или прямоугольный проём.
+# Пакет задаётся столбцами (направления стен, толщины, концы участков, сечения); при наличии NumPy он
+# рассчитывается векторно за один вызов, без NumPy - по одному пересечению
+import math
+
+try:
+	import numpy as np
+except ImportError:
+	np = None
+
+# Типы проёмов
+NONE = -1 # Проём не требуется: коммуникация идёт вдоль основы
+ROUND = 0
+RECT = 1
+
+# Минимальный синус угла пересечения, при котором проём ещё рассчитывается
+MIN_SIN = 1e-6
+
+# Перевод футов в миллиметры
+MM = 304.8
+
+
+# Округление размера до сантиметров (половина округляется вверх, как в IronPython)
+def roundSize(value):
+	return math.floor(value * MM / 10 + 0.5) * 10 / MM
+
+
+# Размер проёма с учётом запаса (как отношение или как добавка)
+def withReserve(value, reserveType, reserve):
+	if reserveType:
+		return value * reserve
+	return value + reserve
+
+
+# Выбор типа проёма: круглый, если отношение сторон и диаметр допустимы
+def openingType(openWidth, openHeight, koef, maxDiam):
+	big = max(openWidth, openHeight)
+	small = min(openWidth, openHeight)
+	if small > 0 and big / small <= koef and big <= maxDiam:
+		return ROUND
+	return RECT
+
+
+# Тип и размеры проёма: диаметр круглого проёма равен большей стороне, он записывается и в ширину, и в высоту
+def opening(openWidth, openHeight, koef, maxDiam):
+	openType = openingType(openWidth, openHeight, koef, maxDiam)
+	if openType == ROUND:
+		openWidth = openHeight = max(openWidth, openHeight)
+	return openType, openWidth, openHeight
+
+
+# Острый угол (в радианах) по косинусу
+def acuteAngle(cosin):
+	angle = math.acos(max(-1.0, min(1.0, cosin)))
+	if angle > math.pi / 2:
+		angle = math.pi - angle
+	return angle
+
+
+# Расчёт одного проёма в стене
+# hostDir - направление стены в плане (dx, dy), thickness - толщина стены,
+# end0, end1 - концы отрезка пересечения коммуникации со стеной
+def wallOpening(hostDir, thickness, end0, end1, commWidth, commHeight, reserveType, reserve, koef, maxDiam):
+	sx = end1[0] - end0[0]; sy = end1[1] - end0[1]; sz = end1[2] - end0[2]
+	planLen = (sx**2 + sy**2)**0.5
+	hostLen = (hostDir[0]**2 + hostDir[1]**2)**0.5
+	# Горизонтальный угол между коммуникацией и стеной (для вертикальной коммуникации считается прямым)
+	if planLen > 0 and hostLen > 0:
+		angleHor = acuteAngle((hostDir[0]*sx + hostDir[1]*sy) / (hostLen * planLen))
+	else:
+		angleHor = math.pi / 2
+	# Вертикальный угол между коммуникацией и вертикалью
+	angleVert = acuteAngle(sz / (planLen**2 + sz**2)**0.5)
+	if math.sin(angleHor) < MIN_SIN or math.sin(angleVert) < MIN_SIN:
+		return NONE, 0.0, 0.0
+	# Минимальные ширина и высота проёма
+	minWidth = thickness/math.tan(angleHor) + commWidth/math.sin(angleHor)
+	minHeight = thickness/math.tan(angleVert) + commHeight/math.sin(angleVert)
+	openWidth = roundSize(withReserve(minWidth, reserveType, reserve))
+	openHeight = roundSize(withReserve(minHeight, reserveType, reserve))
+	return opening(openWidth, openHeight, koef, maxDiam)
+
+
+# Расчёт одного проёма в плите (размеры определяются только сечением коммуникации)
+def floorOpening(commWidth, commHeight, reserveType, reserve, koef, maxDiam):
+	openWidth = roundSize(withReserve(commWidth, reserveType, reserve))
+	openHeight = roundSize(withReserve(commHeight, reserveType, reserve))
+	return opening(openWidth, openHeight, koef, maxDiam)
+
+
+# Разбиение списка результатов на столбцы (типы, ширины, высоты)
+def _columns(results):
+	if not results:
+		return [], [], []
+	types, widths, heights = zip(*results)
+	return list(types), list(widths), list(heights)
+
+
+# Векторный выбор типа и размеров проёма (диаметр круглого проёма - большая сторона)
+def _npOpenings(openWidth, openHeight, koef, maxDiam):
+	big = np.maximum(openWidth, openHeight)
+	small = np.minimum(openWidth, openHeight)
+	with np.errstate(divide='ignore', invalid='ignore'):
+		isRound = (small > 0) & (big / np.where(small > 0, small, 1) <= koef) & (big <= maxDiam)
+	return np.where(isRound, ROUND, RECT), np.where(isRound, big, openWidth), np.where(isRound, big, openHeight)
+
+
+def _npRound(values):
+	return np.floor(values * MM / 10 + 0.5) * 10 / MM
+
+
+def _npAcute(cosin):
+	angle = np.arccos(np.clip(cosin, -1.0, 1.0))
+	return np.where(angle > np.pi / 2, np.pi - angle, angle)
+
+
+def _npWall(hostDirs, thicknesses, ends0, ends1, commWidths, commHeights, reserveType, reserve, koef, maxDiam):
+	d = np.asarray(hostDirs, dtype=float).reshape(-1, 2)
+	s = np.asarray(ends1, dtype=float).reshape(-1, 3) - np.asarray(ends0, dtype=float).reshape(-1, 3)
+	t = np.asarray(thicknesses, dtype=float)
+	planLen = np.hypot(s[:, 0], s[:, 1])
+	hostLen = np.hypot(d[:, 0], d[:, 1])
+	valid = (planLen > 0) & (hostLen > 0)
+	denom = np.where(valid, hostLen * planLen, 1)
+	angleHor = np.where(valid, _npAcute((d[:, 0]*s[:, 0] + d[:, 1]*s[:, 1]) / denom), np.pi / 2)
+	angleVert = _npAcute(s[:, 2] / np.sqrt(planLen**2 + s[:, 2]**2))
+	skip = (np.sin(angleHor) < MIN_SIN) | (np.sin(angleVert) < MIN_SIN)
+	angleHor = np.where(skip, np.pi / 2, angleHor)
+	angleVert = np.where(skip, np.pi / 2, angleVert)
+	minWidth = t/np.tan(angleHor) + np.asarray(commWidths, dtype=float)/np.sin(angleHor)
+	minHeight = t/np.tan(angleVert) + np.asarray(commHeights, dtype=float)/np.sin(angleVert)
+	if reserveType:
+		openWidth = _npRound(minWidth * reserve); openHeight = _npRound(minHeight * reserve)
+	else:
+		openWidth = _npRound(minWidth + reserve); openHeight = _npRound(minHeight + reserve)
+	openTypes, openWidth, openHeight = _npOpenings(openWidth, openHeight, koef, maxDiam)
+	return np.where(skip, NONE, openTypes).tolist(), np.where(skip, 0.0, openWidth).tolist(), np.where(skip, 0.0, openHeight).tolist()
+
+
+def _npFloor(commWidths, commHeights, reserveType, reserve, koef, maxDiam):
+	w = np.asarray(commWidths, dtype=float)
+	h = np.asarray(commHeights, dtype=float)
+	if reserveType:
+		openWidth = _npRound(w * reserve); openHeight = _npRound(h * reserve)
+	else:
+		openWidth = _npRound(w + reserve); openHeight = _npRound(h + reserve)
+	openTypes, openWidth, openHeight = _npOpenings(openWidth, openHeight, koef, maxDiam)
+	return openTypes.tolist(), openWidth.tolist(), openHeight.tolist()
+
+
+# Пакетный расчёт проёмов в стенах: возвращает столбцы (типы, ширины, высоты);
+# у круглого проёма ширина и высота равны диаметру (большей стороне), для коммуникаций вдоль стены тип равен NONE
+def wallOpenings(hostDirs, thicknesses, ends0, ends1, commWidths, commHeights, reserveType, reserve, koef, maxDiam):
+	if not len(thicknesses):
+		return [], [], []
+	if np is not None:
+		return _npWall(hostDirs, thicknesses, ends0, ends1, commWidths, commHeights, reserveType, reserve, koef, maxDiam)
+	return _columns([wallOpening(hostDirs[i], thicknesses[i], ends0[i], ends1[i], commWidths[i], commHeights[i], reserveType, reserve, koef, maxDiam) for i in range(len(thicknesses))])
+
+
+# Пакетный расчёт проёмов в плитах (аналогично)
+def floorOpenings(commWidths, commHeights, reserveType, reserve, koef, maxDiam):
+	if not len(commWidths):
+		return [], [], []
+	if np is not None:
+		return _npFloor(commWidths, commHeights, reserveType, reserve, koef, maxDiam)
+	return _columns([floorOpening(commWidths[i], commHeights[i], reserveType, reserve, koef, maxDiam) for i in range(len(commWidths))])
@@ -0,0 +1,288 @@
+# -*- coding: utf-8 -*-
+# Снимок модели для расчёта проёмов вне Revit: основы, коммуникации и существующие проёмы в виде столбцов
+# простых значений, настройки расчёта и описание запуска. Снимок записывается скриптом Dynamo в режиме выгрузки
+# и читается модулем Offline.
+# Файл двоичный с записями фиксированной длины: заголовок с версией и числом записей, описание запуска в JSON,
+# затем разделы основ, коммуникаций, существующих проёмов, сторон контуров и габаритов вставок простых основ.
+# При чтении файл отображается в память, разделы при наличии NumPy доступны как структурированные массивы
+# без копирования, столбцы разбираются при первом обращении. mmap и NumPy подключаются только при чтении:
+# в Revit модуль загружается каждым запуском, а снимок там только записывается
+import os
+import json
+import struct
+
+# Версия формата файла снимка
+VERSION = 3
+
+# Заголовок: метка формата, версия, длина описания запуска, число основ, коммуникаций, существующих проёмов,
+# сторон контуров и габаритов вставок
+MAGIC = b'OPENSNAP'
+HEADER = struct.Struct('<8sIIIIIII')
+
+# Поля основы: вид основы, id, id уровня, толщина, направление стены в плане (dx, dy), форма простой стены
+# (начало, конец, отметка низа, отметка верха) или None, габарит плоской плиты или None, форма простой основы
+# (стороны контуров в плане ((x0, y0), (x1, y1)), габариты вставок и шахт) или None, габарит основы
+HOST_FIELDS = ('kind', 'id', 'levelId', 'width', 'dir', 'shape', 'flat', 'form', 'bbMin', 'bbMax')
+# Поля коммуникации: id, порядковый номер и имя категории, форма и размеры сечения, прямая ли ось, концы оси, габарит,
+# направление проёма в плите (dx, dy, dz)
+MEP_FIELDS = ('id', 'kind', 'categName', 'shape', 'width', 'height', 'line', 'end0', 'end1', 'bbMin', 'bbMax', 'floorDir')
+# Поля существующего проёма или заглушки: вид основы, id, точка вставки, размеры по возрастанию
+EXISTING_FIELDS = ('kind', 'id', 'point', 'size')
+
+# Раскладка записей в файле: (поле, код struct, число значений). Строки хранятся номерами в общей таблице строк,
+# необязательные значения - с признаками наличия в поле flags
+HOST_LAYOUT = (('id', 'q', 1), ('levelId', 'q', 1), ('kind', 'H', 1), ('flags', 'B', 1), ('width', 'd', 1), ('dir', 'd', 2),
+	('start', 'd', 3), ('end', 'd', 3), ('zRange', 'd', 2), ('flatMin', 'd', 3), ('flatMax', 'd', 3), ('bbMin', 'd', 3), ('bbMax', 'd', 3))
+MEP_LAYOUT = (('id', 'q', 1), ('kind', 'B', 1), ('categName', 'H', 1), ('shape', 'H', 1), ('flags', 'B', 1), ('width', 'd', 1), ('height', 'd', 1),
+	('end0', 'd', 3), ('end1', 'd', 3), ('bbMin', 'd', 3), ('bbMax', 'd', 3), ('floorDir', 'd', 3))
+EXISTING_LAYOUT = (('id', 'q', 1), ('kind', 'H', 1), ('point', 'd', 3), ('size', 'd', 2))
+# Стороны контуров и габариты вставок хранятся отдельными разделами с номером основы
+EDGE_LAYOUT = (('host', 'I', 1), ('start', 'd', 2), ('end', 'd', 2))
+BOX_LAYOUT = (('host', 'I', 1), ('bbMin', 'd', 3), ('bbMax', 'd', 3))
+
+# Признаки наличия необязательных значений
+HAS_DIR, HAS_SHAPE, HAS_FLAT, HAS_FORM = 1, 2, 4, 8 # Основы
+IS_LINE, HAS_FLOOR_DIR = 1, 2 # Коммуникации
+
+_NP_CODES = {'q': 'i8', 'I': 'u4', 'H': 'u2', 'B': 'u1', 'd': 'f8'}
+_ZERO = {2: (0.0, 0.0), 3: (0.0, 0.0, 0.0)}
+
+
+def _struct(layout):
+	return struct.Struct('<' + ''.join('%d%s' % (count, code) for name, code, count in layout))
+
+
+def _dtype(np, layout):
+	return np.dtype([(name, '<' + _NP_CODES[code]) if count == 1 else (name, '<' + _NP_CODES[code], (count,)) for name, code, count in layout])
+
+
+# Смещение, выровненное на 8 байт
+def _align(offset):
+	return (offset + 7) // 8 * 8
+
+
+# Путь к файлу снимка по умолчанию (рядом с файлом модели, None для несохранённой модели)
+def defaultPath(doc, name):
+	if not doc.PathName:
+		return None
+	return os.path.splitext(doc.PathName)[0] + '_' + name + '_snapshot.bin'
+
+
+# Раздел файла, отображённого в память: записи одной раскладки, столбцы разбираются при первом обращении
+class _Section(object):
+	def __init__(self, buf, offset, count, layout, fields, decode, np=None):
+		self.buf = buf
+		self.offset = offset
+		self.count = count
+		self.layout = layout
+		self.fields = fields
+		self.decode = decode # Функция (имя поля, разобранные столбцы раскладки) -> столбец поля
+		self.array = None
+		if np is not None:
+			# Структурированный массив поверх отображения файла без копирования (у пустого раздела в конце файла
+			# выровненное смещение может выходить за конец файла)
+			self.array = np.frombuffer(buf, _dtype(np, layout), count, offset) if count else np.zeros(0, _dtype(np, layout))
+		self._raw = None
+		self._columns = {}
+
+	def __len__(self):
+		return self.count
+
+	# Столбец поля раскладки: числа или кортежи
+	def raw(self, name):
+		if self.array is not None:
+			values = self.array[name].tolist()
+			if values and isinstance(values[0], list):
+				values = [tuple(v) for v in values]
+			return values
+		if self._raw is None:
+			# Без NumPy все записи раздела разбираются за один проход
+			rec = _struct(self.layout)
+			rows = [rec.unpack_from(self.buf, self.offset + i * rec.size) for i in range(self.count)]
+			self._raw = {}
+			k = 0
+			for field, code, n in self.layout:
+				self._raw[field] = [row[k] for row in rows] if n == 1 else [row[k:k + n] for row in rows]
+				k += n
+		return self._raw[name]
+
+	def __getitem__(self, name):
+		if name not in self._columns:
+			if name not in self.fields:
+				raise KeyError(name)
+			self._columns[name] = self.decode(name, self.raw)
+		return self._columns[name]
+
+
+class Snapshot(object):
+	# key - описание запуска, settings - значения входов, влияющих на расчёт проёмов (словарь)
+	def __init__(self, key='', settings=None):
+		self.key = key
+		self.settings = settings or {}
+		self.hosts = dict((name, []) for name in HOST_FIELDS)
+		self.meps = dict((name, []) for name in MEP_FIELDS)
+		self.existing = dict((name, []) for name in EXISTING_FIELDS)
+		self._file = None
+		self._map = None
+		self._parts = None # Разделы сторон контуров и габаритов вставок загруженного снимка
+
+	# Добавление записи в столбцы в порядке полей
+	@staticmethod
+	def _add(columns, fields, values):
+		for name, value in zip(fields, values):
+			columns[name].append(value)
+		return len(columns[fields[0]]) - 1
+
+	def addHost(self, kind, hostId, levelId, width, direction, shape, flat, form, bbMin, bbMax):
+		return self._add(self.hosts, HOST_FIELDS, (kind, hostId, levelId, width, direction, shape, flat, form, bbMin, bbMax))
+
+	def addMep(self, mepId, kind, categName, shape, width, height, line, end0, end1, bbMin, bbMax, floorDir):
+		return self._add(self.meps, MEP_FIELDS, (mepId, kind, categName, shape, width, height, line, end0, end1, bbMin, bbMax, floorDir))
+
+	def addExisting(self, kind, elementId, point, size):
+		return self._add(self.existing, EXISTING_FIELDS, (kind, elementId, point, size))
+
+	def save(self, path):
+		strings = []
+		numbers = {}
+		def number(value):
+			if value not in numbers:
+				numbers[value] = len(strings)
+				strings.append(value)
+			return numbers[value]
+
+		h = self.hosts
+		hostRec = _struct(HOST_LAYOUT)
+		edgeRec = _struct(EDGE_LAYOUT)
+		boxRec = _struct(BOX_LAYOUT)
+		hosts = []
+		edges = []
+		boxes = []
+		for n in range(len(h['id'])):
+			direction, shape, flat, form = h['dir'][n], h['shape'][n], h['flat'][n], h['form'][n]
+			flags = (HAS_DIR if direction is not None else 0) | (HAS_SHAPE if shape is not None else 0) | (HAS_FLAT if flat is not None else 0) | (HAS_FORM if form is not None else 0)
+			if form is not None:
+				edges.extend(edgeRec.pack(n, *(tuple(start) + tuple(end))) for start, end in form[0])
+				boxes.extend(boxRec.pack(n, *(tuple(bbMin) + tuple(bbMax))) for bbMin, bbMax in form[1])
+			values = [h['id'][n], h['levelId'][n], number(h['kind'][n]), flags, h['width'][n]]
+			values += direction if direction is not None else _ZERO[2]
+			values += tuple(shape[0]) + tuple(shape[1]) + (shape[2], shape[3]) if shape is not None else _ZERO[3] + _ZERO[3] + _ZERO[2]
+			values += tuple(flat[0]) + tuple(flat[1]) if flat is not None else _ZERO[3] + _ZERO[3]
+			values += tuple(h['bbMin'][n]) + tuple(h['bbMax'][n])
+			hosts.append(hostRec.pack(*values))
+
+		m = self.meps
+		mepRec = _struct(MEP_LAYOUT)
+		meps = []
+		for n in range(len(m['id'])):
+			floorDir = m['floorDir'][n]
+			flags = (IS_LINE if m['line'][n] else 0) | (HAS_FLOOR_DIR if floorDir is not None else 0)
+			values = [m['id'][n], m['kind'][n], number(m['categName'][n]), number(m['shape'][n]), flags, m['width'][n], m['height'][n]]
+			values += tuple(m['end0'][n]) + tuple(m['end1'][n]) + tuple(m['bbMin'][n]) + tuple(m['bbMax'][n])
+			values += tuple(floorDir) if floorDir is not None else _ZERO[3]
+			meps.append(mepRec.pack(*values))
+
+		e = self.existing
+		existingRec = _struct(EXISTING_LAYOUT)
+		existing = [existingRec.pack(e['id'][n], number(e['kind'][n]), *(tuple(e['point'][n]) + tuple(e['size'][n]))) for n in range(len(e['id']))]
+
+		meta = json.dumps({'key': self.key, 'settings': self.settings, 'strings': strings}).encode('utf-8')
+		with open(path, 'wb') as f:
+			f.write(HEADER.pack(MAGIC, VERSION, len(meta), len(hosts), len(meps), len(existing), len(edges), len(boxes)))
+			f.write(meta)
+			offset = HEADER.size + len(meta)
+			for records in (hosts, meps, existing, edges, boxes):
+				f.write(b'\0' * (_align(offset) - offset))
+				offset = _align(offset)
+				f.write(b''.join(records))
+				offset += sum(len(r) for r in records)
+
+	# Загрузка снимка из файла отображением в память (None, если файла нет или формат другой версии)
+	@staticmethod
+	def load(path):
+		if not path or not os.path.exists(path):
+			return None
+		import mmap
+		try:
+			import numpy as np
+		except ImportError:
+			np = None
+		f = open(path, 'rb')
+		try:
+			buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+		except ValueError:
+			# Пустой файл
+			f.close()
+			return None
+		if len(buf) < HEADER.size:
+			buf.close(); f.close()
+			return None
+		magic, version, metaLength, nHosts, nMeps, nExisting, nEdges, nBoxes = HEADER.unpack_from(buf, 0)
+		if magic != MAGIC or version != VERSION:
+			buf.close(); f.close()
+			return None
+		meta = json.loads(buf[HEADER.size:HEADER.size + metaLength].decode('utf-8'))
+		strings = meta['strings']
+		snap = Snapshot(meta.get('key', ''), meta.get('settings'))
+		# Разделы сторон контуров и габаритов вставок разбираются вместе со столбцом формы основ
+		parts = {}
+		snap._file = f
+		snap._map = buf
+		snap._parts = parts
+
+		def hostColumn(name, raw):
+			if name == 'kind':
+				return [strings[k] for k in raw('kind')]
+			if name == 'dir':
+				return [v if flags & HAS_DIR else None for v, flags in zip(raw('dir'), raw('flags'))]
+			if name == 'shape':
+				return [(s, e, z[0], z[1]) if flags & HAS_SHAPE else None for s, e, z, flags in zip(raw('start'), raw('end'), raw('zRange'), raw('flags'))]
+			if name == 'flat':
+				return [(a, b) if flags & HAS_FLAT else None for a, b, flags in zip(raw('flatMin'), raw('flatMax'), raw('flags'))]
+			if name == 'form':
+				forms = [([], []) if flags & HAS_FORM else None for flags in raw('flags')]
+				edges, boxes = parts['edges'], parts['boxes']
+				for n, start, end in zip(edges.raw('host'), edges.raw('start'), edges.raw('end')):
+					forms[n][0].append((start, end))
+				for n, bbMin, bbMax in zip(boxes.raw('host'), boxes.raw('bbMin'), boxes.raw('bbMax')):
+					forms[n][1].append((bbMin, bbMax))
+				return forms
+			return raw(name)
+
+		def mepColumn(name, raw):
+			if name in ('categName', 'shape'):
+				return [strings[k] for k in raw(name)]
+			if name == 'line':
+				return [bool(flags & IS_LINE) for flags in raw('flags')]
+			if name == 'floorDir':
+				return [v if flags & HAS_FLOOR_DIR else None for v, flags in zip(raw('floorDir'), raw('flags'))]
+			return raw(name)
+
+		def existingColumn(name, raw):
+			if name == 'kind':
+				return [strings[k] for k in raw('kind')]
+			return raw(name)
+
+		offset = _align(HEADER.size + metaLength)
+		sections = []
+		for count, layout, fields, decode in ((nHosts, HOST_LAYOUT, HOST_FIELDS, hostColumn), (nMeps, MEP_LAYOUT, MEP_FIELDS, mepColumn),
+				(nExisting, EXISTING_LAYOUT, EXISTING_FIELDS, existingColumn), (nEdges, EDGE_LAYOUT, (), None), (nBoxes, BOX_LAYOUT, (), None)):
+			sections.append(_Section(buf, offset, count, layout, fields, decode, np))
+			offset = _align(offset + count * _struct(layout).size)
+		snap.hosts, snap.meps, snap.existing, parts['edges'], parts['boxes'] = sections
+		return snap
+
+	# Структурированные массивы разделов без копирования (None без NumPy или для снимка, ещё не записанного в файл)
+	def arrays(self):
+		if self._map is None or self.hosts.array is None:
+			return None
+		return {'hosts': self.hosts.array, 'meps': self.meps.array, 'existing': self.existing.array,
+			'edges': self._parts['edges'].array, 'boxes': self._parts['boxes'].array}
+
+	# Закрытие отображения файла
+	def close(self):
+		if self._map is not None:
+			self.hosts = self.meps = self.existing = self._parts = None
+			self._map.close()
+			self._file.close()
+			self._map = self._file = None
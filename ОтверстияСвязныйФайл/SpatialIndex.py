@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+# Пространственный индекс по габаритным контейнерам на равномерной сетке: габарит заносится во все ячейки,
+# которые он задевает, а запрос перебирает только ячейки своего габарита и точно проверяет найденные габариты.
+# Габарит хранится парой кортежей (минимум, максимум): BoundingBoxXYZ переводится в неё функцией bboxToTuples
+import math
+
+
+# Проверка пересечения двух габаритных контейнеров (с допуском)
+def boxesOverlap(min1, max1, min2, max2, tol=0):
+	for i in range(3):
+		if min1[i] - tol > max2[i] or min2[i] - tol > max1[i]:
+			return False
+	return True
+
+
+# Преобразование BoundingBoxXYZ в пару кортежей (None, если габаритов нет)
+def bboxToTuples(bb):
+	if bb is None:
+		return None
+	return (bb.Min.X, bb.Min.Y, bb.Min.Z), (bb.Max.X, bb.Max.Y, bb.Max.Z)
+
+
+class GridIndex(object):
+	# Индекс хранит для каждой ячейки сетки список ключей, габариты которых её задевают
+	def __init__(self, cellSize):
+		self.cellSize = float(cellSize)
+		self.cells = {}
+		self.boxes = {}
+
+	# Диапазон индексов ячеек, покрываемых габаритом
+	def _range(self, bbMin, bbMax):
+		s = self.cellSize
+		lo = [int(math.floor(bbMin[i] / s)) for i in range(3)]
+		hi = [int(math.floor(bbMax[i] / s)) for i in range(3)]
+		return lo, hi
+
+	# Добавление элемента в индекс
+	def insert(self, key, bbMin, bbMax):
+		self.boxes[key] = (bbMin, bbMax)
+		lo, hi = self._range(bbMin, bbMax)
+		cells = self.cells
+		for i in range(lo[0], hi[0] + 1):
+			for j in range(lo[1], hi[1] + 1):
+				for k in range(lo[2], hi[2] + 1):
+					cell = (i, j, k)
+					if cell in cells:
+						cells[cell].append(key)
+					else:
+						cells[cell] = [key]
+
+	# Получение ключей, габариты которых пересекаются с заданным габаритом
+	def query(self, bbMin, bbMax, tol=0):
+		lo, hi = self._range((bbMin[0] - tol, bbMin[1] - tol, bbMin[2] - tol), (bbMax[0] + tol, bbMax[1] + tol, bbMax[2] + tol))
+		cells = self.cells
+		boxes = self.boxes
+		seen = set()
+		result = []
+		for i in range(lo[0], hi[0] + 1):
+			for j in range(lo[1], hi[1] + 1):
+				for k in range(lo[2], hi[2] + 1):
+					keys = cells.get((i, j, k))
+					if not keys:
+						continue
+					for key in keys:
+						if key in seen:
+							continue
+						seen.add(key)
+						# Точная проверка пересечения габаритов
+						box = boxes[key]
+						if boxesOverlap(bbMin, bbMax, box[0], box[1], tol):
+							result.append(key)
+		return result
+
+	def __len__(self):
+		return len(self.boxes)
+
+
+# Подбор размера ячейки по медиане наибольших сторон габаритов
+def autoCellSize(items, minSize=1.0):
+	sizes = sorted(max(bbMax[i] - bbMin[i] for i in range(3)) for key, bbMin, bbMax in items)
+	if not sizes:
+		return minSize
+	return max(sizes[len(sizes) // 2], minSize)
+
+
+# Построение индекса по списку (ключ, минимум, максимум) за один проход
+def buildIndex(items, cellSize=None):
+	items = list(items)
+	if cellSize is None:
+		cellSize = autoCellSize(items)
+	index = GridIndex(cellSize)
+	for key, bbMin, bbMax in items:
+		index.insert(key, bbMin, bbMax)
+	return index
+
@@ -10,19 +10,12 @@ import RevitServices
 from RevitServices.Persistence import DocumentManager
 from RevitServices.Transactions import TransactionManager
 
-import math
+import os
+import sys
 
 # Получение текущего проекта
 doc = DocumentManager.Instance.CurrentDBDocument
 
-# Получение списка связанных файлов
-linkInstances = FilteredElementCollector(doc).OfClass(RevitLinkInstance)
-
-# Опции для работы функций
-opt = Options() # Для получения геометрии
-optS = SolidCurveIntersectionOptions() # Для нахождения пересечения объёмного тела с кривой
-nonStr = Autodesk.Revit.DB.Structure.StructuralType.NonStructural # Для вставки семейства в основу
-
 # Входные данные
 rectnOpen = UnwrapElement(IN[0]) # Тип прямоугольного проёма
 roundOpen = UnwrapElement(IN[1]) # Тип круглого проёма
@@ -41,197 +34,54 @@ maxDiam = IN[7] / 304.8 # Максимальный диаметр для кру
 isLink = IN[8] # Определение того, в связанном ли файле находятся сети
 nameLink = IN[9] # Часть имени файла с сетями для корректного определения
 date = IN[10] # Дата или другой комментарий, указывающий на версию задания
-
-# Фильтрация связанных файлов
+libPath = IN[11] if len(IN) > 11 else None # Путь к папке со вспомогательными модулями (пусто - папка графа Dynamo)
+cachePath = IN[12] if len(IN) > 12 else None # Файл кэша пересечений (True - рядом с моделью, пусто - без кэша)
+chunkHosts = IN[13] if len(IN) > 13 else None # Число стен в одной фиксируемой порции (пусто - одна транзакция на весь запуск)
+chunkSeconds = IN[14] if len(IN) > 14 else None # Время обработки одной порции в секундах
+checkpointPath = IN[15] if len(IN) > 15 else None # Файл контрольной точки для продолжения прерванного запуска (True - рядом с моделью)
+mepLinks = IN[16] if len(IN) > 16 else None # Части имён связанных файлов с сетями или True для всех связей (пусто - сети только из текущего проекта)
+mergeGap = IN[17] if len(IN) > 17 else None # Зазор в мм, при котором соседние проёмы стены объединяются в один (пусто - без объединения)
+if mergeGap is not None:
+	mergeGap = mergeGap / 304.8
+profile = IN[18] if len(IN) > 18 else None # Отчёт о времени этапов и обращениях к API (True - в OUT, путь к файлу - также дописывается в файл JSON lines)
+planMode = IN[19] if len(IN) > 19 else None # Режим плана: 'plan' - только расчёт проёмов в файл плана без изменения модели, 'apply' - создание проёмов по файлу плана, 'export' - выгрузка снимка модели в файл для расчёта плана модулем Offline (пусто - обычный запуск)
+planPath = IN[20] if len(IN) > 20 else None # Файл плана или снимка (True - рядом с моделью)
+dedup = IN[21] if len(IN) > 21 else None # Допуск в мм, в пределах которого существующий проём или заглушка не меньшего размера заменяет новый проём (пусто - без проверки)
+if dedup is not None:
+	dedup = dedup / 304.8
+outputMode = IN[22] if len(IN) > 22 else None # Режим вывода: 'ids' - id вместо элементов, 'table' - таблица пар коммуникация - проём, 'counts' - число проёмов по основам, категориям и уровням (пусто - элементы)
+
+# Подключение вспомогательных модулей. Без входа пути (графы с прежним числом входов) модули ищутся в папке графа
+if not libPath:
+	try:
+		clr.AddReference('DynamoRevitDS')
+		import Dynamo
+		libPath = os.path.dirname(Dynamo.Applications.DynamoRevit().RevitDynamoModel.CurrentWorkspace.FileName)
+	except Exception:
+		libPath = None
+if not libPath:
+	raise ValueError('Не задан вход IN[11] - путь к папке со вспомогательными модулями скрипта (Engine.py и др.). Добавьте этот вход узлу Python или сохраните граф в папке с модулями')
+if libPath not in sys.path:
+	sys.path.append(libPath)
+import Links
+import Engine
+
+# Фильтрация связанных файлов (как и раньше, при нескольких совпадениях берётся последний)
+linkDoc = doc
 if isLink:
-	a = 0
-	for inst in linkInstances:
-		if nameLink in inst.Name:
-			linkDoc = inst.GetLinkDocument()
-			a = 1
-	if a == 0:
-		linkDoc = doc
-else:
-	linkDoc = doc
-
-# Получение коллекции всех экземпляров стен
-walls = FilteredElementCollector(linkDoc).OfCategory(BuiltInCategory.OST_Walls).WhereElementIsNotElementType().ToElements()
-
-# Функция расчёта и создания проёма
-def creation(communication, width):
-	# Получение имени категории коммуникации
-	categName = communication.Category.Name
-	# Определение параметров ширины и высоты для труб
-	if categName == 'Трубы':
-		# Получение внешнего диаметра трубы
-		commDiam = communication.get_Parameter(BuiltInParameter.RBS_PIPE_OUTER_DIAMETER).AsDouble()
-		commWidth = commDiam
-		commHeight = commDiam
-	# Определение параметров ширины и высоты для воздуховодов	
-	elif categName == 'Воздуховоды':
-		# Определение формы сечения воздуховода
-		sect = communication.get_Parameter(BuiltInParameter.ELEM_FAMILY_PARAM).AsValueString()
-		if sect == 'Воздуховод круглого сечения':
-			commDiam = communication.get_Parameter(BuiltInParameter.RBS_CURVE_DIAMETER_PARAM).AsDouble()
-			commWidth = commDiam
-			commHeight = commDiam
-		elif sect == 'Воздуховод овального сечения' or sect == 'Воздуховод прямоугольного сечения':
-			commWidth = communication.get_Parameter(BuiltInParameter.RBS_CURVE_WIDTH_PARAM).AsDouble()
-			commHeight = communication.get_Parameter(BuiltInParameter.RBS_CURVE_HEIGHT_PARAM).AsDouble()
-	# Определение параметров ширины и высоты для коробов
-	elif categName == 'Короба':
-		# Получение внешнего диаметра короба
-		commDiam = communication.get_Parameter(BuiltInParameter.RBS_CONDUIT_DIAMETER_PARAM).AsDouble()
-		commWidth = commDiam
-		commHeight = commDiam	
-	# Определение параметров ширины и высоты для кабельных лотков
-	elif categName == 'Кабельные лотки':
-		commWidth = communication.get_Parameter(BuiltInParameter.RBS_CABLETRAY_WIDTH_PARAM).AsDouble()
-		commHeight = communication.get_Parameter(BuiltInParameter.RBS_CABLETRAY_HEIGHT_PARAM).AsDouble()		
-	# Получение коэффициентов уравнения прямой (аналогично стене)
-	commCurve = communication.Location.Curve # Получение кривой эскиза
-	line = geomSolid.IntersectWithCurve(commCurve, optS).GetCurveSegment(0) # Получение геометрии (списка кривых) пересечения и взятие первой и единственной кривой
-	end0 = line.GetEndPoint(0)
-	end1 = line.GetEndPoint(1)
-	x0_ = end0.X; y0_ = end0.Y;	x1_ = end1.X; y1_ = end1.Y; z0_ = end0.Z; z1_ = end1.Z
-	A2 = y0_-y1_; B2 = x1_-x0_; C2 = z1_-z0_
-	
-	# Получение центра пересечения стены и трубы
-	center = XYZ((end0.X + end1.X) / 2, (end0.Y + end1.Y) / 2, (end0.Z + end1.Z) / 2) # Получение центра пересечения стены и трубы
-	
-	# Формирование направления для вставки семейства
-	direction = XYZ(x1-x0, y1-y0, 0)
-	
-	# Получение угла пересечения кривой стены и кривой трубы в плане (для определения минимальной ширины проёма)
-	cosin = (A1*A2 + B1*B2) / ((A1**2 + B1**2)**0.5 * (A2**2 + B2**2)**0.5) # Вычисление косинуса между прямыми трубы и стены
-	angleHor = math.degrees(math.acos(cosin)) # Вычисление горизонтального угла (в градусах)
-	if angleHor > 90:
-		angleHor = 180 - angleHor # Определение острого угла при пересечении
-	newAngleHor = math.radians(angleHor) # Перевод острого угла в радианы
-	# Определение минимальной ширины проёма
-	minWidth = width/math.tan(newAngleHor) + commWidth/math.sin(newAngleHor)
-	# Определение ширины проёма с учётом допуска
-	if rectnReservType:
-		openWidth = minWidth * rectnReserv
-	else:
-		openWidth = minWidth + rectnReserv
-	
-	# Получение угла пересечения кривой стены и кривой трубы по вертикали (для определения минимальной высоты проёма, аналогично предыдущему)
-	cosin = C2 / ((A2**2 + B2**2+C2**2)**0.5) # Вычисление косинуса между трубой и горизонтальной плоскостью
-	angleVert = math.degrees(math.acos(cosin)) # Вычисление вертикального угла (в градусах)
-	if angleVert > 90:
-		angleVert = 180 - angleVert
-	newAngleVert = math.radians(angleVert)
-	# Определение минимальной высоты проёма
-	minHeight = width/math.tan(newAngleVert) + commHeight/math.sin(newAngleVert)
-	# Определение высоты проёма с учётом допуска
-	if rectnReservType:
-		openHeight = minHeight * rectnReserv
-	else:
-		openHeight = minHeight + rectnReserv
-	
-	# Округление размеров до сантиметров
-	openWidth = round(openWidth * 304.8, -1) / 304.8
-	openHeight = round(openHeight * 304.8, -1) / 304.8
-	
-	# Проверка того, нужен ли круглый проём, и создание проёма
-	if openHeight > openWidth: # Случай, если высота больше ширины
-		if openHeight/openWidth <= koef and openHeight <= maxDiam: # Проверка на допустимые значения
-			# Создание круглого проёма и задание его диаметра
-			cutNew = doc.Create.NewFamilyInstance(center, roundOpen, direction, doc.GetElement(wall.LevelId), nonStr)
-			cutNew.LookupParameter('Диаметр проёма').Set(openHeight)
-		else:
-			# Создание прямоугольного проёма и задание его ширины и высоты
-			cutNew = doc.Create.NewFamilyInstance(center, rectnOpen, direction, doc.GetElement(wall.LevelId), nonStr)
-			cutNew.LookupParameter('Ширина проёма').Set(openWidth)
-			cutNew.LookupParameter('Высота проёма').Set(openHeight)
-	else: # Случай, если ширина больше высоты (аналогично)
-		if openWidth/openHeight <= koef and openWidth <= maxDiam:
-			cutNew = doc.Create.NewFamilyInstance(center, roundOpen, direction, doc.GetElement(wall.LevelId), nonStr)
-			cutNew.LookupParameter('Диаметр проёма').Set(openWidth)
-		else:
-			cutNew = doc.Create.NewFamilyInstance(center, rectnOpen, direction, doc.GetElement(wall.LevelId), nonStr)
-			cutNew.LookupParameter('Ширина проёма').Set(openWidth)
-			cutNew.LookupParameter('Высота проёма').Set(openHeight)
-	cutNew.LookupParameter('Дисциплина проёма').Set(categName)
-	cutNew.LookupParameter('Глубина проёма').Set(categName)
-	cutNew.LookupParameter('Дата').Set(date)
-			
-	return communication, cutNew
-
-# Формирование пустого выходного списка
-lst = []
-
-# Открытие транзакции
-TransactionManager.Instance.EnsureInTransaction(doc)
-
-# Аквтивация загруженных семейств проёмов (если ещё не были использованы)
-rectnOpen.Activate()
-roundOpen.Activate()
-
-# Обработка списка экземпляров стен
-for wall in walls:
-	# Получение ширины
-	width = wall.Width
-	
-	# Получение коэффициентов уравнения прямой
-	wallCurve = wall.Location.Curve # Получение кривой эскиза стены
-	endWall0 = wallCurve.GetEndPoint(0) # Получение начальной точки кривой
-	endWall1 = wallCurve.GetEndPoint(1) # Получение конечной точки кривой
-	x0 = endWall0.X; y0 = endWall0.Y; x1 = endWall1.X; y1 = endWall1.Y # Получение отдельных координат точек
-	A1 = y0-y1;	B1 = x1-x0 # Получение коэффициентов уравнения прямой
-	
-	# Получение геометрии стены
-	geomElem = wall.get_Geometry(opt)
-	for geomObj in geomElem:
-		geomSolid = geomObj
-		
-	# Получение коллекции всех экземпляров труб в проекте (необходимо каждый раз брать заново)
-	pipes = FilteredElementCollector(doc).OfCategory(BuiltInCategory.OST_PipeCurves).WhereElementIsNotElementType()
-	# Извлечение только тех из них, которые пересекаются с объёмом данной стены
-	pipeInters = pipes.WherePasses(ElementIntersectsSolidFilter(geomSolid)).ToElements()
-	
-	# Получение коллекции всех экземпляров труб в проекте (необходимо каждый раз брать заново)
-	ducts = FilteredElementCollector(doc).OfCategory(BuiltInCategory.OST_DuctCurves).WhereElementIsNotElementType()
-	# Извлечение только тех из них, которые пересекаются с объёмом данной стены
-	ductInters = ducts.WherePasses(ElementIntersectsSolidFilter(geomSolid)).ToElements()
-	
-	# Получение коллекции всех экземпляров коробов в проекте (необходимо каждый раз брать заново)
-	conds = FilteredElementCollector(doc).OfCategory(BuiltInCategory.OST_Conduit).WhereElementIsNotElementType()
-	# Извлечение только тех из них, которые пересекаются с объёмом данной стены
-	condInters = conds.WherePasses(ElementIntersectsSolidFilter(geomSolid)).ToElements()
-	
-	# Получение коллекции всех экземпляров кабельных лотков в проекте (необходимо каждый раз брать заново)
-	cabls = FilteredElementCollector(doc).OfCategory(BuiltInCategory.OST_CableTray).WhereElementIsNotElementType()
-	# Извлечение только тех из них, которые пересекаются с объёмом данной стены
-	cablInters = cabls.WherePasses(ElementIntersectsSolidFilter(geomSolid)).ToElements()
-	
-	# Формирование пустого промежуточного списка
-	_lst = []
-	
-	# Обработка труб, пересекающихся с данной стеной
-	for pipe in pipeInters:
-		result = creation(pipe, width)	
-		_lst.append(result)
-	
-	# Обработка воздуховодов, пересекающихся с данной стеной	
-	for duct in ducts:
-		result = creation(duct, width)	
-		_lst.append(result)
-	
-	# Обработка коробов, пересекающихся с данной стеной	
-	for cond in conds:
-		result = creation(cond, width)	
-		_lst.append(result)
-	
-	# Обработка кабельных лотков, пересекающихся с данной стеной	
-	for cabl in cabls:
-		result = creation(cabl, width)	
-		_lst.append(result)
-		
-	lst.append(_lst)
-
-# Закрытие транзакции
-TransactionManager.Instance.TransactionTaskDone()
-
-OUT = lst
\ No newline at end of file
+	hostLinks = Links.findLinks(doc, nameLink)
+	if hostLinks:
+		linkDoc = hostLinks[-1][1]
+
+# Поиск пересечений и создание проёмов общим механизмом (только для стен)
+kind = Engine.WallHosts(rectnOpen, roundOpen)
+engine = Engine.Engine(doc, linkDoc, [kind], kind.title, 'Wall', rectnReservType, rectnReserv, koef, maxDiam, date,
+	cachePath, chunkHosts, chunkSeconds, checkpointPath, mepLinks, mergeGap, profile,
+	planMode, planPath, dedup, outputMode)
+engine.run()
+
+# Выходной список: отдельный подсписок для каждой обработанной основы
+# (в режиме плана - число проёмов плана и ключи добавленных, удалённых и изменённых проёмов, при применении плана - созданные проёмы,
+# при выгрузке снимка - число основ и коммуникаций в снимке и путь к нему)
+# При заданном режиме вывода вместо элементов выводятся их id, таблица пар коммуникация - проём или сводка
+OUT = engine.output(engine.result if planMode else engine.lists[kind.name])
\ No newline at end of file
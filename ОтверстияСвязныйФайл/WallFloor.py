@@ -0,0 +1,91 @@
+# Подгрузка библиотек
+import clr
+
+clr.AddReference('RevitAPI')
+import Autodesk
+from Autodesk.Revit.DB import *
+
+clr.AddReference('RevitServices')
+import RevitServices
+from RevitServices.Persistence import DocumentManager
+from RevitServices.Transactions import TransactionManager
+
+import os
+import sys
+
+# Получение текущего проекта
+doc = DocumentManager.Instance.CurrentDBDocument
+
+# Входные данные
+rectnOpen = UnwrapElement(IN[0]) # Тип прямоугольного проёма в стене
+roundOpen = UnwrapElement(IN[1]) # Тип круглого проёма в стене
+rectnOpenF = UnwrapElement(IN[2]) # Тип прямоугольного проёма в плите
+roundOpenF = UnwrapElement(IN[3]) # Тип круглого проёма в плите
+rectnReservType = IN[4] # Тип запаса для прямоугольного проёма
+roundReservType = IN[5] # Тип запаса для круглого проёма
+if rectnReservType:
+	rectnReserv = IN[6] # Запас для прямоугольного проёма как отношение сторон
+else:
+	rectnReserv = IN[6] / 304.8 # Запас для прямоугольного проёма в мм
+if roundReservType:
+	roundReserv = IN[7] # Запас для круглого проёма как отношение сторон
+else:
+	roundReserv = IN[7] / 304.8 # Запас для круглого проёма в мм
+koef = IN[8] # Максимальное отношение сторон для круглого отверстия
+maxDiam = IN[9] / 304.8 # Максимальный диаметр для круглого отверстия
+isLink = IN[10] # Определение того, в связанном ли файле находятся сети
+nameLink = IN[11] # Часть имени файла с сетями для корректного определения
+date = IN[12] # Дата или другой комментарий, указывающий на версию задания
+libPath = IN[13] if len(IN) > 13 else None # Путь к папке со вспомогательными модулями (пусто - папка графа Dynamo)
+cachePath = IN[14] if len(IN) > 14 else None # Файл кэша пересечений (True - рядом с моделью, пусто - без кэша)
+chunkHosts = IN[15] if len(IN) > 15 else None # Число основ в одной фиксируемой порции (пусто - одна транзакция на весь запуск)
+chunkSeconds = IN[16] if len(IN) > 16 else None # Время обработки одной порции в секундах
+checkpointPath = IN[17] if len(IN) > 17 else None # Файл контрольной точки для продолжения прерванного запуска (True - рядом с моделью)
+mepLinks = IN[18] if len(IN) > 18 else None # Части имён связанных файлов с сетями или True для всех связей (пусто - сети только из текущего проекта)
+mergeGap = IN[19] if len(IN) > 19 else None # Зазор в мм, при котором соседние проёмы одной основы объединяются в один (пусто - без объединения)
+if mergeGap is not None:
+	mergeGap = mergeGap / 304.8
+profile = IN[20] if len(IN) > 20 else None # Отчёт о времени этапов и обращениях к API (True - в OUT, путь к файлу - также дописывается в файл JSON lines)
+planMode = IN[21] if len(IN) > 21 else None # Режим плана: 'plan' - только расчёт проёмов в файл плана без изменения модели, 'apply' - создание проёмов по файлу плана, 'export' - выгрузка снимка модели в файл для расчёта плана модулем Offline (пусто - обычный запуск)
+planPath = IN[22] if len(IN) > 22 else None # Файл плана или снимка (True - рядом с моделью)
+dedup = IN[23] if len(IN) > 23 else None # Допуск в мм, в пределах которого существующий проём или заглушка не меньшего размера заменяет новый проём (пусто - без проверки)
+if dedup is not None:
+	dedup = dedup / 304.8
+outputMode = IN[24] if len(IN) > 24 else None # Режим вывода: 'ids' - id вместо элементов, 'table' - таблица пар коммуникация - проём, 'counts' - число проёмов по основам, категориям и уровням (пусто - элементы)
+
+# Подключение вспомогательных модулей. Без входа пути (графы с прежним числом входов) модули ищутся в папке графа
+if not libPath:
+	try:
+		clr.AddReference('DynamoRevitDS')
+		import Dynamo
+		libPath = os.path.dirname(Dynamo.Applications.DynamoRevit().RevitDynamoModel.CurrentWorkspace.FileName)
+	except Exception:
+		libPath = None
+if not libPath:
+	raise ValueError('Не задан вход IN[13] - путь к папке со вспомогательными модулями скрипта (Engine.py и др.). Добавьте этот вход узлу Python или сохраните граф в папке с модулями')
+if libPath not in sys.path:
+	sys.path.append(libPath)
+import Links
+import Engine
+
+# Фильтрация связанных файлов (как и раньше, при нескольких совпадениях берётся последний)
+linkDoc = doc
+if isLink:
+	hostLinks = Links.findLinks(doc, nameLink)
+	if hostLinks:
+		linkDoc = hostLinks[-1][1]
+
+# Поиск пересечений и создание проёмов в стенах и плитах за один запуск: коммуникации перебираются один раз,
+# проёмы обоих видов создаются в одном конвейере транзакций
+walls = Engine.WallHosts(rectnOpen, roundOpen)
+floors = Engine.FloorHosts(rectnOpenF, roundOpenF)
+engine = Engine.Engine(doc, linkDoc, [walls, floors], 'Проёмы в стенах и плитах', 'WallFloor', rectnReservType, rectnReserv, koef, maxDiam, date,
+	cachePath, chunkHosts, chunkSeconds, checkpointPath, mepLinks, mergeGap, profile,
+	planMode, planPath, dedup, outputMode)
+engine.run()
+
+# Выходной список: подсписки стен и подсписки плит (отдельный подсписок для каждой обработанной основы)
+# (в режиме плана - число проёмов плана и ключи добавленных, удалённых и изменённых проёмов, при применении плана - созданные проёмы,
+# при выгрузке снимка - число основ и коммуникаций в снимке и путь к нему)
+# При заданном режиме вывода вместо элементов выводятся их id, таблица пар коммуникация - проём или сводка
+OUT = engine.output(engine.result if planMode else [engine.lists[walls.name], engine.lists[floors.name]])
\ No newline at end of file
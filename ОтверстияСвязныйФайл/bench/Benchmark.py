@@ -0,0 +1,108 @@
+# Замер масштабируемости скриптов проёмов на синтетических моделях
+# Запуск: python Benchmark.py --scripts Wall,Floor,WallFloor,Opening --sizes 100,400,1600 [--json results.jsonl]
+# Для каждого размера модели выводятся время выполнения, пиковая память и число обращений к API
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+benchDir = os.path.dirname(os.path.abspath(__file__))
+libDir = os.path.dirname(benchDir)
+sys.path.insert(0, benchDir)
+
+import FakeRevit
+import ModelGenerator
+
+# Обращения к API, которые выводятся в таблице
+mainCalls = ['FilteredElementCollector', 'SolidFilterCheck', 'get_Geometry', 'IntersectWithCurve', 'NewFamilyInstances2', 'NewFamilyInstance', 'LookupParameter', 'Parameter.Set', 'GetElement']
+
+
+# Входные данные скриптов (как на входах узла Python Script в Dynamo)
+def scriptInputs(script, model):
+	symbols = model.symbols
+	if script == 'Wall':
+		return [symbols['capRect'], symbols['capRound'], False, False, 50, 50, 1.5, 500, bool(model.links), 'АР', '2026-01-01', libDir]
+	if script == 'Floor':
+		return [symbols['capRectF'], symbols['capRoundF'], False, False, 50, 50, 1.5, 500, bool(model.links), 'АР', '2026-01-01', libDir]
+	if script == 'WallFloor':
+		return [symbols['capRect'], symbols['capRound'], symbols['capRectF'], symbols['capRoundF'], False, False, 50, 50, 1.5, 500, bool(model.links), 'АР', '2026-01-01', libDir]
+	if script == 'Opening':
+		return [symbols['openRect'], symbols['openRound'], symbols['openRectF'], symbols['openRoundF'], libDir]
+	raise ValueError('Неизвестный скрипт: %s' % script)
+
+
+# Синтетическая модель заданного размера
+def scaledModel(size, seed=0):
+	return ModelGenerator.generateModel(walls=size, floors=max(1, size // 10), meps=size * 4, caps=size, seed=seed)
+
+
+# Выполнение скрипта в пространстве имён, имитирующем узел Dynamo
+def runScript(script, model, inputs=None):
+	FakeRevit.install(model.doc)
+	path = os.path.join(libDir, script + '.py')
+	with open(path, 'rb') as f:
+		code = compile(f.read(), path, 'exec')
+	scope = {'__name__': '__dynamo__', 'IN': inputs if inputs is not None else scriptInputs(script, model), 'UnwrapElement': lambda x: x}
+	exec(code, scope)
+	return scope.get('OUT')
+
+
+def measure(script, size, seed=0, memory=True):
+	# Замер времени (без трассировки памяти)
+	model = scaledModel(size, seed)
+	FakeRevit.resetCalls()
+	start = time.perf_counter()
+	runScript(script, model)
+	seconds = time.perf_counter() - start
+	calls = dict(FakeRevit.calls)
+	# Отдельный прогон на свежей модели для замера пиковой памяти
+	peak = None
+	if memory:
+		model = scaledModel(size, seed)
+		tracemalloc.start()
+		runScript(script, model)
+		peak = tracemalloc.get_traced_memory()[1]
+		tracemalloc.stop()
+	return {
+		'script': script,
+		'size': size,
+		'walls': len(model.walls),
+		'floors': len(model.floors),
+		'meps': len(model.meps),
+		'caps': len(model.caps),
+		'seconds': round(seconds, 4),
+		'peakMB': round(peak / 1048576.0, 2) if peak is not None else None,
+		'calls': calls,
+	}
+
+
+def main(argv=None):
+	parser = argparse.ArgumentParser(description='Замер масштабируемости скриптов проёмов на синтетических моделях')
+	parser.add_argument('--scripts', default='Wall,Floor,Opening', help='скрипты через запятую')
+	parser.add_argument('--sizes', default='50,200,800', help='размеры моделей (число стен) через запятую')
+	parser.add_argument('--seed', type=int, default=0)
+	parser.add_argument('--no-memory', action='store_true', help='не замерять пиковую память')
+	parser.add_argument('--json', help='файл для дописывания результатов в формате JSON lines')
+	args = parser.parse_args(argv)
+
+	header = '%-9s %6s %7s %8s %8s' % ('script', 'size', 'meps', 'seconds', 'peakMB')
+	print(header + ''.join(' %s' % name for name in mainCalls))
+	results = []
+	for script in args.scripts.split(','):
+		for size in [int(s) for s in args.sizes.split(',')]:
+			result = measure(script, size, args.seed, not args.no_memory)
+			results.append(result)
+			row = '%-9s %6d %7d %8.3f %8s' % (script, size, result['meps'], result['seconds'], result['peakMB'] if result['peakMB'] is not None else '-')
+			print(row + ''.join(' %*d' % (len(name), result['calls'].get(name, 0)) for name in mainCalls))
+	if args.json:
+		with open(args.json, 'a') as f:
+			for result in results:
+				result['time'] = time.strftime('%Y-%m-%dT%H:%M:%S')
+				f.write(json.dumps(result, ensure_ascii=False) + '\n')
+	return results
+
+
+if __name__ == '__main__':
+	main()
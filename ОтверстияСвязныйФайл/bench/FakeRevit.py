@@ -0,0 +1,1054 @@
+# Заменитель Revit API для запуска скриптов проёмов вне Revit/Dynamo
+# Реализует только то подмножество Autodesk.Revit.DB и RevitServices, которое используют скрипты.
+# Основы задаются ориентированными параллелепипедами, коммуникации - отрезками.
+# Все обращения к API подсчитываются в calls
+import sys
+import types
+import collections
+import copy
+import enum
+import itertools
+
+# Счётчики обращений к API по категориям
+calls = collections.Counter()
+
+
+def _hit(name):
+	calls[name] += 1
+
+
+def resetCalls():
+	calls.clear()
+
+
+# Геометрия
+
+
+class XYZ(object):
+	__slots__ = ('X', 'Y', 'Z')
+
+	def __init__(self, x=0.0, y=0.0, z=0.0):
+		self.X = float(x); self.Y = float(y); self.Z = float(z)
+
+	def __add__(self, other):
+		return XYZ(self.X + other.X, self.Y + other.Y, self.Z + other.Z)
+
+	def __sub__(self, other):
+		return XYZ(self.X - other.X, self.Y - other.Y, self.Z - other.Z)
+
+	def __mul__(self, k):
+		return XYZ(self.X * k, self.Y * k, self.Z * k)
+
+	def Add(self, other):
+		return self + other
+
+	def Subtract(self, other):
+		return self - other
+
+	def Multiply(self, k):
+		return self * k
+
+	def DotProduct(self, other):
+		return self.X * other.X + self.Y * other.Y + self.Z * other.Z
+
+	def CrossProduct(self, other):
+		return XYZ(self.Y * other.Z - self.Z * other.Y, self.Z * other.X - self.X * other.Z, self.X * other.Y - self.Y * other.X)
+
+	def GetLength(self):
+		return (self.X**2 + self.Y**2 + self.Z**2)**0.5
+
+	def Normalize(self):
+		length = self.GetLength()
+		return XYZ(self.X / length, self.Y / length, self.Z / length) if length else XYZ()
+
+	def IsZeroLength(self):
+		return self.GetLength() < 1e-9
+
+	def DistanceTo(self, other):
+		return (self - other).GetLength()
+
+	def __repr__(self):
+		return 'XYZ(%.4f, %.4f, %.4f)' % (self.X, self.Y, self.Z)
+
+
+XYZ.Zero = XYZ(0, 0, 0)
+XYZ.BasisX = XYZ(1, 0, 0)
+XYZ.BasisY = XYZ(0, 1, 0)
+XYZ.BasisZ = XYZ(0, 0, 1)
+
+
+class Line(object):
+	def __init__(self, p0, p1):
+		self._ends = (p0, p1)
+
+	@staticmethod
+	def CreateBound(p0, p1):
+		return Line(p0, p1)
+
+	def GetEndPoint(self, i):
+		return self._ends[i]
+
+	@property
+	def Direction(self):
+		return (self._ends[1] - self._ends[0]).Normalize()
+
+	@property
+	def Length(self):
+		return self._ends[0].DistanceTo(self._ends[1])
+
+	def Evaluate(self, t, normalized):
+		p0, p1 = self._ends
+		if not normalized:
+			t = t / self.Length
+		return p0 + (p1 - p0) * t
+
+	def CreateTransformed(self, transform):
+		return Line(transform.OfPoint(self._ends[0]), transform.OfPoint(self._ends[1]))
+
+
+class BoundingBoxXYZ(object):
+	def __init__(self, bbMin=None, bbMax=None):
+		self.Min = bbMin
+		self.Max = bbMax
+
+
+class Transform(object):
+	def __init__(self, origin=None):
+		self.Origin = origin or XYZ()
+
+	def OfPoint(self, p):
+		return p + self.Origin
+
+	def OfVector(self, v):
+		return v
+
+	@property
+	def IsIdentity(self):
+		return self.Origin.IsZeroLength()
+
+	@property
+	def Inverse(self):
+		return Transform(self.Origin * -1)
+
+
+Transform.Identity = Transform()
+
+
+class PlanarFace(object):
+	def __init__(self, normal, origin):
+		self.FaceNormal = normal
+		self.Origin = origin
+
+
+class CurveSegments(object):
+	# Результат пересечения объёмного тела с кривой
+	def __init__(self, segments):
+		self._segments = segments
+
+	@property
+	def SegmentCount(self):
+		return len(self._segments)
+
+	def GetCurveSegment(self, i):
+		return self._segments[i]
+
+
+class Solid(object):
+	# Ориентированный параллелепипед: начало, три единичные оси и пределы по каждой оси
+	def __init__(self, origin, axes, lo, hi):
+		self.origin = origin
+		self.axes = axes
+		self.lo = lo
+		self.hi = hi
+
+	@property
+	def Volume(self):
+		v = 1.0
+		for i in range(3):
+			v *= max(self.hi[i] - self.lo[i], 0)
+		return v
+
+	@property
+	def SurfaceArea(self):
+		d = [max(self.hi[i] - self.lo[i], 0) for i in range(3)]
+		return 2 * (d[0]*d[1] + d[1]*d[2] + d[0]*d[2])
+
+	@property
+	def Faces(self):
+		faces = []
+		center = self._world([(self.lo[i] + self.hi[i]) / 2 for i in range(3)])
+		for i in range(3):
+			for sign in (-1, 1):
+				normal = self.axes[i] * sign
+				offset = (self.hi[i] if sign > 0 else self.lo[i]) - (self.lo[i] + self.hi[i]) / 2
+				faces.append(PlanarFace(normal, center + self.axes[i] * offset))
+		return faces
+
+	def _local(self, p):
+		d = p - self.origin
+		return [d.DotProduct(a) for a in self.axes]
+
+	def _world(self, c):
+		p = self.origin
+		for i in range(3):
+			p = p + self.axes[i] * c[i]
+		return p
+
+	def corners(self):
+		return [self._world((x, y, z)) for x in (self.lo[0], self.hi[0]) for y in (self.lo[1], self.hi[1]) for z in (self.lo[2], self.hi[2])]
+
+	def boundingBox(self):
+		pts = self.corners()
+		return BoundingBoxXYZ(XYZ(min(p.X for p in pts), min(p.Y for p in pts), min(p.Z for p in pts)), XYZ(max(p.X for p in pts), max(p.Y for p in pts), max(p.Z for p in pts)))
+
+	def containsPoint(self, p, tol=1e-6):
+		c = self._local(p)
+		return all(self.lo[i] - tol <= c[i] <= self.hi[i] + tol for i in range(3))
+
+	# Отсечение отрезка параллелепипедом (параметры входа и выхода или None)
+	def clip(self, p0, p1):
+		a = self._local(p0); b = self._local(p1)
+		t0, t1 = 0.0, 1.0
+		for i in range(3):
+			d = b[i] - a[i]
+			if abs(d) < 1e-12:
+				if a[i] < self.lo[i] or a[i] > self.hi[i]:
+					return None
+				continue
+			ta = (self.lo[i] - a[i]) / d
+			tb = (self.hi[i] - a[i]) / d
+			if ta > tb:
+				ta, tb = tb, ta
+			t0 = max(t0, ta); t1 = min(t1, tb)
+			if t1 - t0 < 1e-9:
+				return None
+		return t0, t1
+
+	def IntersectWithCurve(self, curve, options):
+		_hit('IntersectWithCurve')
+		p0 = curve.GetEndPoint(0); p1 = curve.GetEndPoint(1)
+		t = self.clip(p0, p1)
+		if t is None:
+			return CurveSegments([])
+		return CurveSegments([Line(p0 + (p1 - p0) * t[0], p0 + (p1 - p0) * t[1])])
+
+
+class GeometryElement(list):
+	pass
+
+
+class SolidUtils(object):
+	@staticmethod
+	def CreateTransformed(solid, transform):
+		_hit('CreateTransformed')
+		return Solid(transform.OfPoint(solid.origin), tuple(transform.OfVector(a) for a in solid.axes), solid.lo, solid.hi)
+
+
+class GeometryInstance(object):
+	def __init__(self, geometry):
+		self._geometry = geometry
+
+	def GetInstanceGeometry(self):
+		return GeometryElement(self._geometry)
+
+
+class BooleanOperationsType(enum.IntEnum):
+	Union = 0
+	Difference = 1
+	Intersect = 2
+
+
+class BooleanOperationsUtils(object):
+	# Объединение параллелепипедов поддерживается, только если один содержит другой
+	@staticmethod
+	def ExecuteBooleanOperation(solid0, solid1, operation):
+		_hit('ExecuteBooleanOperation')
+		if operation == BooleanOperationsType.Union:
+			if all(solid0.containsPoint(p) for p in solid1.corners()):
+				return solid0
+			if all(solid1.containsPoint(p) for p in solid0.corners()):
+				return solid1
+		raise RuntimeError('Boolean operation failed')
+
+
+class Options(object):
+	def __init__(self):
+		self.DetailLevel = ViewDetailLevel.Medium
+		self.ComputeReferences = False
+		self.IncludeNonVisibleObjects = False
+
+
+class SolidCurveIntersectionOptions(object):
+	pass
+
+
+class ViewDetailLevel(enum.IntEnum):
+	Undefined = 0
+	Coarse = 1
+	Medium = 2
+	Fine = 3
+
+
+# Идентификаторы, категории и параметры
+
+
+class ElementId(object):
+	__slots__ = ('IntegerValue',)
+
+	def __init__(self, value):
+		self.IntegerValue = int(value)
+
+	def __eq__(self, other):
+		return isinstance(other, ElementId) and other.IntegerValue == self.IntegerValue
+
+	def __ne__(self, other):
+		return not self == other
+
+	def __hash__(self):
+		return hash(self.IntegerValue)
+
+	def __repr__(self):
+		return 'ElementId(%d)' % self.IntegerValue
+
+
+ElementId.InvalidElementId = ElementId(-1)
+
+
+class BuiltInCategory(enum.IntEnum):
+	INVALID = -1
+	OST_Walls = -2000011
+	OST_Windows = -2000014
+	OST_Floors = -2000032
+	OST_Levels = -2000240
+	OST_GenericModel = -2000151
+	OST_RvtLinks = -2001352
+	OST_DuctCurves = -2008000
+	OST_PipeCurves = -2008044
+	OST_CableTray = -2008130
+	OST_Conduit = -2008132
+	OST_ShaftOpening = -2000996
+
+
+# Локализованные имена категорий (как в русской версии Revit)
+categoryNames = {
+	BuiltInCategory.OST_Walls: 'Стены',
+	BuiltInCategory.OST_Windows: 'Окна',
+	BuiltInCategory.OST_Floors: 'Перекрытия',
+	BuiltInCategory.OST_Levels: 'Уровни',
+	BuiltInCategory.OST_GenericModel: 'Обобщенные модели',
+	BuiltInCategory.OST_RvtLinks: 'Связанные файлы RVT',
+	BuiltInCategory.OST_DuctCurves: 'Воздуховоды',
+	BuiltInCategory.OST_PipeCurves: 'Трубы',
+	BuiltInCategory.OST_CableTray: 'Кабельные лотки',
+	BuiltInCategory.OST_Conduit: 'Короба',
+	BuiltInCategory.OST_ShaftOpening: 'Шахты',
+}
+
+
+class Category(object):
+	def __init__(self, bic):
+		self.Id = ElementId(int(bic))
+		self.Name = categoryNames.get(bic, bic.name)
+		self.BuiltInCategory = bic
+
+
+_categories = dict((bic, Category(bic)) for bic in BuiltInCategory)
+
+
+class _BuiltInParameterMeta(type):
+	# Любое имя встроенного параметра превращается в уникальный объект
+	def __getattr__(cls, name):
+		if name.startswith('_'):
+			raise AttributeError(name)
+		member = cls._members.get(name)
+		if member is None:
+			member = cls._members[name] = cls(name)
+		return member
+
+
+class BuiltInParameter(_BuiltInParameterMeta('BuiltInParameterBase', (object,), {})):
+	_members = {}
+
+	def __init__(self, name):
+		self.name = name
+
+	def __repr__(self):
+		return 'BuiltInParameter.%s' % self.name
+
+
+class StorageType(enum.IntEnum):
+	# Нумерация вне StorageType.None, которое в Python недопустимо как имя
+	Integer = 1
+	Double = 2
+	String = 3
+	ElementId = 4
+
+
+class Definition(object):
+	def __init__(self, name):
+		self.Name = name
+
+
+class Parameter(object):
+	def __init__(self, name, value, valueString=None):
+		self.Definition = Definition(name)
+		self._value = value
+		self._valueString = valueString
+		self.IsReadOnly = False
+
+	@property
+	def StorageType(self):
+		if isinstance(self._value, bool) or isinstance(self._value, int):
+			return StorageType.Integer
+		if isinstance(self._value, float):
+			return StorageType.Double
+		if isinstance(self._value, ElementId):
+			return StorageType.ElementId
+		return StorageType.String
+
+	@property
+	def HasValue(self):
+		return self._value is not None
+
+	def AsDouble(self):
+		return float(self._value or 0.0)
+
+	def AsInteger(self):
+		return int(self._value or 0)
+
+	def AsString(self):
+		return None if self._value is None else str(self._value)
+
+	def AsValueString(self):
+		return self._valueString if self._valueString is not None else self.AsString()
+
+	def AsElementId(self):
+		return self._value
+
+	def Set(self, value):
+		_hit('Parameter.Set')
+		self._value = value
+		return True
+
+
+# Элементы
+
+
+# Сквозная нумерация элементов всех документов (для уникальности VersionGuid)
+_serials = itertools.count(1)
+
+
+class Element(object):
+	_category = BuiltInCategory.INVALID
+
+	def __init__(self, doc, name=''):
+		self.Document = doc
+		self.Id = doc._nextId()
+		self.Name = name
+		self.Location = None
+		self.LevelId = ElementId.InvalidElementId
+		self._params = {}
+		self._bip = {}
+		self._solid = None
+		self._serial = next(_serials)
+		doc._add(self)
+
+	@property
+	def Category(self):
+		return _categories.get(self._category)
+
+	@property
+	def UniqueId(self):
+		return '%s-%08d' % (self.Document.Title, self.Id.IntegerValue)
+
+	# Версия меняется при любом изменении геометрии или параметров и уникальна между документами
+	@property
+	def VersionGuid(self):
+		state = []
+		if self._solid is not None:
+			state.append((repr(self._solid.origin), tuple(self._solid.lo), tuple(self._solid.hi)))
+		state.extend((key, repr(p._value)) for key, p in sorted(self._params.items()))
+		state.extend((str(key), repr(p._value)) for key, p in sorted(self._bip.items(), key=lambda item: str(item[0])))
+		return '%d-%x' % (self._serial, hash(tuple(state)) & 0xffffffffffff)
+
+	def get_Parameter(self, key):
+		_hit('get_Parameter')
+		if isinstance(key, Definition):
+			return self._params.get(key.Name)
+		return self._bip.get(key)
+
+	def GetTypeId(self):
+		return ElementId.InvalidElementId
+
+	def LookupParameter(self, name):
+		_hit('LookupParameter')
+		return self._params.get(name)
+
+	def GetParameters(self, name):
+		p = self._params.get(name)
+		return [p] if p else []
+
+	@property
+	def Parameters(self):
+		return list(self._params.values())
+
+	def get_Geometry(self, opt):
+		_hit('get_Geometry')
+		if self._solid is None:
+			return None
+		return GeometryElement([self._solid])
+
+	def get_BoundingBox(self, view):
+		_hit('get_BoundingBox')
+		if self._solid is not None:
+			return self._solid.boundingBox()
+		return None
+
+
+class ElementType(Element):
+	pass
+
+
+class Level(Element):
+	_category = BuiltInCategory.OST_Levels
+
+	def __init__(self, doc, name, elevation):
+		Element.__init__(self, doc, name)
+		self.Elevation = elevation
+		self.ProjectElevation = elevation
+
+
+class LocationCurve(object):
+	def __init__(self, curve):
+		self.Curve = curve
+
+
+class LocationPoint(object):
+	def __init__(self, point, rotation=0.0):
+		self.Point = point
+		self.Rotation = rotation
+
+
+class HostObject(Element):
+	_inserts = ()
+	_joined = ()
+
+	def FindInserts(self, addRectOpenings, includeShadows, includeEmbeddedWalls, includeSharedEmbeddedInserts):
+		_hit('FindInserts')
+		return [el.Id for el in self._inserts]
+
+
+# Эскиз плиты: Profile - список контуров, каждый контур - список отрезков. Эскизы хранятся отдельно
+# от элементов документа под отрицательными id, чтобы не сдвигать id элементов модели
+class Sketch(object):
+	def __init__(self, doc, elementId, loops):
+		self.Document = doc
+		self.Id = elementId
+		doc._sketches[elementId.IntegerValue] = self
+		# Как и в Revit, порядок и направление отрезков контура не гарантируются: нечётные отрезки
+		# переставлены в конец контура и развёрнуты
+		self.Profile = []
+		for loop in loops:
+			lines = [Line(loop[i], loop[(i + 1) % len(loop)]) for i in range(len(loop))]
+			self.Profile.append(lines[0::2] + [Line(line.GetEndPoint(1), line.GetEndPoint(0)) for line in lines[1::2]])
+
+
+class JoinGeometryUtils(object):
+	@staticmethod
+	def GetJoinedElements(doc, el):
+		_hit('GetJoinedElements')
+		return [other.Id for other in el._joined]
+
+
+class Wall(HostObject):
+	_category = BuiltInCategory.OST_Walls
+
+	def __init__(self, doc, p0, p1, width, baseZ, height, level):
+		Element.__init__(self, doc, 'Стена')
+		self.Width = width
+		self.Location = LocationCurve(Line(p0, p1))
+		self.LevelId = level.Id
+		self.Flipped = False
+		self.CurtainGrid = None
+		self.IsStackedWall = False
+		self.SketchId = ElementId.InvalidElementId
+		u = XYZ(p1.X - p0.X, p1.Y - p0.Y, 0).Normalize()
+		v = XYZ(-u.Y, u.X, 0)
+		length = XYZ(p1.X - p0.X, p1.Y - p0.Y, 0).GetLength()
+		self._solid = Solid(XYZ(p0.X, p0.Y, baseZ), (u, v, XYZ.BasisZ), (0.0, -width / 2, 0.0), (length, width / 2, height))
+		self._bip[BuiltInParameter.WALL_USER_HEIGHT_PARAM] = Parameter('Неприсоединённая высота', height)
+		self._bip[BuiltInParameter.WALL_BASE_OFFSET] = Parameter('Смещение снизу', baseZ - level.Elevation)
+		self._bip[BuiltInParameter.WALL_BASE_CONSTRAINT] = Parameter('Зависимость снизу', level.Id)
+		self._bip[BuiltInParameter.WALL_KEY_REF_PARAM] = Parameter('Линия привязки', 0)
+
+	@property
+	def Orientation(self):
+		return self._solid.axes[1]
+
+
+class Floor(HostObject):
+	_category = BuiltInCategory.OST_Floors
+
+	def __init__(self, doc, x0, y0, x1, y1, topZ, thickness, level):
+		Element.__init__(self, doc, 'Перекрытие')
+		self.LevelId = level.Id
+		self._solid = Solid(XYZ(0, 0, 0), (XYZ.BasisX, XYZ.BasisY, XYZ.BasisZ), (x0, y0, topZ - thickness), (x1, y1, topZ))
+		self.SketchId = Sketch(doc, ElementId(-self.Id.IntegerValue), [[XYZ(x0, y0, topZ), XYZ(x1, y0, topZ), XYZ(x1, y1, topZ), XYZ(x0, y1, topZ)]]).Id
+		self._bip[BuiltInParameter.FLOOR_ATTR_THICKNESS_PARAM] = Parameter('Толщина', thickness)
+		self._bip[BuiltInParameter.FLOOR_HEIGHTABOVELEVEL_PARAM] = Parameter('Смещение от уровня', topZ - level.Elevation)
+		self._bip[BuiltInParameter.LEVEL_PARAM] = Parameter('Уровень', level.Id)
+
+
+class MEPCurve(Element):
+	def __init__(self, doc, bic, p0, p1, width, height, sideNormal=None):
+		self._category = bic
+		Element.__init__(self, doc, categoryNames[bic])
+		self.Location = LocationCurve(Line(p0, p1))
+		self._width = width
+		self._height = height
+		# Ориентация сечения: нормаль к боковой грани
+		u = (p1 - p0).Normalize()
+		if sideNormal is None:
+			sideNormal = XYZ(-u.Y, u.X, 0).Normalize() if abs(u.Z) < 0.999 else XYZ.BasisX
+		w = u.CrossProduct(sideNormal)
+		length = p0.DistanceTo(p1)
+		self._solid = Solid(p0, (u, sideNormal, w), (0.0, -width / 2, -height / 2), (length, width / 2, height / 2))
+
+	# Соединители на концах (форма сечения - по категории и семейству, как в MepSnapshot.sectionSizes)
+	@property
+	def ConnectorManager(self):
+		_hit('ConnectorManager')
+		family = self._bip.get(BuiltInParameter.ELEM_FAMILY_PARAM)
+		if self._category == BuiltInCategory.OST_CableTray or (family is not None and family._value == 'Воздуховод прямоугольного сечения'):
+			shape = ConnectorProfileType.Rectangular
+		elif family is not None and family._value == 'Воздуховод овального сечения':
+			shape = ConnectorProfileType.Oval
+		else:
+			shape = ConnectorProfileType.Round
+		u, side, w = self._solid.axes
+		p0 = self.Location.Curve.GetEndPoint(0)
+		p1 = self.Location.Curve.GetEndPoint(1)
+		return ConnectorManager([Connector(shape, p0, side * -1, w, u * -1), Connector(shape, p1, side, w, u)])
+
+	@property
+	def Diameter(self):
+		return self._width
+
+	@property
+	def Width(self):
+		return self._width
+
+	@property
+	def Height(self):
+		return self._height
+
+
+class ConnectorProfileType(enum.IntEnum):
+	Invalid = -1
+	Round = 0
+	Rectangular = 1
+	Oval = 2
+
+
+class Connector(object):
+	# Соединитель на конце коммуникации: ось Z направлена из элемента, ширина сечения - по оси X, высота - по оси Y
+	def __init__(self, shape, origin, basisX, basisY, basisZ):
+		self.Shape = shape
+		self.Origin = origin
+		self.CoordinateSystem = Transform(origin)
+		self.CoordinateSystem.BasisX = basisX
+		self.CoordinateSystem.BasisY = basisY
+		self.CoordinateSystem.BasisZ = basisZ
+
+
+class ConnectorManager(object):
+	def __init__(self, connectors):
+		self.Connectors = connectors
+
+
+class FamilySymbol(ElementType):
+	def __init__(self, doc, familyName, name, bic, paramNames):
+		self._category = bic
+		Element.__init__(self, doc, name)
+		self.FamilyName = familyName
+		self.Family = types.SimpleNamespace(Name=familyName)
+		self.IsActive = False
+		self.paramNames = list(paramNames)
+
+	def Activate(self):
+		self.IsActive = True
+
+
+class FamilyInstance(Element):
+	def __init__(self, doc, symbol, point, host, level, direction):
+		self._category = symbol._category
+		Element.__init__(self, doc, symbol.Name)
+		self.Symbol = symbol
+		self.Host = host
+		self.LevelId = level.Id if level is not None else ElementId.InvalidElementId
+		self.Location = LocationPoint(point)
+		self.FacingOrientation = direction or XYZ.BasisY
+		for name in symbol.paramNames:
+			self._params[name] = Parameter(name, None)
+
+	def GetTypeId(self):
+		return self.Symbol.Id
+
+	def get_BoundingBox(self, view):
+		_hit('get_BoundingBox')
+		p = self.Location.Point
+		r = max(self._params.get('Ширина проёма', Parameter('', 0.0)).AsDouble(), self._params.get('Диаметр проёма', Parameter('', 0.0)).AsDouble(), 0.1) / 2
+		return BoundingBoxXYZ(XYZ(p.X - r, p.Y - r, p.Z - r), XYZ(p.X + r, p.Y + r, p.Z + r))
+
+
+class RevitLinkInstance(Element):
+	def __init__(self, doc, linkDoc, name, transform=None):
+		Element.__init__(self, doc, name)
+		self._linkDoc = linkDoc
+		self._transform = transform or Transform.Identity
+
+	def GetLinkDocument(self):
+		return self._linkDoc
+
+	def GetTotalTransform(self):
+		return self._transform
+
+	def GetTotalTransform(self):
+		return self._transform
+
+
+# Документ
+
+
+class FamilyInstanceCreationData(object):
+	# Перегрузки: (точка, тип, направление, основа, тип конструкции) и (точка, тип, основа, уровень, тип конструкции)
+	def __init__(self, point, symbol, third, fourth, structuralType):
+		self.args = (point, symbol, third, fourth, structuralType)
+
+
+class ItemFactory(object):
+	def __init__(self, doc):
+		self._doc = doc
+
+	def NewFamilyInstances2(self, dataList):
+		_hit('NewFamilyInstances2')
+		# Пакет отклоняется целиком, если хотя бы один типоразмер не активирован
+		for data in dataList:
+			if not data.args[1].IsActive:
+				raise Exception('Типоразмер семейства не активирован')
+		ids = []
+		for data in dataList:
+			point, symbol, third, fourth, structuralType = data.args
+			if isinstance(third, XYZ):
+				el = FamilyInstance(self._doc, symbol, point, fourth, fourth if isinstance(fourth, Level) else None, third)
+			else:
+				el = FamilyInstance(self._doc, symbol, point, third, fourth, None)
+			ids.append(el.Id)
+		return ids
+
+	def NewFamilyInstance(self, point, symbol, third, fourth, structuralType):
+		_hit('NewFamilyInstance')
+		if not symbol.IsActive:
+			raise Exception('Типоразмер семейства не активирован')
+		# Перегрузки: (точка, тип, направление, основа, тип конструкции) и (точка, тип, основа, уровень, тип конструкции)
+		if isinstance(third, XYZ):
+			direction, host = third, fourth
+			level = fourth if isinstance(fourth, Level) else None
+		else:
+			direction, host, level = None, third, fourth
+		return FamilyInstance(self._doc, symbol, point, host, level, direction)
+
+
+class Document(object):
+	def __init__(self, title='Модель'):
+		self.Title = title
+		self.PathName = 'C:\\Models\\%s.rvt' % title
+		self.IsLinked = False
+		self.elements = collections.OrderedDict()
+		self._sketches = {}
+		self._lastId = 100000
+		self.Create = ItemFactory(self)
+		self.IsValidObject = True
+
+	def _nextId(self):
+		self._lastId += 1
+		return ElementId(self._lastId)
+
+	def _add(self, el):
+		self.elements[el.Id.IntegerValue] = el
+
+	def GetElement(self, elementId):
+		_hit('GetElement')
+		if isinstance(elementId, ElementId):
+			elementId = elementId.IntegerValue
+		if elementId < -1:
+			return self._sketches.get(elementId)
+		return self.elements.get(elementId)
+
+	def Delete(self, elementId):
+		_hit('Delete')
+		self.elements.pop(elementId.IntegerValue, None)
+
+	def Regenerate(self):
+		_hit('Regenerate')
+
+	def Equals(self, other):
+		return self is other
+
+	# Перезагрузка связанного файла: новый экземпляр документа с теми же элементами, прежний становится недействительным
+	def reload(self):
+		doc = copy.copy(self)
+		doc.Create = ItemFactory(doc)
+		self.IsValidObject = False
+		return doc
+
+
+class ElementTransformUtils(object):
+	@staticmethod
+	def RotateElement(doc, elementId, axis, angle):
+		_hit('RotateElement')
+		el = doc.GetElement(elementId)
+		el.Location.Rotation += angle
+
+
+# Фильтры
+
+
+class ElementFilter(object):
+	def PassesElement(self, el):
+		raise NotImplementedError
+
+
+class ElementMulticategoryFilter(ElementFilter):
+	def __init__(self, cats):
+		self._ids = set(int(c) for c in cats)
+
+	def PassesElement(self, el):
+		return el.Category is not None and el.Category.Id.IntegerValue in self._ids
+
+
+class ElementCategoryFilter(ElementFilter):
+	def __init__(self, cat):
+		self._id = int(cat)
+
+	def PassesElement(self, el):
+		return el.Category is not None and el.Category.Id.IntegerValue == self._id
+
+
+class ElementIntersectsSolidFilter(ElementFilter):
+	# Медленный фильтр: коммуникации проверяются по осевой линии, экземпляры семейств - по точке вставки
+	def __init__(self, solid):
+		_hit('ElementIntersectsSolidFilter')
+		self._solid = solid
+
+	def PassesElement(self, el):
+		_hit('SolidFilterCheck')
+		loc = el.Location
+		if isinstance(loc, LocationCurve):
+			return self._solid.clip(loc.Curve.GetEndPoint(0), loc.Curve.GetEndPoint(1)) is not None
+		if isinstance(loc, LocationPoint):
+			return self._solid.containsPoint(loc.Point, 1e-3)
+		return False
+
+
+class BoundingBoxIntersectsFilter(ElementFilter):
+	def __init__(self, outline):
+		self._outline = outline
+
+	def PassesElement(self, el):
+		bb = el.get_BoundingBox(None)
+		if bb is None:
+			return False
+		o = self._outline
+		return not (bb.Min.X > o.MaximumPoint.X or bb.Max.X < o.MinimumPoint.X or bb.Min.Y > o.MaximumPoint.Y or bb.Max.Y < o.MinimumPoint.Y or bb.Min.Z > o.MaximumPoint.Z or bb.Max.Z < o.MinimumPoint.Z)
+
+
+class Outline(object):
+	def __init__(self, pMin, pMax):
+		self.MinimumPoint = pMin
+		self.MaximumPoint = pMax
+
+
+class FilteredElementCollector(object):
+	def __init__(self, doc, ids=None):
+		_hit('FilteredElementCollector')
+		if ids is not None and len(ids) == 0:
+			raise Exception('Пустой набор идентификаторов для FilteredElementCollector')
+		self._doc = doc
+		self._ids = ids
+		self._filters = []
+
+	def _add(self, check):
+		self._filters.append(check)
+		return self
+
+	def OfClass(self, cls):
+		return self._add(lambda el: isinstance(el, cls))
+
+	def OfCategory(self, cat):
+		value = int(cat)
+		return self._add(lambda el: el.Category is not None and el.Category.Id.IntegerValue == value)
+
+	def OfCategoryId(self, catId):
+		return self.OfCategory(catId.IntegerValue)
+
+	def WhereElementIsNotElementType(self):
+		return self._add(lambda el: not isinstance(el, ElementType))
+
+	def WhereElementIsElementType(self):
+		return self._add(lambda el: isinstance(el, ElementType))
+
+	def WherePasses(self, elementFilter):
+		return self._add(elementFilter.PassesElement)
+
+	def __iter__(self):
+		_hit('CollectorEnumerate')
+		if self._ids is None:
+			source = list(self._doc.elements.values())
+		else:
+			source = [self._doc.elements.get(i.IntegerValue) for i in self._ids]
+		for el in source:
+			if el is None:
+				continue
+			if all(check(el) for check in self._filters):
+				yield el
+
+	def ToElements(self):
+		return list(self)
+
+	def ToElementIds(self):
+		return [el.Id for el in self]
+
+	def GetElementCount(self):
+		return sum(1 for el in self)
+
+	def FirstElement(self):
+		for el in self:
+			return el
+		return None
+
+
+# Транзакции
+
+
+class TransactionStatus(enum.IntEnum):
+	Uninitialized = 0
+	Started = 1
+	RolledBack = 2
+	Committed = 3
+
+
+class Transaction(object):
+	def __init__(self, doc, name=''):
+		self._doc = doc
+		self.name = name
+		self._status = TransactionStatus.Uninitialized
+
+	def Start(self):
+		_hit('Transaction.Start')
+		self._status = TransactionStatus.Started
+		return self._status
+
+	def Commit(self):
+		_hit('Transaction.Commit')
+		self._status = TransactionStatus.Committed
+		return self._status
+
+	def RollBack(self):
+		self._status = TransactionStatus.RolledBack
+		return self._status
+
+	def GetStatus(self):
+		return self._status
+
+
+class TransactionGroup(Transaction):
+	def Assimilate(self):
+		_hit('TransactionGroup.Assimilate')
+		self._status = TransactionStatus.Committed
+		return self._status
+
+
+class _TransactionManager(object):
+	def __init__(self):
+		self.depth = 0
+
+	def EnsureInTransaction(self, doc):
+		_hit('EnsureInTransaction')
+		self.depth = 1
+
+	def TransactionTaskDone(self):
+		_hit('TransactionTaskDone')
+		self.depth = 0
+
+	def ForceCloseTransaction(self):
+		_hit('ForceCloseTransaction')
+		self.depth = 0
+
+
+class TransactionManager(object):
+	Instance = _TransactionManager()
+
+
+class _DocumentManager(object):
+	def __init__(self):
+		self.CurrentDBDocument = None
+		self.CurrentUIApplication = types.SimpleNamespace(ActiveUIDocument=None)
+
+
+class DocumentManager(object):
+	Instance = _DocumentManager()
+
+
+# Обобщённые коллекции .NET (List[T](...))
+
+
+class _GenericList(object):
+	def __getitem__(self, itemType):
+		return list
+
+
+# Установка заменителя
+
+
+class StructuralType(enum.IntEnum):
+	NonStructural = 0
+	Beam = 1
+	Column = 3
+
+
+def _module(name, attrs):
+	module = types.ModuleType(name)
+	for key, value in attrs.items():
+		if not key.startswith('_'):
+			setattr(module, key, value)
+	sys.modules[name] = module
+	return module
+
+
+# Регистрация модулей clr, Autodesk.Revit.DB, RevitServices и System в sys.modules
+def install(doc):
+	ns = globals()
+	dbNames = ['XYZ', 'Line', 'BoundingBoxXYZ', 'Transform', 'PlanarFace', 'Solid', 'GeometryElement', 'SolidUtils', 'GeometryInstance', 'BooleanOperationsType', 'BooleanOperationsUtils', 'Options', 'SolidCurveIntersectionOptions',
+		'ViewDetailLevel', 'ElementId', 'BuiltInCategory', 'Category', 'BuiltInParameter', 'StorageType', 'Definition', 'Parameter', 'Element',
+		'ElementType', 'Level', 'LocationCurve', 'LocationPoint', 'HostObject', 'Sketch', 'JoinGeometryUtils', 'Wall', 'Floor', 'MEPCurve', 'ConnectorProfileType', 'Connector', 'ConnectorManager', 'FamilySymbol', 'FamilyInstance',
+		'RevitLinkInstance', 'Document', 'ElementTransformUtils', 'ElementFilter', 'ElementMulticategoryFilter', 'ElementCategoryFilter',
+		'ElementIntersectsSolidFilter', 'BoundingBoxIntersectsFilter', 'Outline', 'FilteredElementCollector', 'Transaction', 'TransactionGroup',
+		'TransactionStatus']
+	db = _module('Autodesk.Revit.DB', dict((name, ns[name]) for name in dbNames))
+	structure = _module('Autodesk.Revit.DB.Structure', {'StructuralType': StructuralType})
+	db.Structure = structure
+	creation = _module('Autodesk.Revit.Creation', {'FamilyInstanceCreationData': FamilyInstanceCreationData})
+	revit = _module('Autodesk.Revit', {'DB': db, 'Creation': creation})
+	_module('Autodesk', {'Revit': revit})
+	persistence = _module('RevitServices.Persistence', {'DocumentManager': DocumentManager})
+	transactions = _module('RevitServices.Transactions', {'TransactionManager': TransactionManager})
+	_module('RevitServices', {'Persistence': persistence, 'Transactions': transactions})
+	generic = _module('System.Collections.Generic', {'List': _GenericList()})
+	collections_ = _module('System.Collections', {'Generic': generic})
+	_module('System', {'Collections': collections_})
+	_module('clr', {'AddReference': lambda name: None})
+	DocumentManager.Instance.CurrentDBDocument = doc
+	DocumentManager.Instance.CurrentUIApplication = types.SimpleNamespace(ActiveUIDocument=types.SimpleNamespace(Document=doc))
+	TransactionManager.Instance.depth = 0
+	resetCalls()
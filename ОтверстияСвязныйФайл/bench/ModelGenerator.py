@@ -0,0 +1,195 @@
+# Генератор синтетических моделей для заменителя Revit API
+# Здание из нескольких этажей: стены по сетке, плиты перекрытий, горизонтальные коммуникации и стояки
+import math
+import random
+
+import FakeRevit
+from FakeRevit import XYZ, BuiltInCategory, BuiltInParameter, Parameter
+
+MM = 304.8
+
+# Имена параметров семейств заглушек и проёмов
+capParams = ['Ширина проёма', 'Высота проёма', 'Диаметр проёма', 'Дисциплина проёма', 'Глубина проёма', 'Дата', 'Принято']
+capParamsF = capParams + ['Поворот X', 'Поворот Y']
+openParams = ['Ширина проёма', 'Высота проёма', 'Диаметр проёма', 'Дисциплина проёма', 'Глубина проёма', 'Дата']
+
+
+class Model(object):
+	# Результат генерации: документ(ы) и типоразмеры, которые подаются на входы скриптов
+	def __init__(self, doc):
+		self.doc = doc
+		self.hostDoc = doc
+		self.links = []
+		self.mepLinks = []
+		self.walls = []
+		self.floors = []
+		self.meps = []
+		self.caps = []
+		self.levels = []
+		self.symbols = {}
+
+
+# Типоразмеры заглушек и отверстий. Как в проектах, круглый и прямоугольный типоразмеры лежат в одном семействе,
+# а имена типоразмеров отличаются от имени семейства
+def _symbols(doc):
+	symbols = {}
+	symbols['capRect'] = FakeRevit.FamilySymbol(doc, 'Заглушки_Стена', 'Заглушка прямоугольная', BuiltInCategory.OST_Windows, capParams)
+	symbols['capRound'] = FakeRevit.FamilySymbol(doc, 'Заглушки_Стена', 'Заглушка круглая', BuiltInCategory.OST_Windows, capParams)
+	symbols['capRectF'] = FakeRevit.FamilySymbol(doc, 'Заглушки_Плита', 'Заглушка прямоугольная для плиты', BuiltInCategory.OST_Windows, capParamsF)
+	symbols['capRoundF'] = FakeRevit.FamilySymbol(doc, 'Заглушки_Плита', 'Заглушка круглая для плиты', BuiltInCategory.OST_Windows, capParamsF)
+	symbols['openRect'] = FakeRevit.FamilySymbol(doc, 'Отверстия_Стена', 'Отверстие_Прямоуг_Стена', BuiltInCategory.OST_GenericModel, openParams)
+	symbols['openRound'] = FakeRevit.FamilySymbol(doc, 'Отверстия_Стена', 'Отверстие_Круглое_Стена', BuiltInCategory.OST_GenericModel, openParams)
+	symbols['openRectF'] = FakeRevit.FamilySymbol(doc, 'Отверстия_Перекр', 'Отверстие_Прямоуг_Перекр', BuiltInCategory.OST_GenericModel, openParams)
+	symbols['openRoundF'] = FakeRevit.FamilySymbol(doc, 'Отверстия_Перекр', 'Отверстие_Круглое_Перекр', BuiltInCategory.OST_GenericModel, openParams)
+	# Типоразмеры отверстий уже используются в проекте и активированы
+	for key in ('openRect', 'openRound', 'openRectF', 'openRoundF'):
+		symbols[key].IsActive = True
+	return symbols
+
+
+# Создание коммуникации заданной категории с параметрами сечения
+def _mep(doc, rnd, kind, p0, p1):
+	if kind == 0:
+		diam = rnd.choice([32, 50, 110, 160]) / MM
+		el = FakeRevit.MEPCurve(doc, BuiltInCategory.OST_PipeCurves, p0, p1, diam, diam)
+		el._bip[BuiltInParameter.RBS_PIPE_OUTER_DIAMETER] = Parameter('Внешний диаметр', diam)
+	elif kind == 1:
+		if rnd.random() < 0.4:
+			diam = rnd.choice([125, 200, 315]) / MM
+			el = FakeRevit.MEPCurve(doc, BuiltInCategory.OST_DuctCurves, p0, p1, diam, diam)
+			el._bip[BuiltInParameter.ELEM_FAMILY_PARAM] = Parameter('Семейство', 'Воздуховод круглого сечения')
+			el._bip[BuiltInParameter.RBS_CURVE_DIAMETER_PARAM] = Parameter('Диаметр', diam)
+		else:
+			width = rnd.choice([300, 400, 600]) / MM
+			height = rnd.choice([200, 300]) / MM
+			el = FakeRevit.MEPCurve(doc, BuiltInCategory.OST_DuctCurves, p0, p1, width, height)
+			el._bip[BuiltInParameter.ELEM_FAMILY_PARAM] = Parameter('Семейство', 'Воздуховод прямоугольного сечения')
+			el._bip[BuiltInParameter.RBS_CURVE_WIDTH_PARAM] = Parameter('Ширина', width)
+			el._bip[BuiltInParameter.RBS_CURVE_HEIGHT_PARAM] = Parameter('Высота', height)
+	elif kind == 2:
+		diam = rnd.choice([20, 25, 32]) / MM
+		el = FakeRevit.MEPCurve(doc, BuiltInCategory.OST_Conduit, p0, p1, diam, diam)
+		el._bip[BuiltInParameter.RBS_CONDUIT_DIAMETER_PARAM] = Parameter('Внешний диаметр', diam)
+	else:
+		width = rnd.choice([200, 300, 400]) / MM
+		height = rnd.choice([50, 100]) / MM
+		el = FakeRevit.MEPCurve(doc, BuiltInCategory.OST_CableTray, p0, p1, width, height)
+		el._bip[BuiltInParameter.RBS_CABLETRAY_WIDTH_PARAM] = Parameter('Ширина', width)
+		el._bip[BuiltInParameter.RBS_CABLETRAY_HEIGHT_PARAM] = Parameter('Высота', height)
+	return el
+
+
+# Генерация модели: walls стен, floors плит, meps коммуникаций, caps заглушек.
+# При hostsInLink основы помещаются в связанный файл с именем linkName (как в режиме isLink).
+# При заданных mepLinks коммуникации распределяются по категориям между связанными файлами с этими именами,
+# размещёнными со смещением (как отдельные модели ОВ, ВК и ЭОМ)
+def generateModel(walls=100, floors=10, meps=1000, caps=0, storeys=None, seed=0, hostsInLink=False, linkName='АР', mepLinks=()):
+	rnd = random.Random(seed)
+	doc = FakeRevit.Document('Модель')
+	model = Model(doc)
+	model.symbols = _symbols(doc)
+	hostDoc = doc
+	if hostsInLink:
+		hostDoc = FakeRevit.Document(linkName)
+		hostDoc.IsLinked = True
+		model.links.append(FakeRevit.RevitLinkInstance(doc, hostDoc, '%s.rvt : 1 : позиция <Не общедоступное>' % linkName))
+	model.hostDoc = hostDoc
+	for i, name in enumerate(mepLinks):
+		mepDoc = FakeRevit.Document(name)
+		mepDoc.IsLinked = True
+		shift = FakeRevit.Transform(XYZ(1000 * (i + 1) / MM, -500 * (i + 1) / MM, 0))
+		model.mepLinks.append(FakeRevit.RevitLinkInstance(doc, mepDoc, '%s.rvt : 1 : позиция <Не общедоступное>' % name, shift))
+
+	# Этажи и уровни
+	storeyHeight = 3000 / MM
+	size = 100000 / MM
+	if storeys is None:
+		storeys = max(1, min(30, floors or 1))
+	for s in range(storeys):
+		model.levels.append(FakeRevit.Level(hostDoc, 'Этаж %02d' % (s + 1), s * storeyHeight))
+		if hostDoc is not doc:
+			FakeRevit.Level(doc, 'Этаж %02d' % (s + 1), s * storeyHeight)
+
+	# Плиты: на каждом этаже плита разбивается в плане на одинаковые участки
+	perStorey = max(1, -(-floors // storeys)) if floors else 0
+	tiles = 1
+	while tiles * tiles < perStorey:
+		tiles += 1
+	step = size / tiles
+	thickness = 220 / MM
+	for n in range(floors):
+		s = n % storeys
+		t = n // storeys
+		x0 = (t % tiles) * step; y0 = (t // tiles) * step
+		level = model.levels[s]
+		model.floors.append(FakeRevit.Floor(hostDoc, x0, y0, x0 + step, y0 + step, level.Elevation, thickness, level))
+
+	# Стены: отрезки вдоль осей X или Y внутри пятна здания
+	for n in range(walls):
+		level = model.levels[n % storeys]
+		length = rnd.uniform(4000, 15000) / MM
+		x = rnd.uniform(0, size - length); y = rnd.uniform(0, size)
+		if rnd.random() < 0.5:
+			p0 = XYZ(x, y, level.Elevation); p1 = XYZ(x + length, y, level.Elevation)
+		else:
+			p0 = XYZ(y, x, level.Elevation); p1 = XYZ(y, x + length, level.Elevation)
+		width = rnd.choice([120, 200, 250, 380]) / MM
+		model.walls.append(FakeRevit.Wall(hostDoc, p0, p1, width, level.Elevation, storeyHeight - thickness, level))
+
+	# Коммуникации: горизонтальные участки (пересекают стены) и стояки (пересекают плиты)
+	for n in range(meps):
+		kind = rnd.randrange(4)
+		if rnd.random() < 0.7 or storeys < 2:
+			s = rnd.randrange(storeys)
+			z = s * storeyHeight + rnd.uniform(1800, 2500) / MM
+			length = rnd.uniform(3000, 20000) / MM
+			x = rnd.uniform(0, size - length); y = rnd.uniform(0, size)
+			if rnd.random() < 0.5:
+				p0 = XYZ(x, y, z); p1 = XYZ(x + length, y, z)
+			else:
+				p0 = XYZ(y, x, z); p1 = XYZ(y, x + length, z)
+		else:
+			s0 = rnd.randrange(storeys - 1)
+			s1 = min(storeys, s0 + rnd.randint(1, 4))
+			x = rnd.uniform(0, size); y = rnd.uniform(0, size)
+			p0 = XYZ(x, y, s0 * storeyHeight + 500 / MM); p1 = XYZ(x, y, s1 * storeyHeight - 500 / MM + storeyHeight / 2)
+		if model.mepLinks:
+			# Коммуникация создаётся в связанном файле своей дисциплины в его системе координат
+			link = model.mepLinks[kind % len(model.mepLinks)]
+			inverse = link.GetTotalTransform().Inverse
+			model.meps.append(_mep(link.GetLinkDocument(), rnd, kind, inverse.OfPoint(p0), inverse.OfPoint(p1)))
+		else:
+			model.meps.append(_mep(doc, rnd, kind, p0, p1))
+
+	# Заглушки, выданные ранее: половина в стенах, половина в плитах, часть принята
+	symbols = model.symbols
+	for n in range(caps):
+		if model.walls and (n % 2 == 0 or not model.floors):
+			host = rnd.choice(model.walls)
+			curve = host.Location.Curve
+			point = curve.Evaluate(rnd.uniform(0.1, 0.9), True)
+			point = XYZ(point.X, point.Y, point.Z + rnd.uniform(1000, 2000) / MM)
+			symbol = symbols['capRound'] if rnd.random() < 0.5 else symbols['capRect']
+		elif model.floors:
+			host = rnd.choice(model.floors)
+			bb = host.get_BoundingBox(None)
+			point = XYZ(rnd.uniform(bb.Min.X, bb.Max.X), rnd.uniform(bb.Min.Y, bb.Max.Y), (bb.Min.Z + bb.Max.Z) / 2)
+			symbol = symbols['capRoundF'] if rnd.random() < 0.5 else symbols['capRectF']
+		else:
+			break
+		cap = FakeRevit.FamilyInstance(doc, symbol, point, None, doc.GetElement(host.LevelId) or model.levels[0], None)
+		cap._params['Ширина проёма']._value = 300 / MM
+		cap._params['Высота проёма']._value = 200 / MM
+		cap._params['Диаметр проёма']._value = 150 / MM
+		cap._params['Глубина проёма']._value = 220 / MM
+		cap._params['Дисциплина проёма']._value = 'Трубы'
+		cap._params['Дата']._value = '2026-01-01'
+		cap._params['Принято']._value = 1 if rnd.random() < 0.7 else 0
+		if 'Поворот X' in cap._params:
+			angle = rnd.uniform(0, 3.14159)
+			cap._params['Поворот X']._value = math.cos(angle)
+			cap._params['Поворот Y']._value = math.sin(angle)
+		model.caps.append(cap)
+
+	FakeRevit.resetCalls()
+	return model
@@ -0,0 +1,42 @@
+# Проверка объединения соседних проёмов одной основы (Clustering)
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import Clustering
+
+MM = Clustering.MM
+
+
+class ClustersTest(unittest.TestCase):
+	def test_mergeWithinGap(self):
+		rects = [Clustering.rect(0.0, 0.0, 1.0, 1.0), Clustering.rect(1.05, 0.0, 1.0, 1.0), Clustering.rect(3.0, 0.0, 1.0, 1.0)]
+		self.assertEqual(Clustering.clusters(rects, [1, 1, 1], 0.1), [[0, 1], [2]])
+		self.assertEqual(Clustering.clusters(rects, [1, 1, 1], 0.01), [[0], [1], [2]])
+		self.assertEqual(Clustering.clusters(rects, [1, 1, 1], 1.0), [[0, 1, 2]])
+
+	def test_chain(self):
+		rects = [Clustering.rect(u, 0.0, 1.0, 1.0) for u in (5.0, 0.0, 2.1, 1.05, 3.15)]
+		self.assertEqual(Clustering.clusters(rects, [1] * 5, 0.1), [[0], [1, 2, 3, 4]])
+
+	def test_separateHosts(self):
+		rects = [Clustering.rect(0.0, 0.0, 1.0, 1.0), Clustering.rect(0.5, 0.0, 1.0, 1.0)]
+		self.assertEqual(Clustering.clusters(rects, [1, 2], 0.1), [[0], [1]])
+
+	def test_empty(self):
+		self.assertEqual(Clustering.clusters([], [], 0.1), [])
+
+	def test_ceilSize(self):
+		self.assertAlmostEqual(Clustering.ceilSize(121.0 / MM) * MM, 130.0)
+		self.assertAlmostEqual(Clustering.ceilSize(120.0 / MM) * MM, 120.0)
+
+	def test_rotatedRect(self):
+		u0, v0, u1, v1 = Clustering.rotatedRect(0.0, 0.0, 2.0, 1.0, 0.0, 1.0)
+		self.assertAlmostEqual(u1 - u0, 1.0)
+		self.assertAlmostEqual(v1 - v0, 2.0)
+
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,119 @@
+# Проверка аналитического пересечения осей коммуникаций с простыми основами (Intersection)
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import Intersection
+
+# Стена вдоль оси X длиной 10, толщиной 0.5, от отметки 0 до 3
+START = (0.0, 0.0, 0.0)
+END = (10.0, 0.0, 0.0)
+THICKNESS = 0.5
+
+# L-образная плита: квадрат 10 x 10 без угла (5..10, 5..10). Стороны перемешаны и часть из них развёрнута,
+# как у линий эскиза в Revit
+L_EDGES = [((10.0, 0.0), (10.0, 5.0)), ((0.0, 10.0), (0.0, 0.0)), ((5.0, 5.0), (5.0, 10.0)),
+	((10.0, 0.0), (0.0, 0.0)), ((5.0, 10.0), (0.0, 10.0)), ((10.0, 5.0), (5.0, 5.0))]
+FLOOR_BOX = ((0.0, 0.0, 0.0), (10.0, 10.0, 1.0))
+
+
+class PointsTest(unittest.TestCase):
+	def assertPoint(self, p, q):
+		for a, b in zip(p, q):
+			self.assertAlmostEqual(a, b)
+
+
+class WallSegmentTest(PointsTest):
+	def test_perpendicular(self):
+		a, b = Intersection.wallSegment((5.0, -2.0, 1.0), (5.0, 2.0, 1.0), START, END, THICKNESS, 0.0, 3.0)
+		self.assertPoint(a, (5.0, -0.25, 1.0))
+		self.assertPoint(b, (5.0, 0.25, 1.0))
+
+	def test_oblique(self):
+		a, b = Intersection.wallSegment((3.0, -2.0, 1.0), (7.0, 2.0, 2.0), START, END, THICKNESS, 0.0, 3.0)
+		self.assertPoint(a, (4.75, -0.25, 1.4375))
+		self.assertPoint(b, (5.25, 0.25, 1.5625))
+
+	def test_nearWallEnd(self):
+		self.assertIsNone(Intersection.wallSegment((0.3, -2.0, 1.0), (0.3, 2.0, 1.0), START, END, THICKNESS, 0.0, 3.0))
+		self.assertIsNotNone(Intersection.wallSpan((0.3, -2.0, 1.0), (0.3, 2.0, 1.0), START, END, THICKNESS, 0.0, 3.0))
+
+	def test_parallel(self):
+		self.assertIsNone(Intersection.wallSegment((1.0, 0.1, 1.0), (9.0, 0.1, 1.0), START, END, THICKNESS, 0.0, 3.0))
+
+	def test_miss(self):
+		self.assertIsNone(Intersection.wallSegment((5.0, 1.0, 1.0), (5.0, 2.0, 1.0), START, END, THICKNESS, 0.0, 3.0))
+		self.assertIsNone(Intersection.wallSpan((5.0, -2.0, 4.0), (5.0, 2.0, 4.0), START, END, THICKNESS, 0.0, 3.0))
+
+
+class FloorSegmentTest(PointsTest):
+	def test_vertical(self):
+		a, b = Intersection.floorSegment((2.0, 3.0, -1.0), (2.0, 3.0, 5.0), 0.0, 1.0, (0.0, 0.0), (10.0, 10.0))
+		self.assertPoint(a, (2.0, 3.0, 0.0))
+		self.assertPoint(b, (2.0, 3.0, 1.0))
+
+	def test_downwards(self):
+		a, b = Intersection.floorSegment((2.0, 3.0, 5.0), (2.0, 3.0, -1.0), 0.0, 1.0, (0.0, 0.0), (10.0, 10.0))
+		self.assertPoint(a, (2.0, 3.0, 1.0))
+		self.assertPoint(b, (2.0, 3.0, 0.0))
+
+	def test_outsidePlan(self):
+		self.assertIsNone(Intersection.floorSegment((9.5, 3.0, -1.0), (10.5, 3.0, 2.0), 0.0, 1.0, (0.0, 0.0), (10.0, 10.0)))
+		self.assertIsNotNone(Intersection.floorSpan((9.5, 3.0, -1.0), (10.5, 3.0, 2.0), 0.0, 1.0, (0.0, 0.0), (10.0, 10.0)))
+
+	def test_horizontal(self):
+		self.assertIsNone(Intersection.floorSegment((1.0, 1.0, 0.5), (9.0, 1.0, 0.5), 0.0, 1.0, (0.0, 0.0), (10.0, 10.0)))
+
+
+class OutlineTest(PointsTest):
+	def test_inOutline(self):
+		self.assertTrue(Intersection.inOutline(L_EDGES, (2.0, 2.0)))
+		self.assertTrue(Intersection.inOutline(L_EDGES, (7.0, 2.0)))
+		self.assertTrue(Intersection.inOutline(L_EDGES, (2.0, 7.0)))
+		self.assertFalse(Intersection.inOutline(L_EDGES, (7.0, 7.0)))
+		self.assertFalse(Intersection.inOutline(L_EDGES, (12.0, 2.0)))
+
+	def test_innerLoop(self):
+		hole = [((4.0, 1.0), (4.0, 3.0)), ((6.0, 3.0), (6.0, 1.0)), ((4.0, 3.0), (6.0, 3.0)), ((4.0, 1.0), (6.0, 1.0))]
+		self.assertFalse(Intersection.inOutline(L_EDGES + hole, (5.0, 2.0)))
+		self.assertTrue(Intersection.inOutline(L_EDGES + hole, (2.0, 2.0)))
+
+	def test_crossesOutline(self):
+		self.assertFalse(Intersection.crossesOutline(L_EDGES, (2.0, 2.0), (3.0, 3.0)))
+		self.assertTrue(Intersection.crossesOutline(L_EDGES, (4.0, 7.0), (6.0, 7.0)))
+		self.assertTrue(Intersection.crossesOutline(L_EDGES, (5.0, 7.0), (4.0, 7.0)))
+
+	def test_floorFormSegment(self):
+		vertical = lambda x, y: ((x, y, -1.0), (x, y, 2.0), (x, y, -1.0), (x, y, 2.0))
+		a, b = Intersection.floorFormSegment(*(vertical(2.0, 2.0) + (FLOOR_BOX, L_EDGES, [])))
+		self.assertPoint(a, (2.0, 2.0, 0.0))
+		self.assertPoint(b, (2.0, 2.0, 1.0))
+		self.assertEqual(Intersection.floorFormSegment(*(vertical(7.0, 7.0) + (FLOOR_BOX, L_EDGES, []))), Intersection.MISS)
+		self.assertEqual(Intersection.floorFormSegment(*(vertical(12.0, 2.0) + (FLOOR_BOX, L_EDGES, []))), Intersection.MISS)
+		# Коммуникация через шахту и наклонная коммуникация через угол выреза считаются по телу
+		shaft = [((1.5, 1.5, 0.0), (2.5, 2.5, 1.0))]
+		self.assertIsNone(Intersection.floorFormSegment(*(vertical(2.0, 2.0) + (FLOOR_BOX, L_EDGES, shaft))))
+		self.assertIsNone(Intersection.floorFormSegment((4.0, 7.0, -1.0), (6.0, 7.0, 2.0), (4.0, 7.0, -1.0), (6.0, 7.0, 2.0), FLOOR_BOX, L_EDGES, []))
+
+
+class WallFormSegmentTest(PointsTest):
+	SHAPE = (START, END, 0.0, 3.0)
+	BOX = ((0.0, -0.25, 0.0), (10.0, 0.25, 3.0))
+
+	def test_simple(self):
+		a, b = Intersection.wallFormSegment((5.0, -2.0, 1.0), (5.0, 2.0, 1.0), (5.0, -2.0, 1.0), (5.0, 2.0, 1.0), self.SHAPE, THICKNESS, self.BOX, [])
+		self.assertPoint(a, (5.0, -0.25, 1.0))
+		self.assertPoint(b, (5.0, 0.25, 1.0))
+
+	def test_miss(self):
+		self.assertEqual(Intersection.wallFormSegment((5.0, -2.0, 4.0), (5.0, 2.0, 4.0), (5.0, -2.0, 4.0), (5.0, 2.0, 4.0), self.SHAPE, THICKNESS, self.BOX, []), Intersection.MISS)
+
+	def test_insert(self):
+		inserts = [((4.5, -0.25, 0.0), (5.5, 0.25, 2.0))]
+		self.assertIsNone(Intersection.wallFormSegment((5.0, -2.0, 1.0), (5.0, 2.0, 1.0), (5.0, -2.0, 1.0), (5.0, 2.0, 1.0), self.SHAPE, THICKNESS, self.BOX, inserts))
+
+
+if __name__ == '__main__':
+	unittest.main()
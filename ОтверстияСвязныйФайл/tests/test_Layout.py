@@ -0,0 +1,76 @@
+# Проверка раскладки проёмов пакета пересечений: объединение и поиск существующих проёмов (Layout)
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import Layout
+import Sizing
+import SpatialIndex
+
+MM = Sizing.MM
+
+
+class OpeningsTest(unittest.TestCase):
+	# Три круглых проёма диаметром 300 мм в стене вдоль оси X: два рядом, третий далеко, и коммуникация вдоль стены
+	CENTERS = [(1.0, 0.0, 1.0), (1.0 + 310 / MM, 0.0, 1.0), (5.0, 0.0, 1.0), (7.0, 0.0, 1.0)]
+	DIRECTIONS = [(1.0, 0.0, 0.0)] * 4
+	SIZES = ([Sizing.ROUND, Sizing.ROUND, Sizing.ROUND, Sizing.NONE], [300 / MM] * 3 + [0.0], [300 / MM] * 3 + [0.0])
+
+	def test_withoutMerge(self):
+		result = Layout.openings('Wall', [1] * 4, self.CENTERS, self.DIRECTIONS, self.SIZES, None)
+		self.assertEqual([r[0] for r in result], [[0], [1], [2]])
+
+	def test_merge(self):
+		result = Layout.openings('Wall', [1] * 4, self.CENTERS, self.DIRECTIONS, self.SIZES, 20 / MM)
+		self.assertEqual([r[0] for r in result], [[0, 1], [2]])
+		group, center, direction, openType, openWidth, openHeight = result[0]
+		self.assertEqual(openType, Sizing.RECT)
+		self.assertAlmostEqual(openWidth * MM, 610.0)
+		self.assertAlmostEqual(openHeight * MM, 300.0)
+		self.assertAlmostEqual(center[0], 1.0 + 155 / MM)
+		self.assertAlmostEqual(center[2], 1.0)
+
+	def test_mergeOnlySameHost(self):
+		result = Layout.openings('Wall', [1, 2, 1, 1], self.CENTERS, self.DIRECTIONS, self.SIZES, 20 / MM)
+		self.assertEqual([r[0] for r in result], [[0], [1], [2]])
+
+	def test_floorMerge(self):
+		centers = [(1.0, 1.0, 0.0), (1.0, 1.0 + 310 / MM, 0.0)]
+		sizes = ([Sizing.ROUND, Sizing.ROUND], [300 / MM] * 2, [300 / MM] * 2)
+		result = Layout.openings('Floor', [1, 1], centers, [(1.0, 0.0, 0.0)] * 2, sizes, 20 / MM)
+		group, center, direction, openType, openWidth, openHeight = result[0]
+		self.assertEqual(group, [0, 1])
+		self.assertAlmostEqual(openWidth * MM, 300.0)
+		self.assertAlmostEqual(openHeight * MM, 610.0)
+		self.assertAlmostEqual(center[1], 1.0 + 155 / MM)
+
+	def test_categNames(self):
+		self.assertEqual(Layout.categNames(['Трубы', 'Воздуховоды', 'Трубы']), 'Трубы, Воздуховоды')
+
+
+class CoveringTest(unittest.TestCase):
+	EXISTING = {10: ((1.0, 0.0, 1.0), (0.5, 0.5)), 11: ((3.0, 0.0, 1.0), (0.2, 0.2))}
+
+	def setUp(self):
+		self.index = SpatialIndex.buildIndex([(key, point, point) for key, (point, size) in self.EXISTING.items()])
+
+	def covering(self, center, openWidth):
+		return Layout.covering(self.index, self.EXISTING.get, 0.1, center, Sizing.ROUND, openWidth, openWidth)
+
+	def test_covered(self):
+		self.assertEqual(self.covering((1.05, 0.0, 1.0), 0.5), 10)
+
+	def test_tooSmall(self):
+		self.assertIsNone(self.covering((3.0, 0.0, 1.0), 0.3))
+
+	def test_tooFar(self):
+		self.assertIsNone(self.covering((1.2, 0.0, 1.0), 0.3))
+
+	def test_emptyIndex(self):
+		self.assertIsNone(Layout.covering(None, self.EXISTING.get, 0.1, (1.0, 0.0, 1.0), Sizing.ROUND, 0.3, 0.3))
+
+
+if __name__ == '__main__':
+	unittest.main()
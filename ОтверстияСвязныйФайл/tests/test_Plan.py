@@ -0,0 +1,67 @@
+# Проверка записи, чтения и сравнения планов проёмов (Plan)
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import Plan
+import Sizing
+
+
+def makePlan(width=0.5):
+	plan = Plan.Plan('Wall 2024-01-01')
+	plan.add('Wall', 101, 7, [12, 11], Sizing.RECT, (1.0, 2.0, 3.0), (1.0, 0.0, 0.0), width, 0.3, 'ОВ', 0.2, '01.01.2024')
+	plan.add('Floor', 202, 8, [13], Sizing.ROUND, (4.0, 5.0, 6.0), (0.0, 1.0, 0.0), 0.25, 0.25, 'ВК', 0.3, '01.01.2024')
+	plan.unresolved.append(['Floor', 203])
+	return plan
+
+
+class PlanTest(unittest.TestCase):
+	def setUp(self):
+		self.dir = tempfile.mkdtemp()
+		self.path = os.path.join(self.dir, 'plan.json')
+
+	def tearDown(self):
+		shutil.rmtree(self.dir)
+
+	def test_roundTrip(self):
+		plan = makePlan()
+		plan.save(self.path)
+		loaded = Plan.Plan.load(self.path)
+		self.assertEqual(loaded.key, plan.key)
+		self.assertEqual(loaded.unresolved, plan.unresolved)
+		self.assertEqual(len(loaded), 2)
+		for i in range(2):
+			self.assertEqual(loaded.row(i), plan.row(i))
+		self.assertEqual(loaded.columns['mepIds'][0], [11, 12])
+		self.assertEqual(loaded.diff(plan), ([], [], []))
+
+	def test_rowKey(self):
+		self.assertEqual(makePlan().rowKey(0), 'Wall:101:11,12')
+
+	def test_diff(self):
+		old = makePlan()
+		new = makePlan(0.6)
+		new.columns['mepIds'][1] = [14]
+		self.assertEqual(new.diff(old), (['Floor:202:14'], ['Floor:202:13'], ['Wall:101:11,12']))
+
+	def test_diffIgnoresRounding(self):
+		self.assertEqual(makePlan(0.5 + 1e-9).diff(makePlan()), ([], [], []))
+
+	def test_missingOrOtherVersion(self):
+		self.assertIsNone(Plan.Plan.load(self.path))
+		self.assertIsNone(Plan.Plan.load(None))
+		with open(self.path, 'w') as f:
+			json.dump({'version': Plan.VERSION + 1, 'columns': {}}, f)
+		self.assertIsNone(Plan.Plan.load(self.path))
+		with open(self.path, 'w') as f:
+			f.write('{')
+		self.assertIsNone(Plan.Plan.load(self.path))
+
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,54 @@
+# Проверка поиска пересечений стояков с плитами по отметкам (Risers)
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import Risers
+
+# Плиты 10 x 10 трёх этажей, плита рядом с ними и узкая плита с отметками 1.5 - 2.5
+FLOORS = [(3, (0.0, 0.0, 6.0), (10.0, 10.0, 6.5)), (1, (0.0, 0.0, 0.0), (10.0, 10.0, 0.5)), (2, (0.0, 0.0, 3.0), (10.0, 10.0, 3.5)),
+	(4, (20.0, 0.0, 0.0), (30.0, 10.0, 0.5)), (5, (0.0, 0.0, 1.5), (10.0, 10.0, 2.5))]
+
+
+class IsRiserTest(unittest.TestCase):
+	def test_steep(self):
+		self.assertTrue(Risers.isRiser((0.0, 0.0, 0.0), (0.0, 0.0, 3.0)))
+		self.assertTrue(Risers.isRiser((0.0, 0.0, 0.0), (1.0, 1.0, 2.0)))
+
+	def test_flat(self):
+		self.assertFalse(Risers.isRiser((0.0, 0.0, 0.0), (3.0, 0.0, 1.0)))
+		self.assertFalse(Risers.isRiser((0.0, 0.0, 1.0), (3.0, 0.0, 1.0)))
+
+
+class CrossingsTest(unittest.TestCase):
+	def setUp(self):
+		self.index = Risers.buildIndex([item for item in FLOORS if item[0] != 5], 5.0)
+
+	def test_orderedByElevation(self):
+		found = self.index.crossings((5.0, 5.0, 7.0), (5.0, 5.0, -1.0))
+		self.assertEqual([key for key, ends in found], [1, 2, 3])
+		for (key, ends), z in zip(found, (0.0, 3.0, 6.0)):
+			self.assertAlmostEqual(min(ends[0][2], ends[1][2]), z)
+			self.assertAlmostEqual(max(ends[0][2], ends[1][2]), z + 0.5)
+
+	def test_partOfHeight(self):
+		self.assertEqual([key for key, ends in self.index.crossings((5.0, 5.0, 1.0), (5.0, 5.0, 4.0))], [2])
+		self.assertEqual(self.index.crossings((5.0, 5.0, 1.0), (5.0, 5.0, 2.0)), [])
+
+	def test_otherCell(self):
+		self.assertEqual([key for key, ends in self.index.crossings((25.0, 5.0, -1.0), (25.0, 5.0, 1.0))], [4])
+
+	def test_leavesPlan(self):
+		index = Risers.buildIndex(FLOORS)
+		found = dict(index.crossings((9.5, 5.0, -1.0), (10.5, 5.0, 5.0)))
+		self.assertEqual(sorted(found), [1, 5])
+		self.assertIsNotNone(found[1])
+		self.assertIsNone(found[5])
+		self.assertIn(5, index)
+		self.assertEqual(len(index), 5)
+
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,115 @@
+# Проверка расчёта размеров и типа проёмов (Sizing)
+# Запуск из папки скриптов: python -m pytest tests или python -m unittest discover -s tests
+import math
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import Sizing
+
+MM = Sizing.MM
+
+
+class RoundSizeTest(unittest.TestCase):
+	def test_roundsToCentimetres(self):
+		self.assertAlmostEqual(Sizing.roundSize(123.0 / MM) * MM, 120.0)
+		self.assertAlmostEqual(Sizing.roundSize(127.0 / MM) * MM, 130.0)
+
+	def test_halfRoundsUp(self):
+		self.assertAlmostEqual(Sizing.roundSize(125.0 / MM) * MM, 130.0)
+
+	def test_reserve(self):
+		self.assertAlmostEqual(Sizing.withReserve(2.0, False, 0.5), 2.5)
+		self.assertAlmostEqual(Sizing.withReserve(2.0, True, 1.5), 3.0)
+
+
+class OpeningTypeTest(unittest.TestCase):
+	def test_round(self):
+		self.assertEqual(Sizing.openingType(200 / MM, 150 / MM, 1.5, 300 / MM), Sizing.ROUND)
+
+	def test_rectByRatio(self):
+		self.assertEqual(Sizing.openingType(200 / MM, 100 / MM, 1.5, 300 / MM), Sizing.RECT)
+
+	def test_rectByDiameter(self):
+		self.assertEqual(Sizing.openingType(400 / MM, 400 / MM, 1.5, 300 / MM), Sizing.RECT)
+
+	def test_zeroSide(self):
+		self.assertEqual(Sizing.openingType(200 / MM, 0.0, 1.5, 300 / MM), Sizing.RECT)
+
+
+class WallOpeningTest(unittest.TestCase):
+	# Стена вдоль оси X толщиной 200 мм, сечение коммуникации 100 x 100 мм, запас 50 мм
+	def opening(self, end0, end1):
+		return Sizing.wallOpening((1.0, 0.0), 200 / MM, end0, end1, 100 / MM, 100 / MM, False, 50 / MM, 1.5, 500 / MM)
+
+	def test_perpendicular(self):
+		openType, openWidth, openHeight = self.opening((0.0, -0.3, 1.0), (0.0, 0.3, 1.0))
+		self.assertEqual(openType, Sizing.ROUND)
+		self.assertAlmostEqual(openWidth * MM, 150.0)
+		self.assertAlmostEqual(openHeight * MM, 150.0)
+
+	def test_roundTakesLargerSide(self):
+		openType, openWidth, openHeight = Sizing.wallOpening((1.0, 0.0), 200 / MM, (0.0, -0.3, 1.0), (0.0, 0.3, 1.0),
+			200 / MM, 250 / MM, False, 50 / MM, 1.5, 500 / MM)
+		self.assertEqual(openType, Sizing.ROUND)
+		self.assertAlmostEqual(openWidth * MM, 300.0)
+		self.assertAlmostEqual(openHeight * MM, 300.0)
+
+	def test_oblique(self):
+		openType, openWidth, openHeight = self.opening((-0.3, -0.3, 1.0), (0.3, 0.3, 1.0))
+		minWidth = 200 + 100 * 2**0.5 + 50
+		self.assertAlmostEqual(openWidth * MM, math.floor(minWidth / 10 + 0.5) * 10)
+		self.assertAlmostEqual(openHeight * MM, 150.0)
+		self.assertEqual(openType, Sizing.RECT)
+
+	def test_parallelNeedsNoOpening(self):
+		self.assertEqual(self.opening((0.0, 0.0, 1.0), (1.0, 0.0, 1.0)), (Sizing.NONE, 0.0, 0.0))
+		self.assertEqual(self.opening((0.0, 0.0, 1.0), (1.0, 1e-9, 1.0)), (Sizing.NONE, 0.0, 0.0))
+
+	def test_verticalNeedsNoOpening(self):
+		self.assertEqual(self.opening((0.0, 0.0, 0.0), (0.0, 0.0, 1.0)), (Sizing.NONE, 0.0, 0.0))
+
+	def test_batchMatchesSingle(self):
+		ends = [((0.0, -0.3, 1.0), (0.0, 0.3, 1.0)), ((-0.3, -0.3, 1.0), (0.3, 0.3, 1.0)), ((0.0, 0.0, 1.0), (1.0, 0.0, 1.0)),
+			((0.0, -0.3, 1.0), (0.0, 0.3, 1.0))]
+		widths = [100 / MM] * 3 + [200 / MM]
+		heights = [100 / MM] * 3 + [250 / MM]
+		columns = Sizing.wallOpenings([(1.0, 0.0)] * 4, [200 / MM] * 4, [e[0] for e in ends], [e[1] for e in ends],
+			widths, heights, False, 50 / MM, 1.5, 500 / MM)
+		self.assertEqual(columns[0][3], Sizing.ROUND)
+		for n, (end0, end1) in enumerate(ends):
+			single = Sizing.wallOpening((1.0, 0.0), 200 / MM, end0, end1, widths[n], heights[n], False, 50 / MM, 1.5, 500 / MM)
+			self.assertEqual(columns[0][n], single[0])
+			self.assertAlmostEqual(columns[1][n], single[1])
+			self.assertAlmostEqual(columns[2][n], single[2])
+		self.assertEqual(Sizing.wallOpenings([], [], [], [], [], [], False, 0.0, 1.5, 1.0), ([], [], []))
+
+
+class FloorOpeningTest(unittest.TestCase):
+	def test_reserveRatio(self):
+		openType, openWidth, openHeight = Sizing.floorOpening(100 / MM, 200 / MM, True, 1.2, 1.5, 500 / MM)
+		self.assertEqual(openType, Sizing.RECT)
+		self.assertAlmostEqual(openWidth * MM, 120.0)
+		self.assertAlmostEqual(openHeight * MM, 240.0)
+
+	def test_roundTakesLargerSide(self):
+		# Воздуховод 200 x 250 мм с запасом 50 мм: круглый проём диаметром 300 мм
+		self.assertEqual(Sizing.floorOpening(200 / MM, 250 / MM, False, 50 / MM, 1.5, 500 / MM), (Sizing.ROUND, 300 / MM, 300 / MM))
+		self.assertEqual(Sizing.floorOpening(250 / MM, 200 / MM, False, 50 / MM, 1.5, 500 / MM), (Sizing.ROUND, 300 / MM, 300 / MM))
+
+	def test_batchMatchesSingle(self):
+		widths = [100 / MM, 300 / MM, 200 / MM]
+		heights = [100 / MM, 150 / MM, 250 / MM]
+		columns = Sizing.floorOpenings(widths, heights, False, 50 / MM, 1.5, 500 / MM)
+		self.assertEqual(columns[0][2], Sizing.ROUND)
+		for n in range(3):
+			single = Sizing.floorOpening(widths[n], heights[n], False, 50 / MM, 1.5, 500 / MM)
+			self.assertEqual(columns[0][n], single[0])
+			self.assertAlmostEqual(columns[1][n], single[1])
+			self.assertAlmostEqual(columns[2][n], single[2])
+
+
+if __name__ == '__main__':
+	unittest.main()
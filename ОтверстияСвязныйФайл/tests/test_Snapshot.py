@@ -0,0 +1,88 @@
+# Проверка записи и чтения снимков модели (Snapshot)
+import os
+import shutil
+import struct
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import Snapshot
+
+SETTINGS = {'reserve': 50, 'mergeGap': None}
+
+# Стена простой формы, плита с формой (контур и шахта) и основа без формы
+WALL = ('Wall', 101, 7, 0.5, (1.0, 0.0), ((0.0, 0.0, 0.0), (10.0, 0.0, 0.0), 0.0, 3.0), None,
+	([], [((4.0, -0.25, 0.0), (5.0, 0.25, 2.0))]), (0.0, -0.25, 0.0), (10.0, 0.25, 3.0))
+FLOOR = ('Floor', 202, 8, 0.3, None, None, ((0.0, 0.0, 2.7), (10.0, 10.0, 3.0)),
+	([((0.0, 0.0), (10.0, 0.0)), ((10.0, 10.0), (10.0, 0.0)), ((0.0, 10.0), (10.0, 10.0)), ((0.0, 0.0), (0.0, 10.0))],
+	[((2.0, 2.0, 2.7), (3.0, 3.0, 3.0))]), (0.0, 0.0, 2.7), (10.0, 10.0, 3.0))
+OTHER = ('Wall', 103, 7, 0.4, (0.0, 1.0), None, None, None, (-0.2, 0.0, 0.0), (0.2, 5.0, 3.0))
+MEPS = [(11, 0, 'Трубы', 'Round', 0.2, 0.2, True, (5.0, -1.0, 1.0), (5.0, 1.0, 1.0), (4.9, -1.0, 0.9), (5.1, 1.0, 1.1), None),
+	(12, 1, 'Воздуховоды', 'Rectangular', 0.5, 0.3, False, (3.0, 3.0, 0.0), (3.0, 3.0, 4.0), (2.75, 2.85, 0.0), (3.25, 3.15, 4.0), (1.0, 0.0, 0.0))]
+EXISTING = [('Wall', 301, (5.0, 0.0, 1.0), (0.3, 0.3))]
+
+
+def makeSnapshot():
+	snap = Snapshot.Snapshot('WallFloor 2024-01-01', SETTINGS)
+	for host in (WALL, FLOOR, OTHER):
+		snap.addHost(*host)
+	for mep in MEPS:
+		snap.addMep(*mep)
+	for item in EXISTING:
+		snap.addExisting(*item)
+	return snap
+
+
+class SnapshotTest(unittest.TestCase):
+	def setUp(self):
+		self.dir = tempfile.mkdtemp()
+		self.path = os.path.join(self.dir, 'snapshot.bin')
+
+	def tearDown(self):
+		shutil.rmtree(self.dir)
+
+	def load(self):
+		snap = Snapshot.Snapshot.load(self.path)
+		self.addCleanup(snap.close)
+		return snap
+
+	def test_roundTrip(self):
+		makeSnapshot().save(self.path)
+		snap = self.load()
+		self.assertEqual(snap.key, 'WallFloor 2024-01-01')
+		self.assertEqual(snap.settings, SETTINGS)
+		self.assertEqual(len(snap.hosts), 3)
+		for name, values in zip(Snapshot.HOST_FIELDS, zip(WALL, FLOOR, OTHER)):
+			self.assertEqual(list(snap.hosts[name]), list(values), name)
+		for name, values in zip(Snapshot.MEP_FIELDS, zip(*MEPS)):
+			self.assertEqual(list(snap.meps[name]), list(values), name)
+		for name, values in zip(Snapshot.EXISTING_FIELDS, zip(*EXISTING)):
+			self.assertEqual(list(snap.existing[name]), list(values), name)
+
+	def test_unknownField(self):
+		makeSnapshot().save(self.path)
+		with self.assertRaises(KeyError):
+			self.load().hosts['missing']
+
+	def test_empty(self):
+		Snapshot.Snapshot().save(self.path)
+		snap = self.load()
+		self.assertEqual(len(snap.hosts), 0)
+		self.assertEqual(list(snap.hosts['form']), [])
+		self.assertEqual(list(snap.meps['id']), [])
+
+	def test_missingOrOtherVersion(self):
+		self.assertIsNone(Snapshot.Snapshot.load(self.path))
+		open(self.path, 'wb').close()
+		self.assertIsNone(Snapshot.Snapshot.load(self.path))
+		makeSnapshot().save(self.path)
+		with open(self.path, 'r+b') as f:
+			f.seek(len(Snapshot.MAGIC))
+			f.write(struct.pack('<I', Snapshot.VERSION + 1))
+		self.assertIsNone(Snapshot.Snapshot.load(self.path))
+
+
+if __name__ == '__main__':
+	unittest.main()